@@ -9,7 +9,8 @@ from .forms import (
     StaffAccountUpdateForm,
 )
 from .models import ComplexAdminProfile, OwnerAccount, StaffAccount
-from .utils import get_complex_for_admin, is_superadmin, superadmin_required
+from .principal import get_principal
+from .utils import is_superadmin, superadmin_required
 
 
 # ===== Edit/Delete: Complex Admin (superadmin only) =====
@@ -50,10 +51,10 @@ def delete_complex_admin(request, pk):
 def _user_can_manage_owner_account(user, owner_account: OwnerAccount) -> bool:
     if is_superadmin(user):
         return True
-    complex_obj = get_complex_for_admin(user)
-    if complex_obj is None:
+    admin_complex_id = get_principal(user).admin_complex_id
+    if admin_complex_id is None:
         return False
-    return owner_account.owner.complex_id == complex_obj.pk
+    return owner_account.owner.complex_id == admin_complex_id
 
 
 @login_required
@@ -98,10 +99,10 @@ def delete_owner_account(request, pk):
 def _user_can_manage_staff_account(user, staff_account: StaffAccount) -> bool:
     if is_superadmin(user):
         return True
-    complex_obj = get_complex_for_admin(user)
-    if complex_obj is None:
+    admin_complex_id = get_principal(user).admin_complex_id
+    if admin_complex_id is None:
         return False
-    return staff_account.staff.complex_id == complex_obj.pk
+    return staff_account.staff.complex_id == admin_complex_id
 
 
 @login_required
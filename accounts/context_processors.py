@@ -0,0 +1,6 @@
+from .principal import ANONYMOUS_PRINCIPAL
+
+
+def principal(request):
+    """Робить principal доступним у шаблонах без додаткових запитів."""
+    return {'principal': getattr(request, 'principal', ANONYMOUS_PRINCIPAL)}
@@ -0,0 +1,32 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.functional import SimpleLazyObject
+
+from .principal import get_principal
+
+
+class PrincipalMiddleware:
+    """
+    Додає до запиту request.principal — ролі поточного користувача,
+    визначені одним запитом до бази (ліниво, при першому зверненні).
+    Має стояти після AuthenticationMiddleware.
+    Працює і під ASGI без переходу в потік: async view отримують
+    principal через aget_principal і підставляють його в request.principal.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.principal = SimpleLazyObject(lambda: get_principal(request.user))
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.principal = SimpleLazyObject(lambda: get_principal(request.user))
+        return await self.get_response(request)
@@ -0,0 +1,323 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+from complexes.models import ResidentialComplex
+from complexes.owner_compat import owner_has_complex_column
+
+
+ROLE_SUPERADMIN = 'superadmin'
+ROLE_COMPLEX_ADMIN = 'complex_admin'
+ROLE_OWNER = 'owner'
+ROLE_GUARD = 'guard'
+ROLE_TECHNICIAN = 'technician'
+
+PRINCIPAL_ATTR = '_principal'
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Знімок ролей користувача на час одного запиту.
+    Містить усі прив'язки (адмін ЖК, власник, співробітник), щоб перевірки
+    прав не ходили в базу повторно.
+    """
+    user_id: int | None = None
+    is_authenticated: bool = False
+    is_superuser: bool = False
+    admin_complex_id: int | None = None
+    owner_id: int | None = None
+    owner_complex_id: int | None = None
+    staff_id: int | None = None
+    staff_complex_id: int | None = None
+    staff_access_type: str | None = None
+
+    @property
+    def is_superadmin(self):
+        return self.is_authenticated and self.is_superuser
+
+    @property
+    def is_complex_admin(self):
+        return self.is_authenticated and self.admin_complex_id is not None
+
+    @property
+    def is_owner(self):
+        return self.is_authenticated and self.owner_id is not None
+
+    @property
+    def is_staff_member(self):
+        return self.is_authenticated and self.staff_id is not None
+
+    @property
+    def is_guard(self):
+        return self.is_staff_member and self.staff_access_type == 'guard'
+
+    @property
+    def is_technician(self):
+        return self.is_staff_member and (self.staff_access_type or 'maintenance') == 'maintenance'
+
+    @property
+    def role(self):
+        """Основна роль (у тому ж порядку, що й у кабінеті)."""
+        if self.is_superadmin:
+            return ROLE_SUPERADMIN
+        if self.is_complex_admin:
+            return ROLE_COMPLEX_ADMIN
+        if self.is_owner:
+            return ROLE_OWNER
+        if self.is_guard:
+            return ROLE_GUARD
+        if self.is_technician:
+            return ROLE_TECHNICIAN
+        return None
+
+    @property
+    def complex_id(self):
+        """ЖК, до якого прив'язана основна роль."""
+        role = self.role
+        if role == ROLE_COMPLEX_ADMIN:
+            return self.admin_complex_id
+        if role == ROLE_OWNER:
+            return self.owner_complex_id
+        if role in (ROLE_GUARD, ROLE_TECHNICIAN):
+            return self.staff_complex_id
+        return None
+
+    @cached_property
+    def admin_complex(self):
+        if self.admin_complex_id is None:
+            return None
+        return ResidentialComplex.objects.filter(pk=self.admin_complex_id).first()
+
+    @cached_property
+    def staff_complex(self):
+        if self.staff_complex_id is None:
+            return None
+        return ResidentialComplex.objects.filter(pk=self.staff_complex_id).first()
+
+
+ANONYMOUS_PRINCIPAL = Principal()
+
+
+class PrincipalCache:
+    """
+    Кеш прив'язок користувача між запитами.
+
+    За замовчуванням записи лежать у кеші Django PRINCIPAL_CACHE_ALIAS,
+    спільному для всіх воркерів (CACHE_BACKEND=file), тож скидання із
+    сигналів accounts/signals.py одразу бачать усі процеси, а TTL —
+    PRINCIPAL_CACHE_TIMEOUT. Якщо кеш лише в пам'яті процесу (порожній
+    PRINCIPAL_CACHE_ALIAS — LRU, або LocMemCache), сигнал скидає запис
+    тільки в поточному воркері: інші бачать старі ролі до закінчення
+    PRINCIPAL_CACHE_LOCAL_TIMEOUT, тому він лише кілька секунд.
+    """
+
+    KEY_PREFIX = 'accounts:principal:'
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_entries(self):
+        return getattr(settings, 'PRINCIPAL_CACHE_SIZE', 1024)
+
+    def _shared_cache(self):
+        alias = getattr(settings, 'PRINCIPAL_CACHE_ALIAS', 'default')
+        return caches[alias] if alias else None
+
+    def _timeout(self, shared):
+        if shared is not None and not isinstance(shared, LocMemCache):
+            return getattr(settings, 'PRINCIPAL_CACHE_TIMEOUT', 60)
+        return getattr(settings, 'PRINCIPAL_CACHE_LOCAL_TIMEOUT', 5)
+
+    def _get_local(self, user_id):
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                expires_at, bindings = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(user_id)
+                    return dict(bindings)
+                del self._entries[user_id]
+        return None
+
+    def get(self, user_id):
+        shared = self._shared_cache()
+        if shared is None:
+            return self._get_local(user_id)
+        bindings = shared.get(f'{self.KEY_PREFIX}{user_id}')
+        return None if bindings is None else dict(bindings)
+
+    async def aget(self, user_id):
+        shared = self._shared_cache()
+        if shared is None:
+            return self._get_local(user_id)
+        bindings = await shared.aget(f'{self.KEY_PREFIX}{user_id}')
+        return None if bindings is None else dict(bindings)
+
+    def set(self, user_id, bindings):
+        shared = self._shared_cache()
+        if shared is None:
+            self._store_local(user_id, bindings)
+        else:
+            shared.set(f'{self.KEY_PREFIX}{user_id}', bindings, self._timeout(shared))
+
+    async def aset(self, user_id, bindings):
+        shared = self._shared_cache()
+        if shared is None:
+            self._store_local(user_id, bindings)
+        else:
+            await shared.aset(f'{self.KEY_PREFIX}{user_id}', bindings, self._timeout(shared))
+
+    def _store_local(self, user_id, bindings):
+        max_entries = self.max_entries
+        if max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self._timeout(None), dict(bindings))
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        if user_id is None:
+            return
+        with self._lock:
+            self._entries.pop(user_id, None)
+        shared = self._shared_cache()
+        if shared is not None:
+            shared.delete(f'{self.KEY_PREFIX}{user_id}')
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache()
+
+
+def invalidate_principal(user_id):
+    """Скинути кеш ролей користувача (викликається із сигналів)."""
+    principal_cache.invalidate(user_id)
+
+
+def _binding_fields():
+    fields = {
+        'admin_complex_id': 'complex_admin_profile__complex_id',
+        'owner_id': 'owner_account__owner_id',
+        'staff_id': 'staff_account__staff_id',
+        'staff_complex_id': 'staff_account__staff__complex_id',
+        'staff_access_type': 'staff_account__access_type',
+    }
+    if owner_has_complex_column():
+        fields['owner_complex_id'] = 'owner_account__owner__complex_id'
+    return fields
+
+
+def _load_bindings(user_id):
+    """
+    Один запит з LEFT JOIN на ComplexAdminProfile, OwnerAccount та StaffAccount.
+    """
+    fields = _binding_fields()
+    row = get_user_model().objects.filter(pk=user_id).values(*fields.values()).first() or {}
+    return {name: row.get(lookup) for name, lookup in fields.items()}
+
+
+async def _aload_bindings(user_id):
+    # owner_has_complex_column перевіряє схему синхронно (один раз на процес)
+    fields = await sync_to_async(_binding_fields)()
+    row = await get_user_model().objects.filter(pk=user_id).values(*fields.values()).afirst() or {}
+    return {name: row.get(lookup) for name, lookup in fields.items()}
+
+
+def _principal_for(user, bindings):
+    # is_superuser береться з самого user, тож його зміна не потребує інвалідації.
+    return Principal(
+        user_id=user.pk,
+        is_authenticated=True,
+        is_superuser=bool(user.is_superuser),
+        **bindings,
+    )
+
+
+def load_principal(user):
+    if user is None or not user.is_authenticated:
+        return ANONYMOUS_PRINCIPAL
+
+    bindings = principal_cache.get(user.pk)
+    if bindings is None:
+        bindings = _load_bindings(user.pk)
+        principal_cache.set(user.pk, bindings)
+    return _principal_for(user, bindings)
+
+
+async def aload_principal(user):
+    if user is None or not user.is_authenticated:
+        return ANONYMOUS_PRINCIPAL
+
+    bindings = await principal_cache.aget(user.pk)
+    if bindings is None:
+        bindings = await _aload_bindings(user.pk)
+        await principal_cache.aset(user.pk, bindings)
+    return _principal_for(user, bindings)
+
+
+def get_principal(user):
+    """
+    Principal для користувача, закешований на самому об'єкті user,
+    тож у межах запиту ролі визначаються лише один раз.
+    """
+    if user is None or not user.is_authenticated:
+        return ANONYMOUS_PRINCIPAL
+    principal = getattr(user, PRINCIPAL_ATTR, None)
+    if principal is None or principal.user_id != user.pk:
+        principal = load_principal(user)
+        setattr(user, PRINCIPAL_ATTR, principal)
+    return principal
+
+
+async def aget_principal(user):
+    """
+    get_principal для async view: user — результат await request.auser().
+    Кеш ролей той самий, запит до бази — через async ORM.
+    """
+    if user is None or not user.is_authenticated:
+        return ANONYMOUS_PRINCIPAL
+    principal = getattr(user, PRINCIPAL_ATTR, None)
+    if principal is None or principal.user_id != user.pk:
+        principal = await aload_principal(user)
+        setattr(user, PRINCIPAL_ATTR, principal)
+    return principal
+
+
+async def arequest_principal(request):
+    """
+    Principal поточного запиту для async view. Підставляє користувача
+    й principal у request, щоб спільні helper-и та шаблони не зверталися
+    до бази синхронно.
+    """
+    user = await request.auser()
+    request.user = user
+    request.principal = await aget_principal(user)
+    return request.principal
+
+
+def reset_principal(user):
+    """Скинути закешований principal (після зміни ролей користувача)."""
+    if user is None:
+        return
+    try:
+        delattr(user, PRINCIPAL_ATTR)
+    except AttributeError:
+        pass
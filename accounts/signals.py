@@ -1,8 +1,10 @@
-from django.db.models.signals import post_delete
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 
+from complexes.models import Owner, Staff
 from .models import ComplexAdminProfile, OwnerAccount, StaffAccount
+from .principal import invalidate_principal
 
 
 User = get_user_model()
@@ -36,15 +38,51 @@ def _try_delete_user(user: User):
 
 @receiver(post_delete, sender=OwnerAccount)
 def _owner_account_deleted(sender, instance: OwnerAccount, **kwargs):
+    invalidate_principal(instance.user_id)
     _try_delete_user(getattr(instance, "user", None))
 
 
 @receiver(post_delete, sender=StaffAccount)
 def _staff_account_deleted(sender, instance: StaffAccount, **kwargs):
+    invalidate_principal(instance.user_id)
     _try_delete_user(getattr(instance, "user", None))
 
 
 @receiver(post_delete, sender=ComplexAdminProfile)
 def _complex_admin_deleted(sender, instance: ComplexAdminProfile, **kwargs):
+    invalidate_principal(instance.user_id)
     _try_delete_user(getattr(instance, "user", None))
 
+
+# ===== Інвалідація кешу ролей (accounts.principal) =====
+
+@receiver(post_save, sender=OwnerAccount)
+@receiver(post_save, sender=StaffAccount)
+@receiver(post_save, sender=ComplexAdminProfile)
+def _account_saved(sender, instance, **kwargs):
+    invalidate_principal(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _user_changed(sender, instance, **kwargs):
+    invalidate_principal(instance.pk)
+
+
+@receiver(post_save, sender=Owner)
+def _owner_saved(sender, instance: Owner, created=False, **kwargs):
+    # Зміна ЖК власника змінює owner_complex_id у кеші.
+    if created:
+        return
+    for user_id in OwnerAccount.objects.filter(owner=instance).values_list('user_id', flat=True):
+        invalidate_principal(user_id)
+
+
+@receiver(post_save, sender=Staff)
+def _staff_saved(sender, instance: Staff, created=False, **kwargs):
+    # Зміна ЖК співробітника змінює staff_complex_id у кеші.
+    if created:
+        return
+    for user_id in StaffAccount.objects.filter(staff=instance).values_list('user_id', flat=True):
+        invalidate_principal(user_id)
+
@@ -1,3 +1,114 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from accounts.models import ComplexAdminProfile, StaffAccount
+from accounts.principal import (
+    ROLE_COMPLEX_ADMIN, ROLE_GUARD, PrincipalCache, get_principal, principal_cache,
+)
+from complexes.models import ResidentialComplex, Staff
+from complexes.owner_compat import owner_has_complex_column
+
+
+User = get_user_model()
+
+
+class PrincipalTests(TestCase):
+    def setUp(self):
+        self.complex_one = ResidentialComplex.objects.create(name='A', address='Addr A')
+
+    def test_complex_admin_principal_is_resolved_with_single_query(self):
+        user = User.objects.create_user(username='admin', password='pass12345')
+        ComplexAdminProfile.objects.create(user=user, complex=self.complex_one)
+        owner_has_complex_column()
+
+        with self.assertNumQueries(1):
+            principal = get_principal(user)
+            get_principal(user)
+
+        self.assertEqual(principal.role, ROLE_COMPLEX_ADMIN)
+        self.assertEqual(principal.complex_id, self.complex_one.pk)
+        self.assertTrue(principal.is_complex_admin)
+        self.assertFalse(principal.is_superadmin)
+
+    def test_guard_principal_uses_staff_complex(self):
+        user = User.objects.create_user(username='guard', password='pass12345')
+        staff = Staff.objects.create(fullname='Guard', complex=self.complex_one)
+        StaffAccount.objects.create(user=user, staff=staff, access_type='guard')
+
+        principal = get_principal(user)
+
+        self.assertEqual(principal.role, ROLE_GUARD)
+        self.assertEqual(principal.complex_id, self.complex_one.pk)
+        self.assertTrue(principal.is_guard)
+        self.assertFalse(principal.is_technician)
+
+
+class PrincipalCacheTests(TestCase):
+    def setUp(self):
+        self.complex_one = ResidentialComplex.objects.create(name='A', address='Addr A')
+        self.user = User.objects.create_user(username='cached', password='pass12345')
+        owner_has_complex_column()
+
+    def test_principal_is_reused_across_requests(self):
+        get_principal(User.objects.get(pk=self.user.pk))
+        fresh_user = User.objects.get(pk=self.user.pk)
+
+        with self.assertNumQueries(0):
+            principal = get_principal(fresh_user)
+
+        self.assertIsNone(principal.role)
+
+    def test_bindings_are_kept_in_shared_cache(self):
+        get_principal(User.objects.get(pk=self.user.pk))
+
+        self.assertIsNotNone(caches['default'].get(f'{PrincipalCache.KEY_PREFIX}{self.user.pk}'))
+        ComplexAdminProfile.objects.create(user=self.user, complex=self.complex_one)
+        self.assertIsNone(caches['default'].get(f'{PrincipalCache.KEY_PREFIX}{self.user.pk}'))
+
+    def test_account_changes_invalidate_cached_principal(self):
+        self.assertFalse(get_principal(User.objects.get(pk=self.user.pk)).is_complex_admin)
+
+        profile = ComplexAdminProfile.objects.create(user=self.user, complex=self.complex_one)
+        self.assertTrue(get_principal(User.objects.get(pk=self.user.pk)).is_complex_admin)
+
+        complex_two = ResidentialComplex.objects.create(name='B', address='Addr B')
+        profile.complex = complex_two
+        profile.save()
+        self.assertEqual(
+            get_principal(User.objects.get(pk=self.user.pk)).admin_complex_id,
+            complex_two.pk,
+        )
+
+    def test_dashboard_of_stale_owner_principal_is_not_found(self):
+        self.client.force_login(self.user)
+        # власника видалено, а роль ще в кеші
+        principal_cache.set(self.user.pk, {'owner_id': 999999})
+
+        self.assertEqual(self.client.get(reverse('accounts:dashboard')).status_code, 404)
+
+
+class SessionQueryTests(TestCase):
+    def test_authenticated_page_view_does_not_query_session_table(self):
+        user = User.objects.create_user(username='viewer', password='pass12345')
+        self.client.force_login(user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('accounts:dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user, user)
+        self.assertFalse([q['sql'] for q in queries if 'django_session' in q['sql']])
+
+    def test_session_survives_cache_eviction(self):
+        user = User.objects.create_user(username='evicted', password='pass12345')
+        self.client.force_login(user)
+        caches['default'].clear()
+
+        response = self.client.get(reverse('accounts:dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.wsgi_request.user, user)
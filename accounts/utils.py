@@ -3,7 +3,7 @@ from functools import wraps
 from django.contrib.auth.views import redirect_to_login
 
 from residence_manager.responses import forbidden_response
-from .models import ComplexAdminProfile
+from .principal import get_principal
 from complexes.models import ResidentialComplex
 
 
@@ -19,17 +19,14 @@ def is_complex_admin(user):
     """
     Користувач, прив'язаний як ComplexAdminProfile.
     """
-    return user.is_authenticated and ComplexAdminProfile.objects.filter(user=user).exists()
+    return get_principal(user).is_complex_admin
 
 
 def get_complex_for_admin(user):
     """
     ЖК, за який відповідає Complex Admin.
     """
-    try:
-        return user.complex_admin_profile.complex
-    except ComplexAdminProfile.DoesNotExist:
-        return None
+    return get_principal(user).admin_complex
 
 
 def user_can_manage_complex(user, complex_obj: ResidentialComplex) -> bool:
@@ -42,7 +39,7 @@ def user_can_manage_complex(user, complex_obj: ResidentialComplex) -> bool:
         return False
     if is_superadmin(user):
         return True
-    return ComplexAdminProfile.objects.filter(user=user, complex=complex_obj).exists()
+    return get_principal(user).admin_complex_id == complex_obj.pk
 
 
 def _role_required(test_func):
@@ -51,7 +48,8 @@ def _role_required(test_func):
         def wrapped(request, *args, **kwargs):
             if not request.user.is_authenticated:
                 return redirect_to_login(request.get_full_path())
-            if not test_func(request.user):
+            principal = getattr(request, 'principal', None) or get_principal(request.user)
+            if not test_func(principal):
                 return forbidden_response(request)
             return view_func(request, *args, **kwargs)
 
@@ -60,5 +58,5 @@ def _role_required(test_func):
     return decorator
 
 
-superadmin_required = _role_required(is_superadmin)
-complex_admin_required = _role_required(is_complex_admin)
+superadmin_required = _role_required(lambda principal: principal.is_superadmin)
+complex_admin_required = _role_required(lambda principal: principal.is_complex_admin)
@@ -3,7 +3,7 @@ from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
 from django.http import HttpResponseForbidden
 from .models import ComplexAdminProfile, OwnerAccount, StaffAccount
-from complexes.models import ResidentialComplex
+from complexes.models import ComplexStats, Owner, ResidentialComplex, Staff
 from .forms import (
     ComplexAdminCreateForm,
     OwnerAccountCreateForm,
@@ -13,8 +13,6 @@ from .forms import (
     StaffAccountUpdateForm,
 )
 from .utils import (
-    is_superadmin,
-    get_complex_for_admin,
     superadmin_required,
     complex_admin_required,
 )
@@ -22,16 +20,16 @@ from .utils import (
 
 @login_required
 def dashboard(request):
-    user = request.user
+    principal = request.principal
 
-    if is_superadmin(user):
+    if principal.is_superadmin:
         complex_admins = ComplexAdminProfile.objects.select_related('user', 'complex')
         return render(request, 'accounts/dashboard_superadmin.html', {
             'complex_admins': complex_admins,
         })
 
-    if hasattr(user, 'complex_admin_profile'):
-        complex_id = user.complex_admin_profile.complex_id
+    if principal.is_complex_admin:
+        complex_id = principal.admin_complex_id
         owner_accounts = OwnerAccount.objects.filter(
             owner__complex_id=complex_id
         ).select_related('user', 'owner').distinct()
@@ -39,13 +37,14 @@ def dashboard(request):
             staff__complex_id=complex_id
         ).select_related('user', 'staff')
         return render(request, 'accounts/dashboard_complex_admin.html', {
-            'complex': user.complex_admin_profile.complex,
+            'complex': principal.admin_complex,
+            'stats': ComplexStats.objects.filter(pk=complex_id).first(),
             'owner_accounts': owner_accounts,
             'staff_accounts': staff_accounts,
         })
 
-    if hasattr(user, 'owner_account'):
-        owner = user.owner_account.owner
+    if principal.is_owner:
+        owner = get_object_or_404(Owner, pk=principal.owner_id)
         apartments = owner.apartments.select_related(
             'entrance', 'entrance__building', 'entrance__building__complex'
         )
@@ -54,12 +53,11 @@ def dashboard(request):
             'apartments': apartments,
         })
 
-    if hasattr(user, 'staff_account'):
-        staff_account = user.staff_account
-        staff = staff_account.staff
+    if principal.is_staff_member:
+        staff = get_object_or_404(Staff.objects.select_related('complex'), pk=principal.staff_id)
         return render(request, 'accounts/dashboard_staff.html', {
             'staff': staff,
-            'access_type': staff_account.access_type,
+            'access_type': principal.staff_access_type,
         })
 
     return render(request, 'accounts/dashboard_generic.html')
@@ -86,7 +84,7 @@ def create_complex_admin(request):
 
 @complex_admin_required
 def create_owner_account(request):
-    complex_obj = get_complex_for_admin(request.user)
+    complex_obj = request.principal.admin_complex
 
     if request.method == 'POST':
         form = OwnerAccountCreateForm(request.POST, complex_obj=complex_obj)
@@ -107,7 +105,7 @@ def create_owner_account(request):
 
 @complex_admin_required
 def create_staff_account(request):
-    complex_obj = get_complex_for_admin(request.user)
+    complex_obj = request.principal.admin_complex
 
     if request.method == 'POST':
         form = StaffAccountCreateForm(request.POST, complex_obj=complex_obj)
@@ -1,26 +1,42 @@
+import json
+
+from asgiref.sync import sync_to_async
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core import signing
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.views.decorators.http import require_POST
 
+from accounts.principal import arequest_principal, get_principal
 from accounts.utils import get_complex_for_admin, is_complex_admin, is_superadmin
 from residence_manager.responses import forbidden_response
 
+from .entry_log import entries_for_day, visitor_entries
+from .exports import VISITOR_EXPORT_COLUMNS, requested_export_format, stream_export
 from .forms import ResidentForm, VisitorForm
 from .models import Apartment, ResidentialComplex, Visitor
+from .pagination import paginate_keyset
+from .qr_images import QR_IMAGE_FORMATS, qr_image_etag, render_qr_image
+from .qr_tokens import name_hash, read_visitor_token, revoked_visitors
+from .widgets import scope_autocomplete
 
 
 def _has_guard_access(user):
-    return (
-        user.is_authenticated
-        and hasattr(user, 'staff_account')
-        and getattr(user.staff_account, 'access_type', 'maintenance') == 'guard'
-    )
+    return get_principal(user).is_guard
 
 
-def _get_visitor_queryset_for_user(user):
+def _guard_window_start():
+    return timezone.now() - timedelta(days=getattr(settings, 'VISITOR_GUARD_WINDOW_DAYS', 7))
+
+
+def _visitor_queryset_for_principal(principal):
+    """Відвідувачі, видимі ролі; None — доступу немає. Без запитів до БД."""
     queryset = Visitor.objects.select_related(
         'apartment',
         'apartment__entrance',
@@ -29,23 +45,22 @@ def _get_visitor_queryset_for_user(user):
         'added_by',
     )
 
-    if is_superadmin(user):
+    if principal.is_superadmin:
         return queryset
 
-    if _has_guard_access(user):
-        return queryset.filter(
-            apartment__entrance__building__complex_id=user.staff_account.staff.complex_id,
-        )
+    if principal.is_guard:
+        return queryset.filter(complex_id=principal.staff_complex_id)
 
-    if is_complex_admin(user):
-        complex_obj = get_complex_for_admin(user)
-        if complex_obj is None:
-            return None
-        return queryset.filter(apartment__entrance__building__complex_id=complex_obj.pk)
+    if principal.is_complex_admin:
+        return queryset.filter(complex_id=principal.admin_complex_id)
 
     return None
 
 
+def _get_visitor_queryset_for_user(user):
+    return _visitor_queryset_for_principal(get_principal(user))
+
+
 def visitors_list(request):
     user = request.user
     is_guard = _has_guard_access(user)
@@ -60,7 +75,7 @@ def visitors_list(request):
     if is_superadmin(user):
         complexes = ResidentialComplex.objects.order_by('name').all()
     elif is_guard:
-        complex_obj = user.staff_account.staff.complex
+        complex_obj = request.principal.staff_complex
     else:
         complex_obj = get_complex_for_admin(user)
 
@@ -90,17 +105,27 @@ def visitors_list(request):
                     .select_related('entrance__building__complex')
                     .order_by('entrance__building__number', 'entrance__number', 'number')
                 )
+                scope_autocomplete(form.fields['apartment'], cid)
 
     visitors = _get_visitor_queryset_for_user(user)
+    if is_guard:
+        # Охоронцю в списку — лише свіжі відвідувачі: обмеження за created_at
+        # дає partition pruning по complexes_visitor. Перевірка QR, зображення
+        # і видалення старіших відвідувачів не обмежуються.
+        visitors = visitors.filter(created_at__gte=_guard_window_start())
     if complex_obj:
-        visitors = visitors.filter(apartment__entrance__building__complex=complex_obj)
+        visitors = visitors.filter(complex=complex_obj)
     elif selected_complex and is_superadmin(user):
         try:
             cid = int(selected_complex)
         except (ValueError, TypeError):
             cid = None
         if cid is not None:
-            visitors = visitors.filter(apartment__entrance__building__complex__complex_id=cid)
+            visitors = visitors.filter(complex_id=cid)
+
+    export_format = requested_export_format(request)
+    if export_format:
+        return stream_export(visitors.order_by('-created_at'), VISITOR_EXPORT_COLUMNS, 'visitors', export_format)
 
     try:
         selected_complex_value = int(selected_complex) if selected_complex else None
@@ -111,7 +136,7 @@ def visitors_list(request):
         request,
         'complexes/visitors_list.html',
         {
-            'visitors': visitors.order_by('-created_at'),
+            'visitors': paginate_keyset(request, visitors, ('-created_at',)),
             'form': form,
             'complex': complex_obj,
             'complexes': complexes,
@@ -135,41 +160,126 @@ def visitor_qr(request, pk):
         {
             'visitor': visitor,
             'qr_image_url': visitor.get_qr_image_url(),
+            'qr_svg_url': visitor.get_qr_image_url('svg'),
         },
     )
 
 
 @login_required
-@require_POST
-def visitor_qr_validate(request):
+def visitor_qr_image(request, pk, fmt):
+    if fmt not in QR_IMAGE_FORMATS:
+        raise Http404
+
     visitors = _get_visitor_queryset_for_user(request.user)
     if visitors is None:
         return forbidden_response(request)
 
-    token = (request.POST.get('token') or '').strip()
-    if not token:
-        return JsonResponse(
-            {'valid': False, 'message': 'QR-код не передано.'},
-            status=400,
-        )
+    visitor = get_object_or_404(visitors, pk=pk)
+    token = visitor.get_qr_token()
+    etag = qr_image_etag(token, fmt)
 
+    # Браузер уже має це зображення — нічого не рендеримо.
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(render_qr_image(token, fmt), content_type=QR_IMAGE_FORMATS[fmt])
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _principal_can_see_visitors(principal):
+    return principal.is_superadmin or principal.is_guard or principal.is_complex_admin
+
+
+def _principal_can_see_complex(principal, complex_id):
+    """Та сама область видимості, що й _get_visitor_queryset_for_user, але без БД."""
+    if principal.is_superadmin:
+        return True
+    if complex_id is None:
+        return False
+    if principal.is_guard:
+        return principal.staff_complex_id == complex_id
+    if principal.is_complex_admin:
+        return principal.admin_complex_id == complex_id
+    return False
+
+
+def _format_timestamp(value):
+    return timezone.localtime(
+        datetime.fromtimestamp(value, tz=dt_timezone.utc)
+    ).strftime('%Y-%m-%d %H:%M')
+
+
+_NOT_FOUND_MESSAGE = 'Дозвіл не знайдено або у вас немає доступу до цього відвідувача.'
+
+
+def _read_token_verdict(token):
+    """(VisitorPass, None) або (None, (payload, status)) для недійсного токена."""
+    if not token:
+        return None, ({'valid': False, 'message': 'QR-код не передано.'}, 400)
     try:
-        visitor_id = Visitor.parse_qr_token(token)
+        return read_visitor_token(token), None
+    except signing.SignatureExpired:
+        return None, ({'valid': False, 'message': 'Термін дії QR-коду минув.'}, 400)
     except signing.BadSignature:
-        return JsonResponse(
-            {'valid': False, 'message': 'QR-код недійсний або пошкоджений.'},
-            status=400,
-        )
+        return None, ({'valid': False, 'message': 'QR-код недійсний або пошкоджений.'}, 400)
+
+
+def _offline_pass_verdict(request, qr_pass, name='', revoked=None):
+    """
+    Вердикт для v2-токена: з даних самого токена і deny-set відкликаних.
+    revoked — уже перевірений deny-set (async view і пакетна перевірка).
+    """
+    if not _principal_can_see_complex(request.principal, qr_pass.complex_id):
+        return {'valid': False, 'message': _NOT_FOUND_MESSAGE}, 404
+    if revoked is None:
+        revoked = revoked_visitors.is_revoked(qr_pass.visitor_id)
+    if revoked:
+        return {'valid': False, 'message': 'Дозвіл відкликано.'}, 410
+
+    payload = {
+        'valid': True,
+        'offline': True,
+        'message': 'Дозвіл підтверджено.',
+        'visitor': {
+            'id': qr_pass.visitor_id,
+            'fullname': '',
+            'purpose': '-',
+            'created_at': '',
+            'issued_at': _format_timestamp(qr_pass.issued_at),
+            'expires_at': _format_timestamp(qr_pass.expires_at),
+            'apartment': qr_pass.apartment_label or '-',
+            'complex': '',
+            'qr_url': request.build_absolute_uri(reverse('visitor_qr', args=[qr_pass.visitor_id])),
+        },
+    }
+    if name:
+        payload['name_match'] = name_hash(name) == qr_pass.name_hash
+    return payload, 200
+
+
+def _visitor_complex_id(visitor):
+    if visitor.complex_id is not None:
+        return visitor.complex_id
+    if visitor.apartment_id and visitor.apartment.entrance_id:
+        return visitor.apartment.entrance.building.complex_id
+    return None
+
+
+def _record_entry(request, visitor_id, complex_id, offline=False):
+    """Фіксує прохід; запис у БД відбувається пакетом, поза запитом."""
+    visitor_entries.record(
+        visitor_id,
+        complex_id=complex_id,
+        validated_by_id=request.user.pk,
+        offline=offline,
+    )
+
 
-    visitor = visitors.filter(pk=visitor_id).first()
+def _visitor_verdict(request, visitor):
+    """Вердикт для старого (v1) токена за рядком Visitor з БД."""
     if visitor is None:
-        return JsonResponse(
-            {
-                'valid': False,
-                'message': 'Дозвіл не знайдено або у вас немає доступу до цього відвідувача.',
-            },
-            status=404,
-        )
+        return {'valid': False, 'message': _NOT_FOUND_MESSAGE}, 404
 
     apartment_label = '-'
     complex_name = ''
@@ -182,20 +292,178 @@ def visitor_qr_validate(request):
         ):
             complex_name = visitor.apartment.entrance.building.complex.name
 
-    return JsonResponse(
+    return {
+        'valid': True,
+        'message': 'Дозвіл підтверджено.',
+        'visitor': {
+            'id': visitor.pk,
+            'fullname': visitor.fullname,
+            'purpose': visitor.purpose or '-',
+            'created_at': visitor.created_at.strftime('%Y-%m-%d %H:%M'),
+            'apartment': apartment_label,
+            'complex': complex_name,
+            'qr_url': request.build_absolute_uri(reverse('visitor_qr', args=[visitor.pk])),
+        },
+    }, 200
+
+
+@login_required
+@require_POST
+async def visitor_qr_validate(request):
+    """
+    Перевірка одного QR з пристрою на прохідній. Async view: під ASGI
+    (uvicorn) воркер обслуговує багато пристроїв одночасно, не займаючи
+    потік на кожен запит; ролі та v1-відвідувач читаються через async ORM.
+    """
+    principal = await arequest_principal(request)
+    if not _principal_can_see_visitors(principal):
+        return await sync_to_async(forbidden_response)(request)
+
+    qr_pass, error = _read_token_verdict((request.POST.get('token') or '').strip())
+    if error:
+        return JsonResponse(error[0], status=error[1])
+
+    if qr_pass.is_offline:
+        payload, status = _offline_pass_verdict(
+            request, qr_pass, (request.POST.get('name') or '').strip(),
+            revoked=await revoked_visitors.ais_revoked(qr_pass.visitor_id),
+        )
+        if status == 200:
+            await sync_to_async(_record_entry)(request, qr_pass.visitor_id, qr_pass.complex_id, offline=True)
+        return JsonResponse(payload, status=status)
+
+    # Старі (v1) токени містять лише id — шукаємо відвідувача в БД.
+    visitor = await _visitor_queryset_for_principal(principal).filter(pk=qr_pass.visitor_id).afirst()
+    payload, status = _visitor_verdict(request, visitor)
+    if status == 200:
+        await sync_to_async(_record_entry)(request, visitor.pk, _visitor_complex_id(visitor))
+    return JsonResponse(payload, status=status)
+
+
+def _batch_items(request):
+    """
+    Тіло пакетного запиту: JSON-масив токенів або {"tokens": [...]}.
+    Елемент — рядок або {"token": ..., "name": ...}. None, якщо формат невірний.
+    """
+    try:
+        data = json.loads(request.body or b'null')
+    except (UnicodeDecodeError, ValueError):
+        return None
+    if isinstance(data, dict):
+        data = data.get('tokens')
+    if not isinstance(data, list):
+        return None
+
+    items = []
+    for item in data:
+        if isinstance(item, str):
+            items.append((item.strip(), ''))
+        elif isinstance(item, dict):
+            items.append((
+                str(item.get('token') or '').strip(),
+                str(item.get('name') or '').strip(),
+            ))
+        else:
+            items.append(('', ''))
+    return items
+
+
+@login_required
+@require_POST
+def visitor_qr_validate_batch(request):
+    """
+    Пакетна перевірка черги сканувань з пристрою на прохідній.
+    Усі токени розбираються одразу; v2 перевіряються без БД, а для v1
+    відвідувачі вибираються одним запитом pk__in у межах видимості користувача.
+    """
+    if not _principal_can_see_visitors(request.principal):
+        return forbidden_response(request)
+
+    items = _batch_items(request)
+    if items is None:
+        return JsonResponse(
+            {'message': 'Очікується JSON-масив токенів.'},
+            status=400,
+        )
+    limit = getattr(settings, 'VISITOR_QR_BATCH_LIMIT', 500)
+    if len(items) > limit:
+        return JsonResponse(
+            {'message': f'Забагато токенів в одному запиті (максимум {limit}).'},
+            status=400,
+        )
+
+    verdicts = [None] * len(items)
+    passes = [_read_token_verdict(token) for token, _ in items]
+    revoked = revoked_visitors.revoked_among(
+        qr_pass.visitor_id for qr_pass, _ in passes if qr_pass is not None and qr_pass.is_offline
+    )
+    legacy = {}
+    for index, ((qr_pass, error), (_, name)) in enumerate(zip(passes, items)):
+        if error:
+            verdicts[index] = error
+        elif qr_pass.is_offline:
+            verdicts[index] = _offline_pass_verdict(
+                request, qr_pass, name, revoked=qr_pass.visitor_id in revoked
+            )
+            if verdicts[index][1] == 200:
+                _record_entry(request, qr_pass.visitor_id, qr_pass.complex_id, offline=True)
+        else:
+            legacy[index] = qr_pass.visitor_id
+
+    if legacy:
+        visitors = _get_visitor_queryset_for_user(request.user)
+        found = {}
+        if visitors is not None:
+            found = visitors.in_bulk(set(legacy.values()))
+        for index, visitor_id in legacy.items():
+            visitor = found.get(visitor_id)
+            verdicts[index] = _visitor_verdict(request, visitor)
+            if visitor is not None:
+                _record_entry(request, visitor.pk, _visitor_complex_id(visitor))
+
+    results = []
+    for index, (payload, status) in enumerate(verdicts):
+        results.append({'index': index, 'status': status, **payload})
+    return JsonResponse({
+        'count': len(results),
+        'valid_count': sum(1 for result in results if result['valid']),
+        'results': results,
+    })
+
+
+@login_required
+def visitor_entries_today(request):
+    principal = request.principal
+    if not _principal_can_see_visitors(principal):
+        return forbidden_response(request)
+
+    complexes = None
+    if principal.is_superadmin:
+        complexes = ResidentialComplex.objects.order_by('name')
+        try:
+            complex_id = int(request.GET.get('complex') or 0) or None
+        except (ValueError, TypeError):
+            complex_id = None
+    elif principal.is_guard:
+        complex_id = principal.staff_complex_id
+    else:
+        complex_id = principal.admin_complex_id
+
+    entries = None
+    if complex_id is not None:
+        # Події, що ще в буфері, мають з'явитися у списку одразу.
+        visitor_entries.flush()
+        entries = paginate_keyset(request, entries_for_day(complex_id), ('-entered_at',))
+
+    return render(
+        request,
+        'complexes/visitor_entries.html',
         {
-            'valid': True,
-            'message': 'Дозвіл підтверджено.',
-            'visitor': {
-                'id': visitor.pk,
-                'fullname': visitor.fullname,
-                'purpose': visitor.purpose or '-',
-                'created_at': visitor.created_at.strftime('%Y-%m-%d %H:%M'),
-                'apartment': apartment_label,
-                'complex': complex_name,
-                'qr_url': request.build_absolute_uri(reverse('visitor_qr', args=[visitor.pk])),
-            },
-        }
+            'entries': entries,
+            'complexes': complexes,
+            'selected_complex': complex_id,
+            'day': timezone.localdate(),
+        },
     )
 
 
@@ -204,8 +472,7 @@ def resident_quick_add(request):
     if not _has_guard_access(request.user):
         return forbidden_response(request)
 
-    staff = request.user.staff_account.staff
-    complex_obj = staff.complex
+    complex_obj = request.principal.staff_complex
 
     if request.method == 'POST':
         form = ResidentForm(request.POST, complex_obj=complex_obj)
@@ -234,7 +501,9 @@ def visitor_delete(request, pk):
     visitor = get_object_or_404(visitors, pk=pk)
 
     if request.method == 'POST':
+        visitor_id = visitor.pk
         visitor.delete()
+        revoked_visitors.revoke(visitor_id)
         return redirect('visitors_list')
 
     return render(
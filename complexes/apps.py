@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ComplexesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'complexes'
+
+    def ready(self):
+        # Реєструє сигнали інвалідації кешу ЖК (complexes.cache)
+        from . import signals  # noqa: F401
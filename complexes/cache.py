@@ -0,0 +1,189 @@
+"""
+Спільний шар кешу поверх django.core.cache (CACHES у settings).
+
+Ключі мають простір імен і версію ЖК:
+
+    complexes:<namespace>:<scope>:<version>:<digest>
+
+де scope — id ЖК або 'all' (дані без фільтра за ЖК). Версія ЖК спільна
+для всіх просторів імен і скидається сигналами (complexes.signals) за
+будь-якої зміни ЖК, будинку, під'їзду чи квартири — старі записи просто
+перестають читатися і витісняються за TTL, без пошуку ключів.
+
+Звернення через cache_get рахуються по простору імен (hits/misses), щоб
+бачити частку влучань: cache_stats(), manage.py cache_stats.
+Працює з LocMemCache і FileBasedCache, зовнішній сервіс не потрібен.
+"""
+
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection, transaction
+
+
+KEY_PREFIX = 'complexes:'
+# Версія для даних без фільтра за ЖК (супер-адмін): змінюється разом з будь-яким ЖК
+ALL_COMPLEXES = 'all'
+
+
+def get_cache(alias=None):
+    return caches[alias or getattr(settings, 'COMPLEX_CACHE_ALIAS', 'default')]
+
+
+def is_process_local(alias=None):
+    """
+    Кеш лише в пам'яті процесу: скидання версії ЖК бачить тільки поточний
+    воркер, інші читають старі записи до закінчення їхнього TTL.
+    """
+    return isinstance(get_cache(alias), LocMemCache)
+
+
+# ===== Версії ЖК =====
+
+def _version_key(scope):
+    return f'{KEY_PREFIX}version:{scope}'
+
+
+def _fresh_version():
+    # Версія з часу: якщо ключ версії витіснили з кешу, нова не збіжеться
+    # зі старими записами, що ще лежать у кеші.
+    return time.time_ns() // 1000
+
+
+def _version(cache, scope):
+    key = _version_key(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _fresh_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def complex_cache_key(namespace, complex_id, *parts):
+    """
+    Ключ запису простору імен namespace для ЖК complex_id (None — усі ЖК).
+    parts (вид, курсор, параметри) хешуються, тож довжина ключа обмежена.
+    """
+    scope = ALL_COMPLEXES if complex_id is None else complex_id
+    version = _version(get_cache(), scope)
+    digest = hashlib.sha1(':'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:16]
+    return f'{KEY_PREFIX}{namespace}:{scope}:{version}:{digest}'
+
+
+def bump_complex_version(*complex_ids):
+    """
+    Робить недійсними кешовані записи вказаних ЖК і загальні ('all').
+    None серед complex_ids (ЖК не вдалося визначити) скидає лише загальні.
+    Усередині транзакції версія скидається ще раз після commit: інакше
+    паралельний запит міг би до commit знову закешувати старий стан.
+    """
+    scopes = {complex_id for complex_id in complex_ids if complex_id is not None}
+    scopes.add(ALL_COMPLEXES)
+    _bump(scopes)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _bump(scopes))
+
+
+def _bump(scopes):
+    cache = get_cache()
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _fresh_version(), None)
+
+
+# ===== Читання і запис з лічильниками влучань =====
+
+def cache_get(namespace, key, alias=None):
+    value = get_cache(alias).get(key)
+    _stats.record(namespace, value is not None)
+    return value
+
+
+def cache_set(namespace, key, value, timeout, alias=None):
+    if timeout is None or timeout > 0:
+        get_cache(alias).set(key, value, timeout)
+
+
+class CacheStats:
+    """
+    Лічильники hits/misses по простору імен. Рахуються в пам'яті процесу
+    і кожні COMPLEX_CACHE_STATS_FLUSH звернень додаються до спільних
+    лічильників у кеші — з FileBasedCache так видно сумарно всі воркери.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def record(self, namespace, hit):
+        with self._lock:
+            counts = self._pending.setdefault(namespace, [0, 0])
+            counts[0 if hit else 1] += 1
+            if sum(counts) < getattr(settings, 'COMPLEX_CACHE_STATS_FLUSH', 100):
+                return
+            del self._pending[namespace]
+        self._flush(namespace, counts)
+
+    def _flush(self, namespace, counts):
+        cache = get_cache()
+        for field, delta in zip(('hits', 'misses'), counts):
+            if not delta:
+                continue
+            key = _stats_key(namespace, field)
+            if not cache.add(key, delta, None):
+                try:
+                    cache.incr(key, delta)
+                except ValueError:
+                    cache.set(key, delta, None)
+        namespaces_key = f'{KEY_PREFIX}stats:namespaces'
+        namespaces = cache.get(namespaces_key) or []
+        if namespace not in namespaces:
+            cache.set(namespaces_key, sorted({*namespaces, namespace}), None)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for namespace, counts in pending.items():
+            self._flush(namespace, counts)
+
+    def snapshot(self):
+        """{namespace: {'hits', 'misses', 'ratio'}} — спільні лічильники плюс ще не додані."""
+        self.flush()
+        cache = get_cache()
+        stats = {}
+        for namespace in cache.get(f'{KEY_PREFIX}stats:namespaces') or []:
+            hits = cache.get(_stats_key(namespace, 'hits')) or 0
+            misses = cache.get(_stats_key(namespace, 'misses')) or 0
+            total = hits + misses
+            stats[namespace] = {
+                'hits': hits,
+                'misses': misses,
+                'ratio': hits / total if total else None,
+            }
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._pending = {}
+        cache = get_cache()
+        namespaces_key = f'{KEY_PREFIX}stats:namespaces'
+        keys = [namespaces_key]
+        for namespace in cache.get(namespaces_key) or []:
+            keys += [_stats_key(namespace, 'hits'), _stats_key(namespace, 'misses')]
+        cache.delete_many(keys)
+
+
+def _stats_key(namespace, field):
+    return f'{KEY_PREFIX}stats:{namespace}:{field}'
+
+
+_stats = CacheStats()
+cache_stats = _stats.snapshot
+reset_cache_stats = _stats.reset
@@ -0,0 +1,34 @@
+from django.conf import settings
+
+from .cache import cache_get, cache_set, complex_cache_key, is_process_local
+
+
+# Простір імен сторінок варіантів у complexes.cache
+NAMESPACE = 'choices'
+
+
+def _timeout():
+    timeout = getattr(settings, 'LOOKUP_CACHE_TTL', 600)
+    if is_process_local():
+        # Інші воркери не бачать скидання версії — старі варіанти лише кілька секунд
+        return min(timeout, getattr(settings, 'LOOKUP_CACHE_LOCAL_TTL', 5))
+    return timeout
+
+
+def choice_page_key(kind, complex_id, cursor=''):
+    """
+    Ключ сторінки варіантів виду kind для ЖК (None — усі ЖК).
+    Містить поточну версію ЖК, тож після bump_complex_version старі
+    сторінки просто перестають читатися і витісняються за TTL.
+    """
+    return complex_cache_key(NAMESPACE, complex_id, kind, cursor or '')
+
+
+def get_choice_page(key):
+    if _timeout() <= 0:
+        return None
+    return cache_get(NAMESPACE, key)
+
+
+def set_choice_page(key, page):
+    cache_set(NAMESPACE, key, page, _timeout())
@@ -0,0 +1,152 @@
+import atexit
+import logging
+import os
+import threading
+from datetime import datetime, time as dt_time, timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import VisitorEntry
+
+
+logger = logging.getLogger(__name__)
+
+
+class EntryLogWriter:
+    """
+    Буферизований запис VisitorEntry.
+
+    Перевірка QR лише кладе подію в чергу процесу; фоновий потік раз на
+    VISITOR_ENTRY_FLUSH_INTERVAL_MS (або коли назбирається
+    VISITOR_ENTRY_BATCH_SIZE подій) пише їх одним bulk_create. Інтервал 0
+    вимикає потік: подія пишеться, коли буфер заповнено, або при flush().
+
+    Якщо запис не вдався (перезапуск БД, немає партиції), пакет повертається
+    на початок буфера і пишеться наступного разу; у буфері тримається не
+    більше RETRY_BATCHES пакетів, найстаріші понад це відкидаються.
+    Події в буфері втрачаються, якщо процес аварійно завершиться.
+    """
+
+    RETRY_BATCHES = 10
+
+    def __init__(self):
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    @property
+    def batch_size(self):
+        return max(1, getattr(settings, 'VISITOR_ENTRY_BATCH_SIZE', 200))
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'VISITOR_ENTRY_FLUSH_INTERVAL_MS', 500) / 1000
+
+    def record(self, visitor_id, complex_id=None, validated_by_id=None, offline=False):
+        entry = VisitorEntry(
+            visitor_id=visitor_id,
+            complex_id=complex_id,
+            validated_by_id=validated_by_id,
+            offline=offline,
+            entered_at=timezone.now(),
+        )
+        with self._lock:
+            self._buffer.append(entry)
+            full = len(self._buffer) >= self.batch_size
+
+        if self.flush_interval <= 0:
+            if full:
+                self.flush()
+            return
+        self._ensure_thread()
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """Записує все, що є в буфері. Повертає кількість записаних подій."""
+        with self._lock:
+            entries, self._buffer = self._buffer, []
+        if not entries:
+            return 0
+        try:
+            # Один insert на весь пакет: після помилки немає частково записаних подій
+            with transaction.atomic():
+                VisitorEntry.objects.bulk_create(entries, batch_size=self.batch_size)
+        except Exception:
+            self._requeue(entries)
+            raise
+        return len(entries)
+
+    def _requeue(self, entries):
+        limit = self.batch_size * self.RETRY_BATCHES
+        with self._lock:
+            self._buffer[:0] = entries
+            dropped = len(self._buffer) - limit
+            if dropped > 0:
+                del self._buffer[:dropped]
+        if dropped > 0:
+            logger.error('Dropped %d visitor entries that could not be written.', dropped)
+
+    def pending(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def clear(self):
+        with self._lock:
+            self._buffer.clear()
+
+    def _ensure_thread(self):
+        # Після fork (gunicorn --preload) потік батьківського процесу не існує.
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name='visitor-entry-writer', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Failed to write visitor entries.')
+
+
+visitor_entries = EntryLogWriter()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        visitor_entries.flush()
+    except Exception:
+        logger.exception('Failed to write visitor entries on shutdown.')
+
+
+def entries_for_day(complex_id, day=None):
+    """
+    Проходи до ЖК за локальну добу (за замовчуванням — сьогодні).
+    Діапазон по entered_at відсікає зайві партиції та йде по індексу
+    (complex_id, entered_at).
+    """
+    day = day or timezone.localdate()
+    start = timezone.make_aware(datetime.combine(day, dt_time.min))
+    return (
+        VisitorEntry.objects.filter(
+            complex_id=complex_id,
+            entered_at__gte=start,
+            entered_at__lt=start + timedelta(days=1),
+        )
+        .select_related('visitor', 'visitor__apartment', 'validated_by')
+    )
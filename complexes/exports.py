@@ -0,0 +1,125 @@
+import csv
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+
+EXPORT_PARAM = 'export'
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+# (lookup для values_list, назва колонки у файлі)
+RESIDENT_EXPORT_COLUMNS = (
+    ('resident_id', 'id'),
+    ('fullname', 'fullname'),
+    ('role', 'role'),
+    ('contact', 'contact'),
+    ('apartment__entrance__building__complex__name', 'complex'),
+    ('apartment__entrance__building__number', 'building'),
+    ('apartment__entrance__number', 'entrance'),
+    ('apartment__number', 'apartment'),
+)
+
+OWNER_EXPORT_COLUMNS = (
+    ('owner_id', 'id'),
+    ('name', 'name'),
+    ('phone', 'phone'),
+    ('complex__name', 'complex'),
+)
+
+VISITOR_EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('fullname', 'fullname'),
+    ('purpose', 'purpose'),
+    ('created_at', 'created_at'),
+    ('apartment__entrance__building__complex__name', 'complex'),
+    ('apartment__entrance__building__number', 'building'),
+    ('apartment__entrance__number', 'entrance'),
+    ('apartment__number', 'apartment'),
+    ('added_by__username', 'added_by'),
+)
+
+TICKET_EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('status', 'status'),
+    ('description', 'description'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+    ('owner__name', 'owner'),
+    ('apartment__entrance__building__complex__name', 'complex'),
+    ('apartment__entrance__building__number', 'building'),
+    ('apartment__entrance__number', 'entrance'),
+    ('apartment__number', 'apartment'),
+)
+
+
+class _Echo:
+    """Псевдо-файл для csv.writer: повертає рядок замість запису в буфер."""
+
+    def write(self, value):
+        return value
+
+
+def requested_export_format(request):
+    """'csv' / 'jsonl', якщо GET-запит просить вивантаження, інакше None."""
+    if request.method != 'GET':
+        return None
+    fmt = request.GET.get(EXPORT_PARAM)
+    return fmt if fmt in EXPORT_FORMATS else None
+
+
+# Рядок з такого символу Excel сприймає як формулу (CSV injection).
+_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _iter_rows(queryset, columns, chunk_size):
+    lookups = [lookup for lookup, _ in columns]
+    return queryset.values_list(*lookups).iterator(chunk_size=chunk_size)
+
+
+def _iter_csv(rows, headers):
+    writer = csv.writer(_Echo())
+    # BOM, щоб Excel коректно відкривав кирилицю.
+    yield '\ufeff' + writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow([_csv_value(value) for value in row])
+
+
+def _iter_jsonl(rows, headers):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(headers, row))) + '\n'
+
+
+def stream_export(queryset, columns, basename, fmt, chunk_size=None):
+    """
+    StreamingHttpResponse з усіма рядками queryset у форматі fmt.
+    Рядки читаються через values_list().iterator(), тож пам'ять не росте
+    з розміром таблиці; права доступу — це сам queryset, який
+    будує view так само, як для HTML-сторінки.
+    """
+    if chunk_size is None:
+        chunk_size = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+    headers = [header for _, header in columns]
+    rows = _iter_rows(queryset, columns, chunk_size)
+    content = _iter_csv(rows, headers) if fmt == 'csv' else _iter_jsonl(rows, headers)
+
+    response = StreamingHttpResponse(content, content_type=EXPORT_FORMATS[fmt])
+    stamp = timezone.localdate().isoformat()
+    response['Content-Disposition'] = f'attachment; filename="{basename}-{stamp}.{fmt}"'
+    return response
@@ -5,9 +5,20 @@ from .models import (
 )
 from django.core.validators import RegexValidator, EmailValidator
 from django.core.exceptions import ValidationError
+from django.db.models import OuterRef, Subquery
 from .owner_compat import owner_has_complex_column, owner_matches_complex, owners_for_complex
+from .widgets import label_queryset, precomputed_label, scope_autocomplete, use_autocomplete
 
 
+def _select_apartment_hierarchy(queryset):
+    return queryset.select_related('entrance__building__complex')
+
+
+def _select_entrance_hierarchy(queryset):
+    return queryset.select_related('building__complex')
+
+
+@precomputed_label(_select_apartment_hierarchy)
 def apartment_choice_label(apartment):
     entrance = getattr(apartment, 'entrance', None)
     building = getattr(entrance, 'building', None)
@@ -23,6 +34,7 @@ def apartment_choice_label(apartment):
     return " | ".join(parts)
 
 
+@precomputed_label(_select_apartment_hierarchy)
 def visitor_apartment_choice_label(apartment):
     entrance = getattr(apartment, 'entrance', None)
     building = getattr(entrance, 'building', None)
@@ -39,6 +51,7 @@ def visitor_apartment_choice_label(apartment):
     return " | ".join(parts)
 
 
+@precomputed_label(_select_entrance_hierarchy)
 def entrance_choice_label(entrance):
     building = getattr(entrance, 'building', None)
     complex_obj = getattr(building, 'complex', None)
@@ -52,6 +65,7 @@ def entrance_choice_label(entrance):
     return " | ".join(parts)
 
 
+@precomputed_label(_select_apartment_hierarchy)
 def parking_zone_choice_label(parking_zone):
     entrance = getattr(parking_zone, 'entrance', None)
     building = getattr(entrance, 'building', None)
@@ -70,6 +84,18 @@ def parking_zone_choice_label(parking_zone):
     return " | ".join(parts)
 
 
+def _annotate_owner_complex_name(queryset):
+    if owner_has_complex_column():
+        return queryset.select_related('complex')
+    # без owner.complex_id ЖК власника — ЖК його першої квартири;
+    # підзапит замість окремого запиту на кожен варіант
+    first_apartment = Apartment.objects.filter(owner=OuterRef('pk')).order_by('apartment_id')
+    return queryset.annotate(
+        label_complex_name=Subquery(first_apartment.values('entrance__building__complex__name')[:1])
+    )
+
+
+@precomputed_label(_annotate_owner_complex_name)
 def owner_choice_label(owner):
     parts = [owner.name]
     complex_name = None
@@ -78,6 +104,8 @@ def owner_choice_label(owner):
         complex_obj = getattr(owner, 'complex', None)
         if complex_obj is not None:
             complex_name = complex_obj.name
+    elif hasattr(owner, 'label_complex_name'):
+        complex_name = owner.label_complex_name
     else:
         apartment = (
             owner.apartments.select_related('entrance__building__complex')
@@ -92,29 +120,26 @@ def owner_choice_label(owner):
     return " | ".join(parts)
 
 
+def _configure_choice_field(field, label, kind):
+    field.queryset = label_queryset(field.queryset, label)
+    field.label_from_instance = label
+    return use_autocomplete(field, kind)
+
+
 def configure_apartment_field(field):
-    field.queryset = field.queryset.select_related('entrance__building__complex')
-    field.label_from_instance = apartment_choice_label
-    return field
+    return _configure_choice_field(field, apartment_choice_label, 'apartment')
 
 
 def configure_entrance_field(field):
-    field.queryset = field.queryset.select_related('building__complex')
-    field.label_from_instance = entrance_choice_label
-    return field
+    return _configure_choice_field(field, entrance_choice_label, 'entrance')
 
 
 def configure_parking_zone_field(field):
-    field.queryset = field.queryset.select_related('entrance__building__complex')
-    field.label_from_instance = parking_zone_choice_label
-    return field
+    return _configure_choice_field(field, parking_zone_choice_label, 'parking_zone')
 
 
 def configure_owner_field(field):
-    if owner_has_complex_column():
-        field.queryset = field.queryset.select_related('complex')
-    field.label_from_instance = owner_choice_label
-    return field
+    return _configure_choice_field(field, owner_choice_label, 'owner')
 
 letters_validator = RegexValidator(
     r'^[A-Za-zА-Яа-яІіЇїЄєҐґʼ’\s-]+$',
@@ -222,9 +247,24 @@ class ApartmentForm(forms.ModelForm):
             self.fields['owner'].queryset = Owner.objects.filter(
                 complex=complex_obj
             ).order_by('name')
+        configure_owner_field(self.fields['owner'])
+        if complex_obj is not None:
+            scope_autocomplete(self.fields['owner'], complex_obj.pk)
 
 
 
+class ComplexImportForm(forms.Form):
+    file = forms.FileField(
+        label='Файл (CSV або XLSX)',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv,.xlsx'}),
+    )
+    dry_run = forms.BooleanField(
+        label='Лише перевірити, нічого не зберігати',
+        required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+    )
+
+
 class OwnerForm(forms.ModelForm):
     class Meta:
         model = Owner
@@ -289,6 +329,7 @@ class ResidentForm(forms.ModelForm):
                 'entrance__number',
                 'number'
             )
+            scope_autocomplete(self.fields['apartment'], complex_obj.pk)
 
 
 
@@ -374,6 +415,9 @@ class ParkingSpotForm(forms.ModelForm):
             ).order_by('parking_zone_id')
         configure_parking_zone_field(self.fields['parking_zone'])
         configure_owner_field(self.fields['owner'])
+        if complex_obj is not None:
+            scope_autocomplete(self.fields['parking_zone'], complex_obj.pk)
+            scope_autocomplete(self.fields['owner'], complex_obj.pk)
 
     def clean(self):
         cleaned = super().clean()
@@ -440,4 +484,5 @@ class VisitorForm(forms.ModelForm):
             ).order_by(
                 'entrance__building__number', 'entrance__number', 'number'
             )
+            scope_autocomplete(self.fields['apartment'], complex_obj.pk)
 
@@ -0,0 +1,292 @@
+import csv
+import io
+import os
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .cache import bump_complex_version
+from .forms import ApartmentForm, BuildingForm, EntranceForm, OwnerForm
+from .models import Apartment, Building, Entrance, Owner
+from .owner_compat import owner_has_complex_column, owners_for_complex
+
+try:
+    import openpyxl
+except ImportError:  # openpyxl є в requirements.txt; без нього працює лише CSV
+    openpyxl = None
+
+
+IMPORT_COLUMNS = (
+    'building', 'floors', 'entrance',
+    'apartment', 'floor', 'rooms', 'area_m2',
+    'owner', 'owner_phone',
+)
+DEFAULT_BATCH_SIZE = 500
+
+
+class ImportFormatError(ValueError):
+    """Файл неможливо прочитати як таблицю імпорту."""
+
+
+class ImportResult:
+    def __init__(self):
+        self.buildings = 0
+        self.entrances = 0
+        self.apartments = 0
+        self.owners = 0
+        self.skipped = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.errors.append((line, message))
+
+    @property
+    def created_total(self):
+        return self.buildings + self.entrances + self.apartments + self.owners
+
+
+def _normalize_header(value):
+    return str(value or '').strip().lower()
+
+
+def _clean_row(header, values):
+    row = {}
+    for name, value in zip(header, values):
+        if name in IMPORT_COLUMNS:
+            row[name] = '' if value is None else str(value).strip()
+    return row
+
+
+def _iter_csv(fileobj):
+    if isinstance(fileobj, (bytes, bytearray)):
+        fileobj = io.BytesIO(fileobj)
+    if not isinstance(fileobj, io.TextIOBase):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+
+    sample = fileobj.read(4096)
+    fileobj.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+
+    reader = csv.reader(fileobj, dialect)
+    header = [_normalize_header(h) for h in next(reader, [])]
+    for line, values in enumerate(reader, start=2):
+        if any(v.strip() for v in values):
+            yield line, _clean_row(header, values)
+
+
+def _iter_xlsx(fileobj):
+    if openpyxl is None:
+        raise ImportFormatError('Для XLSX потрібен пакет openpyxl; збережіть файл як CSV.')
+    workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [_normalize_header(h) for h in next(rows, ())]
+        for line, values in enumerate(rows, start=2):
+            if any(v not in (None, '') for v in values):
+                yield line, _clean_row(header, values)
+    finally:
+        workbook.close()
+
+
+def iter_import_rows(fileobj, filename=''):
+    """
+    Потоково читає CSV або XLSX і віддає пари (номер рядка, dict).
+    Колонки — IMPORT_COLUMNS; зайві ігноруються.
+    """
+    extension = os.path.splitext(filename or getattr(fileobj, 'name', '') or '')[1].lower()
+    if extension == '.xlsx':
+        return _iter_xlsx(fileobj)
+    if extension in ('', '.csv', '.txt'):
+        return _iter_csv(fileobj)
+    raise ImportFormatError(f'Непідтримуваний формат файлу: {extension}')
+
+
+def _form_errors(form):
+    return '; '.join(
+        f"{name}: {' '.join(errors)}" for name, errors in form.errors.items()
+    )
+
+
+class ComplexImporter:
+    """
+    Імпорт будинків, під'їздів, квартир і власників одного ЖК.
+
+    Кожен рядок — одна квартира (або лише будинок/під'їзд, якщо колонка
+    apartment порожня). Рядки валідуються тими ж формами, що й ручне
+    додавання; квартири і нові власники пишуться bulk_create пачками,
+    кожна пачка — окрема транзакція. Первинні ключі беруться з RETURNING,
+    тож тригери smallest-free-id можуть змінювати їх як завгодно.
+    """
+
+    def __init__(self, complex_obj, batch_size=DEFAULT_BATCH_SIZE):
+        self.complex = complex_obj
+        self.batch_size = batch_size
+        self.result = ImportResult()
+        self._owner_fields = OwnerForm(complex_obj=complex_obj).fields
+        self._with_owner_complex = owner_has_complex_column()
+
+        self._buildings = {
+            b.number: b for b in Building.objects.filter(complex=complex_obj)
+        }
+        self._entrances = {
+            (e.building_id, e.number): e
+            for e in Entrance.objects.filter(building__complex=complex_obj)
+        }
+        self._apartments = set(
+            Apartment.objects.filter(entrance__building__complex=complex_obj)
+            .values_list('entrance_id', 'number')
+        )
+        self._owners = {
+            (o.name, o.phone or ''): o
+            for o in owners_for_complex(complex_obj.pk).only('owner_id', 'name', 'phone')
+        }
+
+        self._pending_apartments = []
+        self._pending_owners = []
+
+    # ---------- building / entrance ----------
+
+    def _building(self, line, row):
+        try:
+            number = int(row.get('building') or '')
+        except ValueError:
+            number = None
+        building = self._buildings.get(number)
+        if building is not None:
+            return building
+
+        form = BuildingForm(data={'number': row.get('building'), 'floors': row.get('floors')})
+        if not form.is_valid():
+            self.result.add_error(line, _form_errors(form))
+            return None
+        building = form.save(commit=False)
+        building.complex = self.complex
+        building.save()
+        self._buildings[building.number] = building
+        self.result.buildings += 1
+        return building
+
+    def _entrance(self, line, row, building):
+        form = EntranceForm(data={'number': row.get('entrance')})
+        if not form.is_valid():
+            self.result.add_error(line, _form_errors(form))
+            return None
+        key = (building.pk, form.cleaned_data['number'])
+        entrance = self._entrances.get(key)
+        if entrance is not None:
+            return entrance
+
+        entrance = form.save(commit=False)
+        entrance.building = building
+        entrance.save()
+        self._entrances[key] = entrance
+        self.result.entrances += 1
+        return entrance
+
+    # ---------- owner / apartment ----------
+
+    def _owner(self, line, row):
+        name = row.get('owner') or ''
+        if not name:
+            return None
+        phone = row.get('owner_phone') or ''
+        key = (name, phone)
+        owner = self._owners.get(key)
+        if owner is not None:
+            return owner
+
+        try:
+            self._owner_fields['name'].clean(name)
+            if phone:
+                self._owner_fields['phone'].clean(phone)
+        except ValidationError as exc:
+            self.result.add_error(line, f"owner: {' '.join(exc.messages)}")
+            return False
+
+        owner = Owner(name=name, phone=phone or None)
+        if self._with_owner_complex:
+            owner.complex = self.complex
+        self._owners[key] = owner
+        self._pending_owners.append(owner)
+        return owner
+
+    def _apartment(self, line, row, entrance):
+        form = ApartmentForm(data={
+            'number': row.get('apartment'),
+            'floor': row.get('floor'),
+            'rooms': row.get('rooms'),
+            'area_m2': row.get('area_m2'),
+        })
+        if not form.is_valid():
+            self.result.add_error(line, _form_errors(form))
+            return
+
+        key = (entrance.pk, form.cleaned_data['number'])
+        if key in self._apartments:
+            self.result.skipped += 1
+            return
+
+        owner = self._owner(line, row)
+        if owner is False:
+            return
+
+        apartment = form.save(commit=False)
+        apartment.entrance = entrance
+        apartment.owner = owner
+        self._apartments.add(key)
+        self._pending_apartments.append(apartment)
+        if len(self._pending_apartments) >= self.batch_size:
+            self.flush()
+
+    # ---------- public API ----------
+
+    def flush(self):
+        if not self._pending_apartments and not self._pending_owners:
+            return
+        with transaction.atomic():
+            if self._pending_owners:
+                Owner.objects.bulk_create(self._pending_owners, batch_size=self.batch_size)
+                self.result.owners += len(self._pending_owners)
+            if self._pending_apartments:
+                # owner_id нових власників Django підставить з owner.pk,
+                # отриманого щойно в bulk_create вище.
+                Apartment.objects.bulk_create(self._pending_apartments, batch_size=self.batch_size)
+                self.result.apartments += len(self._pending_apartments)
+        self._pending_owners = []
+        self._pending_apartments = []
+
+    def import_row(self, line, row):
+        building = self._building(line, row)
+        if building is None or not row.get('entrance'):
+            return
+        entrance = self._entrance(line, row, building)
+        if entrance is None or not row.get('apartment'):
+            return
+        self._apartment(line, row, entrance)
+
+    def run(self, rows):
+        for line, row in rows:
+            self.import_row(line, row)
+        self.flush()
+        return self.result
+
+
+def import_complex_file(complex_obj, fileobj, filename='', batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """
+    Імпортує файл у ЖК і повертає ImportResult.
+    dry_run=True виконує все в транзакції, яку потім відкочує.
+    """
+    rows = iter_import_rows(fileobj, filename)
+    if not dry_run:
+        result = ComplexImporter(complex_obj, batch_size=batch_size).run(rows)
+        # bulk_create не надсилає сигналів — скидаємо версію ЖК у кеші вручну
+        bump_complex_version(complex_obj.pk)
+        return result
+
+    with transaction.atomic():
+        result = ComplexImporter(complex_obj, batch_size=batch_size).run(rows)
+        transaction.set_rollback(True)
+    return result
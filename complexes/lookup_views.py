@@ -0,0 +1,158 @@
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, JsonResponse
+
+from accounts.principal import get_principal
+from residence_manager.responses import forbidden_response
+
+from .choice_cache import choice_page_key, get_choice_page, set_choice_page
+from .forms import (
+    apartment_choice_label,
+    entrance_choice_label,
+    owner_choice_label,
+    parking_zone_choice_label,
+)
+from .models import Apartment, Entrance, ParkingZone
+from .owner_compat import owner_has_complex_column, owners_for_complex
+from .pagination import paginate_keyset
+from .widgets import label_queryset
+
+
+_MAX_NUMBER_DIGITS = 6
+
+
+def _apartment_matches(queryset, q):
+    if q.isdigit():
+        return queryset.filter(number=int(q)) if len(q) <= _MAX_NUMBER_DIGITS else queryset.none()
+    return queryset.filter(entrance__building__complex__name__istartswith=q)
+
+
+def _owner_matches(queryset, q):
+    # UPPER(name) LIKE 'Q%' — префіксний індекс з міграції 0019
+    return queryset.filter(name__istartswith=q)
+
+
+def _entrance_matches(queryset, q):
+    if q.isdigit():
+        return queryset.filter(building__number=int(q)) if len(q) <= _MAX_NUMBER_DIGITS else queryset.none()
+    return queryset.filter(building__complex__name__istartswith=q)
+
+
+def _parking_zone_matches(queryset, q):
+    if q.isdigit():
+        return queryset.filter(pk=int(q)) if len(q) <= _MAX_NUMBER_DIGITS else queryset.none()
+    return queryset.filter(type__istartswith=q)
+
+
+@dataclass(frozen=True)
+class Lookup:
+    """
+    Джерело підказок для AutocompleteSelect одного виду: queryset(complex_id)
+    (None — усі ЖК), keyset-сортування (збігається з індексом), фільтр за ?q=
+    і підпис варіанта.
+    """
+    queryset: object
+    ordering: tuple
+    matches: object
+    label: object
+
+
+def _complex_scoped(model, complex_lookup):
+    def queryset(complex_id):
+        queryset = model.objects.all()
+        if complex_id is not None:
+            queryset = queryset.filter(**{complex_lookup: complex_id})
+        return queryset
+    return queryset
+
+
+LOOKUPS = {
+    'apartment': Lookup(
+        _complex_scoped(Apartment, 'entrance__building__complex_id'),
+        ('entrance_id', 'floor', 'number'),
+        _apartment_matches,
+        apartment_choice_label,
+    ),
+    # owners_for_complex враховує стару схему без owner.complex_id
+    'owner': Lookup(owners_for_complex, ('name',), _owner_matches, owner_choice_label),
+    'entrance': Lookup(
+        _complex_scoped(Entrance, 'building__complex_id'),
+        ('building_id', 'number'),
+        _entrance_matches,
+        entrance_choice_label,
+    ),
+    'parking_zone': Lookup(
+        _complex_scoped(ParkingZone, 'entrance__building__complex_id'),
+        ('pk',),
+        _parking_zone_matches,
+        parking_zone_choice_label,
+    ),
+}
+
+
+def _lookup_scope(user, kind, requested_complex):
+    """
+    (ЖК, власник), якими обмежені підказки для ролі користувача;
+    None — доступу немає. Охоронець і власник бачать лише квартири.
+    """
+    principal = get_principal(user)
+    if principal.is_superadmin:
+        return requested_complex, None
+    if principal.is_complex_admin:
+        return principal.admin_complex_id, None
+    if kind != 'apartment':
+        return None
+    if principal.is_guard:
+        return principal.staff_complex_id, None
+    if principal.owner_id:
+        return None, principal.owner_id
+    return None
+
+
+@login_required
+def form_lookup(request, kind):
+    """
+    JSON-підказки для полів вибору (complexes/autocomplete.js):
+    {"results": [{"id", "text"}], "next": URL наступної сторінки або null}.
+    ?q= — префікс назви або номер, ?complex= — ЖК (діє лише для супер-адміна).
+    """
+    lookup = LOOKUPS.get(kind)
+    if lookup is None:
+        raise Http404
+
+    requested_complex = request.GET.get('complex') or ''
+    requested_complex = int(requested_complex) if requested_complex.isdigit() else None
+    scope = _lookup_scope(request.user, kind, requested_complex)
+    if scope is None:
+        return forbidden_response(request)
+    complex_id, owner_id = scope
+
+    q = (request.GET.get('q') or '').strip()
+    cache_key = None
+    if not q and owner_id is None and (kind != 'owner' or owner_has_complex_column()):
+        # Сторінки без запиту однакові для всіх користувачів ЖК — з кешу
+        cache_key = choice_page_key(kind, complex_id, request.GET.get('cursor'))
+        payload = get_choice_page(cache_key)
+        if payload is not None:
+            return JsonResponse(payload)
+
+    queryset = label_queryset(lookup.queryset(complex_id), lookup.label)
+    if owner_id is not None:
+        queryset = queryset.filter(owner_id=owner_id)
+
+    if q:
+        queryset = lookup.matches(queryset, q)
+
+    page = paginate_keyset(
+        request, queryset, lookup.ordering,
+        page_size=getattr(settings, 'LOOKUP_PAGE_SIZE', 20),
+    )
+    payload = {
+        'results': [{'id': obj.pk, 'text': lookup.label(obj)} for obj in page],
+        'next': page.next_url,
+    }
+    if cache_key is not None:
+        set_choice_page(cache_key, payload)
+    return JsonResponse(payload)
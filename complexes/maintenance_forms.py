@@ -13,10 +13,10 @@ class MaintenanceRequestForm(forms.ModelForm):
         }
 
     def __init__(self, *args, **kwargs):
-        owner = kwargs.pop('owner', None)
+        owner_id = kwargs.pop('owner_id', None)
         super().__init__(*args, **kwargs)
-        if owner is not None:
-            self.fields['apartment'].queryset = Apartment.objects.filter(owner=owner)
+        if owner_id is not None:
+            self.fields['apartment'].queryset = Apartment.objects.filter(owner_id=owner_id)
         self.fields['apartment'].label = 'Квартира'
         configure_apartment_field(self.fields['apartment'])
         self.fields['description'].label = 'Опис проблеми'
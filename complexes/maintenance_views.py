@@ -1,21 +1,22 @@
+from asgiref.sync import sync_to_async
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import aget_object_or_404, render, redirect, get_object_or_404
 from residence_manager.responses import forbidden_response
 from django.db.models import Prefetch
 
-from .models import MaintenanceRequest
+from accounts.principal import arequest_principal, get_principal
+
+from .exports import TICKET_EXPORT_COLUMNS, requested_export_format, stream_export
+from .models import MaintenanceRequest, Staff
 from .maintenance_forms import MaintenanceRequestForm
 
 
 def _is_owner(user):
-    return user.is_authenticated and hasattr(user, 'owner_account')
+    return get_principal(user).is_owner
 
 
 def _has_technician_access(user):
-    return (
-        user.is_authenticated and hasattr(user, 'staff_account') and
-        getattr(user.staff_account, 'access_type', 'maintenance') == 'maintenance'
-    )
+    return get_principal(user).is_technician
 
 
 @login_required
@@ -23,16 +24,18 @@ def tickets_owner_list(request):
     if not _is_owner(request.user):
         return forbidden_response(request)
 
-    owner = request.user.owner_account.owner
     tickets = (
         MaintenanceRequest.objects
         .select_related('apartment', 'apartment__entrance', 'apartment__entrance__building')
-        .filter(owner=owner)
+        .filter(owner_id=request.principal.owner_id)
         .order_by('-created_at')
     )
 
+    export_format = requested_export_format(request)
+    if export_format:
+        return stream_export(tickets, TICKET_EXPORT_COLUMNS, 'tickets', export_format)
+
     return render(request, 'complexes/tickets_owner_list.html', {
-        'owner': owner,
         'tickets': tickets,
     })
 
@@ -42,18 +45,18 @@ def ticket_create(request):
     if not _is_owner(request.user):
         return forbidden_response(request)
 
-    owner = request.user.owner_account.owner
+    owner_id = request.principal.owner_id
 
     if request.method == 'POST':
-        form = MaintenanceRequestForm(request.POST, owner=owner)
+        form = MaintenanceRequestForm(request.POST, owner_id=owner_id)
         if form.is_valid():
             ticket = form.save(commit=False)
-            ticket.owner = owner
+            ticket.owner_id = owner_id
             ticket.status = 'new'
             ticket.save()
             return redirect('tickets_owner_list')
     else:
-        form = MaintenanceRequestForm(owner=owner)
+        form = MaintenanceRequestForm(owner_id=owner_id)
 
     return render(request, 'complexes/simple_form.html', {
         'title': "Створити заявку на ремонт",
@@ -66,8 +69,7 @@ def tickets_staff_list(request):
     if not _has_technician_access(request.user):
         return forbidden_response(request)
 
-    staff = request.user.staff_account.staff
-    complex_id = staff.complex_id
+    complex_id = request.principal.staff_complex_id
 
     base_qs = (
         MaintenanceRequest.objects
@@ -78,14 +80,20 @@ def tickets_staff_list(request):
             'apartment__entrance__building',
             'apartment__entrance__building__complex',
         )
-        .filter(apartment__entrance__building__complex_id=complex_id)
+        .filter(complex_id=complex_id)
         .order_by('status', '-created_at')
     )
 
+    export_format = requested_export_format(request)
+    if export_format:
+        return stream_export(base_qs, TICKET_EXPORT_COLUMNS, 'tickets', export_format)
+
     tickets_new = base_qs.filter(status='new')
     tickets_in_progress = base_qs.filter(status='in_progress')
     tickets_done = base_qs.filter(status='done')
 
+    # Staff потрібен лише шаблону (назва ЖК)
+    staff = get_object_or_404(Staff.objects.select_related('complex'), pk=request.principal.staff_id)
     return render(request, 'complexes/tickets_staff_list.html', {
         'staff': staff,
         'tickets_new': tickets_new,
@@ -94,48 +102,39 @@ def tickets_staff_list(request):
     })
 
 
-@login_required
-def ticket_take(request, pk):
-    if not _has_technician_access(request.user):
-        return forbidden_response(request)
+async def _aset_ticket_status(request, pk, status, title):
+    """
+    Спільна частина async view зміни статусу: перевірка ролі й пошук
+    заявки — через async ORM; рендер шаблону (GET) — у потоці.
+    """
+    principal = await arequest_principal(request)
+    if not principal.is_technician:
+        return await sync_to_async(forbidden_response)(request)
 
-    staff = request.user.staff_account.staff
-    ticket = get_object_or_404(
+    ticket = await aget_object_or_404(
         MaintenanceRequest,
         pk=pk,
-        apartment__entrance__building__complex_id=staff.complex_id,
+        complex_id=principal.staff_complex_id,
     )
 
     if request.method == 'POST':
-        ticket.status = 'in_progress'
-        ticket.save(update_fields=['status', 'updated_at'])
+        ticket.status = status
+        await ticket.asave(update_fields=['status', 'updated_at'])
         return redirect('tickets_staff_list')
 
-    return render(request, 'complexes/confirm_delete.html', {
-        'title': 'Почати виконання заявки?',
+    return await sync_to_async(render)(request, 'complexes/confirm_delete.html', {
+        'title': title,
     })
 
 
 @login_required
-def ticket_done(request, pk):
-    if not _has_technician_access(request.user):
-        return forbidden_response(request)
+async def ticket_take(request, pk):
+    return await _aset_ticket_status(request, pk, 'in_progress', 'Почати виконання заявки?')
 
-    staff = request.user.staff_account.staff
-    ticket = get_object_or_404(
-        MaintenanceRequest,
-        pk=pk,
-        apartment__entrance__building__complex_id=staff.complex_id,
-    )
-
-    if request.method == 'POST':
-        ticket.status = 'done'
-        ticket.save(update_fields=['status', 'updated_at'])
-        return redirect('tickets_staff_list')
 
-    return render(request, 'complexes/confirm_delete.html', {
-        'title': 'Позначити заявку як виконану?',
-    })
+@login_required
+async def ticket_done(request, pk):
+    return await _aset_ticket_status(request, pk, 'done', 'Позначити заявку як виконану?')
 
 
 @login_required
@@ -143,11 +142,10 @@ def ticket_delete(request, pk):
     if not _has_technician_access(request.user):
         return forbidden_response(request)
 
-    staff = request.user.staff_account.staff
     ticket = get_object_or_404(
         MaintenanceRequest,
         pk=pk,
-        apartment__entrance__building__complex_id=staff.complex_id,
+        complex_id=request.principal.staff_complex_id,
     )
 
     if ticket.status != 'done':
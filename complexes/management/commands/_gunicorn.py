@@ -0,0 +1,57 @@
+"""Спільне для бенчмарків: запуск gunicorn з конфігурацією проєкту."""
+
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import CommandError
+
+
+GUNICORN_CONFIG = 'python:residence_manager.gunicorn_conf'
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError('gunicorn завершився під час запуску.')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise CommandError(f'gunicorn не відкрив порт {port} за {timeout} с.')
+
+
+@contextmanager
+def running_gunicorn(port, env):
+    """
+    gunicorn -c residence_manager.gunicorn_conf на 127.0.0.1:port;
+    env доповнює оточення (DB_*, GUNICORN_*). Зупиняється на виході.
+    """
+    command = [sys.executable, '-m', 'gunicorn', '-c', GUNICORN_CONFIG]
+    env = {
+        **os.environ,
+        'DEBUG': 'False',
+        **env,
+        'GUNICORN_BIND': f'127.0.0.1:{port}',
+    }
+    process = subprocess.Popen(
+        command, cwd=settings.BASE_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _wait_for_port(port, process)
+        yield process
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
@@ -0,0 +1,101 @@
+import statistics
+import time
+import urllib.request
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from ._gunicorn import percentile, running_gunicorn
+
+
+# Режими з'єднань із БД: назва -> змінні оточення для gunicorn.
+MODES = {
+    'no-persist': {'DB_CONN_MAX_AGE': '0', 'DB_POOL': '0'},
+    'persistent': {'DB_CONN_MAX_AGE': '60', 'DB_CONN_HEALTH_CHECKS': '1', 'DB_POOL': '0'},
+    'pool': {'DB_CONN_MAX_AGE': '0', 'DB_POOL': '1'},
+}
+
+
+def _pool_available():
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _sessions_established():
+    """Лічильник сесій БД з pg_stat_database (PostgreSQL 14+)."""
+    with connection.cursor() as cursor:
+        cursor.execute('select pg_stat_clear_snapshot()')
+        cursor.execute(
+            'select sessions from pg_stat_database where datname = current_database()'
+        )
+        return cursor.fetchone()[0]
+
+
+class Command(BaseCommand):
+    help = (
+        "Порівнює накладні витрати на з'єднання з БД на запит: запускає "
+        "gunicorn (конфігурація з Dockerfile) у режимах no-persist / persistent / pool "
+        "і міряє затримку та кількість нових сесій PostgreSQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/', help='URL, який запитувати (за замовчуванням — список ЖК).')
+        parser.add_argument('--requests', type=int, default=300, help='Кількість запитів у кожному режимі.')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--workers', type=int, default=1, help='GUNICORN_WORKERS.')
+        parser.add_argument(
+            '--mode', action='append', choices=sorted(MODES),
+            help='Режим (можна кілька); за замовчуванням — усі доступні.',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Команда потребує PostgreSQL.')
+
+        modes = options['mode'] or [mode for mode in MODES if mode != 'pool' or _pool_available()]
+        if 'pool' in modes and not _pool_available():
+            raise CommandError('Режим pool потребує пакетів psycopg[binary,pool].')
+
+        self.stdout.write(self._connect_cost())
+        for mode in modes:
+            self.stdout.write(self._run_mode(mode, options))
+
+    def _connect_cost(self, attempts=20):
+        """Час встановлення нового з'єднання (TCP/сокет + автентифікація) без HTTP."""
+        timings = []
+        for _ in range(attempts):
+            started = time.perf_counter()
+            connection.ensure_connection()
+            timings.append((time.perf_counter() - started) * 1000)
+            connection.close()
+        return f"connect+auth: median {statistics.median(timings):.2f} ms ({attempts} з'єднань)"
+
+    def _run_mode(self, mode, options):
+        env = {
+            **MODES[mode],
+            'GUNICORN_WORKER_CLASS': 'sync',
+            'GUNICORN_WORKERS': str(options['workers']),
+        }
+        with running_gunicorn(options['port'], env):
+            url = f"http://127.0.0.1:{options['port']}{options['path']}"
+            # прогрів: імпорти, перше з'єднання воркера, кеші шаблонів
+            for _ in range(5):
+                urllib.request.urlopen(url).read()
+
+            sessions_before = _sessions_established()
+            timings = []
+            for _ in range(options['requests']):
+                started = time.perf_counter()
+                with urllib.request.urlopen(url) as response:
+                    response.read()
+                timings.append((time.perf_counter() - started) * 1000)
+            new_sessions = _sessions_established() - sessions_before
+
+        return (
+            f'{mode:<11} mean {statistics.mean(timings):7.2f} ms  '
+            f'p50 {percentile(timings, 0.5):7.2f} ms  p95 {percentile(timings, 0.95):7.2f} ms  '
+            f'нових сесій БД: {new_sessions} на {len(timings)} запитів'
+        )
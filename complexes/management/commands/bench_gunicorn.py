@@ -0,0 +1,107 @@
+import asyncio
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from residence_manager.gunicorn_conf import WORKER_CLASSES, cpu_count
+
+from ._gunicorn import percentile, running_gunicorn
+
+
+async def _request(port, path):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(
+        f'GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n'.encode('ascii')
+    )
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    return data[9:12]
+
+
+async def _load(port, path, concurrency, duration):
+    """concurrency клієнтів шлють запити впритул протягом duration секунд."""
+    timings, errors = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def client():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                status = await _request(port, path)
+            except OSError:
+                status = None
+            if status == b'200':
+                timings.append((time.perf_counter() - started) * 1000)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return timings, errors, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        'Навантажувальний тест gunicorn з residence_manager.gunicorn_conf: '
+        'пропускна здатність для різних класів воркерів і кількості процесів.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/', help='URL, який запитувати (за замовчуванням — список ЖК).')
+        parser.add_argument('--duration', type=float, default=10, help='Секунд навантаження на кожну конфігурацію.')
+        parser.add_argument('--concurrency', type=int, default=32, help='Одночасних клієнтів.')
+        parser.add_argument(
+            '--workers', default=None,
+            help='Кількості воркерів через кому; за замовчуванням 1, 2, 4 … до 2 * CPU.',
+        )
+        parser.add_argument(
+            '--worker-class', action='append', choices=sorted(WORKER_CLASSES),
+            help='Клас воркера (можна кілька); за замовчуванням sync і gthread.',
+        )
+        parser.add_argument('--threads', type=int, default=4, help='Потоків на воркер gthread.')
+        parser.add_argument('--port', type=int, default=8766)
+
+    def handle(self, *args, **options):
+        cpus = cpu_count()
+        if options['workers']:
+            try:
+                worker_counts = [int(value) for value in options['workers'].split(',')]
+            except ValueError:
+                raise CommandError('--workers: очікуються числа через кому.')
+        else:
+            worker_counts = [1]
+            while worker_counts[-1] * 2 <= 2 * cpus:
+                worker_counts.append(worker_counts[-1] * 2)
+
+        self.stdout.write(
+            f"CPU: {cpus}; {options['concurrency']} клієнтів, {options['duration']:g} с на конфігурацію"
+        )
+        self.stdout.write(f"{'class':<8} {'workers':>7} {'threads':>7} {'req/s':>9} {'x':>6} "
+                          f"{'p50 ms':>8} {'p95 ms':>8} {'errors':>6}")
+        for worker_class in options['worker_class'] or ['sync', 'gthread']:
+            baseline = None
+            for workers in worker_counts:
+                threads = options['threads'] if worker_class == 'gthread' else 1
+                env = {
+                    'GUNICORN_WORKER_CLASS': worker_class,
+                    'GUNICORN_WORKERS': str(workers),
+                    'GUNICORN_THREADS': str(threads),
+                    'GUNICORN_MAX_REQUESTS': '0',
+                }
+                with running_gunicorn(options['port'], env):
+                    # прогрів: перше з'єднання з БД і кеші шаблонів у кожному воркері
+                    asyncio.run(_load(options['port'], options['path'], workers * threads, 1))
+                    timings, errors, elapsed = asyncio.run(
+                        _load(options['port'], options['path'], options['concurrency'], options['duration'])
+                    )
+                if not timings:
+                    raise CommandError(f'{worker_class} x{workers}: жодної успішної відповіді.')
+                throughput = len(timings) / elapsed
+                baseline = baseline or throughput
+                self.stdout.write(
+                    f'{worker_class:<8} {workers:>7} {threads:>7} {throughput:>9.1f} '
+                    f'{throughput / baseline:>6.2f} {percentile(timings, 0.5):>8.1f} '
+                    f'{percentile(timings, 0.95):>8.1f} {errors:>6}'
+                )
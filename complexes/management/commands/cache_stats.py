@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from complexes.cache import cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Частка влучань у кеш ЖК (complexes.cache) по просторах імен. Лічильники '
+        'воркерів видно лише зі спільним кешем (CACHE_BACKEND=file).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Обнулити лічильники після виводу.')
+
+    def handle(self, *args, **options):
+        stats = cache_stats()
+        if not stats:
+            self.stdout.write('Звернень до кешу ще не зафіксовано.')
+        for namespace, counts in sorted(stats.items()):
+            ratio = '—' if counts['ratio'] is None else f"{counts['ratio']:.1%}"
+            self.stdout.write(
+                f"{namespace:<12} hits {counts['hits']:>8}  misses {counts['misses']:>8}  hit ratio {ratio}"
+            )
+        if options['reset']:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS('Лічильники обнулено.'))
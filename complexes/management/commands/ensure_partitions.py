@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from complexes.partitions import PARTITIONED_TABLES, ensure_month_partitions, expire_month_partitions
+
+
+class Command(BaseCommand):
+    help = (
+        'Створює місячні партиції наперед і від\'єднує застарілі згідно зі строком '
+        'зберігання (запускати з cron раз на добу).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead', type=int, default=None,
+            help='Скільки місяців наперед; за замовчуванням PARTITION_MONTHS_AHEAD.',
+        )
+        parser.add_argument(
+            '--drop', action='store_true',
+            help='Видаляти застарілі партиції замість від\'єднання.',
+        )
+
+    def handle(self, *args, **options):
+        for table, column, retention_setting in PARTITIONED_TABLES:
+            names = ensure_month_partitions(table, column, options['months_ahead'])
+            self.stdout.write(self.style.SUCCESS(f'{table}: {", ".join(names)}'))
+
+            expired = expire_month_partitions(
+                table, getattr(settings, retention_setting, 0), drop=options['drop']
+            )
+            if expired:
+                action = 'видалено' if options['drop'] else 'від\'єднано'
+                self.stdout.write(self.style.WARNING(f'{table}: {action} {", ".join(expired)}'))
@@ -0,0 +1,118 @@
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+
+from complexes.models import (
+    Apartment, Building, Entrance, MaintenanceRequest, Owner, ParkingSpot, Resident,
+    ResidentialComplex, Staff, StorageRoom, Visitor,
+)
+
+
+def list_view_querysets(complex_id):
+    """
+    Запити першої сторінки списків так, як їх будують view
+    (фільтр за ЖК + ORDER BY + LIMIT keyset-пагінації).
+    """
+    limit = getattr(settings, 'LIST_PAGE_SIZE', 50) + 1
+    entrance = Entrance.objects.filter(building__complex_id=complex_id).order_by('pk').first()
+    owner = Owner.objects.filter(complex_id=complex_id).order_by('pk').first()
+
+    querysets = {
+        'complex_tree (buildings)': Building.objects.filter(complex_id=complex_id)
+            .order_by('number', 'pk'),
+        'entrance_apartments': Apartment.objects.filter(entrance=entrance)
+            .select_related('owner').order_by('floor', 'number'),
+        'residents_list': Resident.objects.select_related('apartment__entrance__building__complex')
+            .filter(complex_id=complex_id)
+            .order_by('fullname', 'pk')[:limit],
+        'owners_list': Owner.objects.select_related('complex').filter(complex_id=complex_id)
+            .order_by('name', 'pk')[:limit],
+        'staff_list': Staff.objects.filter(complex_id=complex_id).order_by('fullname', 'pk')[:limit],
+        'visitors_list': Visitor.objects.select_related('apartment__entrance__building__complex', 'added_by')
+            .filter(complex_id=complex_id)
+            .order_by('-created_at', '-pk')[:limit],
+        'tickets_staff_list': MaintenanceRequest.objects.select_related('owner', 'apartment__entrance__building')
+            .filter(complex_id=complex_id, status='new')
+            .order_by('status', '-created_at'),
+        'tickets_owner_list': MaintenanceRequest.objects.select_related('apartment__entrance__building')
+            .filter(owner=owner).order_by('-created_at'),
+        'storage_list': StorageRoom.objects.select_related('apartment__entrance__building__complex')
+            .filter(complex_id=complex_id)
+            .order_by('number', 'pk')[:limit],
+        'parking_list (spots)': ParkingSpot.objects.select_related('parking_zone', 'owner')
+            .filter(complex_id=complex_id)
+            .order_by('number', 'pk')[:limit],
+    }
+    return querysets
+
+
+class Command(BaseCommand):
+    help = (
+        'Показує плани запитів списків ЖК (EXPLAIN). Щоб порівняти індекси, '
+        'запустіть до і після "migrate complexes 0016" з тими самими даними.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--complex', type=int, default=None,
+            help='ID ЖК; за замовчуванням — ЖК з найбільшою кількістю квартир.',
+        )
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='EXPLAIN ANALYZE: реально виконати запити й показати час.',
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=1,
+            help='З --analyze: виконати кожен запит N разів і взяти найшвидший.',
+        )
+        parser.add_argument(
+            '--summary', action='store_true',
+            help='Лише підсумковий рядок для кожного списку, без планів.',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Команда потребує PostgreSQL.')
+
+        complex_id = options['complex']
+        if complex_id is None:
+            biggest = (
+                ResidentialComplex.objects
+                .annotate(apartments=Count('buildings__entrances__apartments'))
+                .order_by('-apartments')
+                .first()
+            )
+            if biggest is None:
+                raise CommandError('У базі немає жодного ЖК.')
+            complex_id = biggest.pk
+
+        self.stdout.write(f'ЖК #{complex_id}')
+        for name, queryset in list_view_querysets(complex_id).items():
+            plan = self._best_plan(queryset, options['analyze'], max(1, options['repeat']))
+            self.stdout.write(self.style.MIGRATE_HEADING(f'== {name}: {self._headline(plan)}'))
+            if not options['summary']:
+                self.stdout.write(plan)
+
+    def _best_plan(self, queryset, analyze, repeat):
+        if not analyze:
+            return queryset.explain()
+        plans = [queryset.explain(analyze=True, buffers=True) for _ in range(repeat)]
+        return min(plans, key=self._execution_ms)
+
+    @staticmethod
+    def _execution_ms(plan):
+        timing = re.search(r'Execution Time: ([\d.]+) ms', plan)
+        return float(timing.group(1)) if timing else 0.0
+
+    @staticmethod
+    def _headline(plan):
+        """Вартість кореневого вузла та (з --analyze) час виконання."""
+        cost = re.search(r'cost=[\d.]+\.\.([\d.]+)', plan)
+        parts = [f'cost {cost.group(1)}' if cost else '']
+        timing = re.search(r'Execution Time: ([\d.]+ ms)', plan)
+        if timing:
+            parts.append(timing.group(1))
+        return ', '.join(part for part in parts if part)
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from complexes.importer import DEFAULT_BATCH_SIZE, ImportFormatError, import_complex_file
+from complexes.models import ResidentialComplex
+
+
+class Command(BaseCommand):
+    help = "Імпортує будинки, під'їзди, квартири і власників ЖК з CSV/XLSX."
+
+    def add_arguments(self, parser):
+        parser.add_argument('complex_id', type=int)
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Перевірити файл і відкотити всі зміни.',
+        )
+
+    def handle(self, *args, **options):
+        complex_obj = ResidentialComplex.objects.filter(pk=options['complex_id']).first()
+        if complex_obj is None:
+            raise CommandError(f"ЖК {options['complex_id']} не знайдено.")
+
+        try:
+            with open(options['path'], 'rb') as fileobj:
+                result = import_complex_file(
+                    complex_obj,
+                    fileobj,
+                    filename=options['path'],
+                    batch_size=options['batch_size'],
+                    dry_run=options['dry_run'],
+                )
+        except (OSError, ImportFormatError, UnicodeDecodeError) as exc:
+            raise CommandError(str(exc))
+
+        for line, message in result.errors:
+            self.stderr.write(f'Рядок {line}: {message}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Будинків: {result.buildings}, під\'їздів: {result.entrances}, '
+            f'квартир: {result.apartments}, власників: {result.owners}, '
+            f'пропущено: {result.skipped}, помилок: {len(result.errors)}'
+            + (' (dry-run, зміни відкочено)' if options['dry_run'] else '')
+        ))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from complexes.stats import refresh_complex_stats
+
+
+class Command(BaseCommand):
+    help = 'Перераховує матеріалізовану статистику ЖК (complex_stats) з нуля.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'complex_ids', nargs='*', type=int,
+            help='ID ЖК; без аргументів — усі комплекси.',
+        )
+
+    def handle(self, *args, **options):
+        total = refresh_complex_stats(options['complex_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f'Оновлено статистику для {total} ЖК.'))
@@ -0,0 +1,545 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+SQL_UP = """
+CREATE TABLE IF NOT EXISTS complex_stats (
+  complex_id integer PRIMARY KEY
+    REFERENCES residential_complex(complex_id) ON DELETE CASCADE,
+  buildings_count integer NOT NULL DEFAULT 0,
+  entrances_count integer NOT NULL DEFAULT 0,
+  apartments_count integer NOT NULL DEFAULT 0,
+  owned_apartments_count integer NOT NULL DEFAULT 0,
+  residents_count integer NOT NULL DEFAULT 0,
+  storage_rooms_count integer NOT NULL DEFAULT 0,
+  free_storage_count integer NOT NULL DEFAULT 0,
+  parking_spots_count integer NOT NULL DEFAULT 0,
+  parking_status_counts jsonb NOT NULL DEFAULT '{}'::jsonb,
+  open_tickets_count integer NOT NULL DEFAULT 0,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- ===== Resolve the complex a row belongs to =====
+CREATE OR REPLACE FUNCTION public.building_complex_id(p_building bigint)
+RETURNS bigint LANGUAGE sql STABLE AS $$
+  SELECT complex_id FROM building WHERE building_id = p_building
+$$;
+
+CREATE OR REPLACE FUNCTION public.entrance_complex_id(p_entrance bigint)
+RETURNS bigint LANGUAGE sql STABLE AS $$
+  SELECT b.complex_id
+  FROM entrance e JOIN building b ON b.building_id = e.building_id
+  WHERE e.entrance_id = p_entrance
+$$;
+
+CREATE OR REPLACE FUNCTION public.apartment_complex_id(p_apartment bigint)
+RETURNS bigint LANGUAGE sql STABLE AS $$
+  SELECT b.complex_id
+  FROM apartment a
+  JOIN entrance e ON e.entrance_id = a.entrance_id
+  JOIN building b ON b.building_id = e.building_id
+  WHERE a.apartment_id = p_apartment
+$$;
+
+CREATE OR REPLACE FUNCTION public.parking_zone_complex_id(p_zone bigint)
+RETURNS bigint LANGUAGE sql STABLE AS $$
+  SELECT b.complex_id
+  FROM parking_zone z
+  JOIN entrance e ON e.entrance_id = z.entrance_id
+  JOIN building b ON b.building_id = e.building_id
+  WHERE z.parking_zone_id = p_zone
+$$;
+
+-- ===== Full recompute for one complex (used on moves/deletes and for repair) =====
+CREATE OR REPLACE FUNCTION public.complex_stats_refresh(p_complex bigint)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF p_complex IS NULL THEN
+    RETURN;
+  END IF;
+  IF NOT EXISTS (SELECT 1 FROM residential_complex WHERE complex_id = p_complex) THEN
+    RETURN;
+  END IF;
+
+  INSERT INTO complex_stats AS cs (
+    complex_id, buildings_count, entrances_count, apartments_count,
+    owned_apartments_count, residents_count, storage_rooms_count,
+    free_storage_count, parking_spots_count, parking_status_counts,
+    open_tickets_count, updated_at
+  )
+  SELECT
+    p_complex,
+    (SELECT count(*) FROM building b WHERE b.complex_id = p_complex),
+    (SELECT count(*) FROM entrance e
+       JOIN building b ON b.building_id = e.building_id
+      WHERE b.complex_id = p_complex),
+    (SELECT count(*) FROM apartment a
+       JOIN entrance e ON e.entrance_id = a.entrance_id
+       JOIN building b ON b.building_id = e.building_id
+      WHERE b.complex_id = p_complex),
+    (SELECT count(*) FROM apartment a
+       JOIN entrance e ON e.entrance_id = a.entrance_id
+       JOIN building b ON b.building_id = e.building_id
+      WHERE b.complex_id = p_complex AND a.owner_id IS NOT NULL),
+    (SELECT count(*) FROM resident r
+       JOIN apartment a ON a.apartment_id = r.apartment_id
+       JOIN entrance e ON e.entrance_id = a.entrance_id
+       JOIN building b ON b.building_id = e.building_id
+      WHERE b.complex_id = p_complex),
+    (SELECT count(*) FROM storage_room s
+       JOIN apartment a ON a.apartment_id = s.apartment_id
+       JOIN entrance e ON e.entrance_id = a.entrance_id
+       JOIN building b ON b.building_id = e.building_id
+      WHERE b.complex_id = p_complex),
+    (SELECT count(*) FROM storage_room s
+       JOIN apartment a ON a.apartment_id = s.apartment_id
+       JOIN entrance e ON e.entrance_id = a.entrance_id
+       JOIN building b ON b.building_id = e.building_id
+      WHERE b.complex_id = p_complex AND s.status = 'free'),
+    (SELECT count(*) FROM parking_spot ps
+       JOIN parking_zone z ON z.parking_zone_id = ps.parking_zone_id
+       JOIN entrance e ON e.entrance_id = z.entrance_id
+       JOIN building b ON b.building_id = e.building_id
+      WHERE b.complex_id = p_complex),
+    COALESCE((
+      SELECT jsonb_object_agg(t.status, t.cnt)
+      FROM (
+        SELECT COALESCE(ps.status, '') AS status, count(*) AS cnt
+        FROM parking_spot ps
+        JOIN parking_zone z ON z.parking_zone_id = ps.parking_zone_id
+        JOIN entrance e ON e.entrance_id = z.entrance_id
+        JOIN building b ON b.building_id = e.building_id
+        WHERE b.complex_id = p_complex
+        GROUP BY 1
+      ) t
+    ), '{}'::jsonb),
+    (SELECT count(*) FROM complexes_maintenancerequest m
+       JOIN apartment a ON a.apartment_id = m.apartment_id
+       JOIN entrance e ON e.entrance_id = a.entrance_id
+       JOIN building b ON b.building_id = e.building_id
+      WHERE b.complex_id = p_complex AND m.status IN ('new', 'in_progress')),
+    now()
+  ON CONFLICT (complex_id) DO UPDATE SET
+    buildings_count = EXCLUDED.buildings_count,
+    entrances_count = EXCLUDED.entrances_count,
+    apartments_count = EXCLUDED.apartments_count,
+    owned_apartments_count = EXCLUDED.owned_apartments_count,
+    residents_count = EXCLUDED.residents_count,
+    storage_rooms_count = EXCLUDED.storage_rooms_count,
+    free_storage_count = EXCLUDED.free_storage_count,
+    parking_spots_count = EXCLUDED.parking_spots_count,
+    parking_status_counts = EXCLUDED.parking_status_counts,
+    open_tickets_count = EXCLUDED.open_tickets_count,
+    updated_at = EXCLUDED.updated_at;
+END
+$$;
+
+-- ===== O(1) incremental update of one counter =====
+CREATE OR REPLACE FUNCTION public.complex_stats_bump(p_complex bigint, p_col text, p_delta integer)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF p_complex IS NULL OR p_delta = 0 THEN
+    RETURN;
+  END IF;
+  EXECUTE format(
+    'UPDATE complex_stats SET %1$I = %1$I + $1, updated_at = now() WHERE complex_id = $2',
+    p_col
+  ) USING p_delta, p_complex;
+  IF NOT FOUND THEN
+    -- No summary row yet: build it from scratch (already includes this change).
+    PERFORM public.complex_stats_refresh(p_complex);
+  END IF;
+END
+$$;
+
+-- ===== Triggers: hierarchy =====
+CREATE OR REPLACE FUNCTION public.complex_stats_complex_trg()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  INSERT INTO complex_stats (complex_id) VALUES (NEW.complex_id)
+  ON CONFLICT (complex_id) DO NOTHING;
+  RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION public.complex_stats_building_trg()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM public.complex_stats_bump(NEW.complex_id, 'buildings_count', 1);
+  ELSIF TG_OP = 'DELETE' THEN
+    PERFORM public.complex_stats_refresh(OLD.complex_id);
+  ELSIF NEW.complex_id IS DISTINCT FROM OLD.complex_id THEN
+    PERFORM public.complex_stats_refresh(OLD.complex_id);
+    PERFORM public.complex_stats_refresh(NEW.complex_id);
+  END IF;
+  RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION public.complex_stats_entrance_trg()
+RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+  old_complex bigint;
+  new_complex bigint;
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    PERFORM public.complex_stats_bump(public.building_complex_id(NEW.building_id), 'entrances_count', 1);
+  ELSIF TG_OP = 'DELETE' THEN
+    PERFORM public.complex_stats_refresh(public.building_complex_id(OLD.building_id));
+  ELSIF NEW.building_id IS DISTINCT FROM OLD.building_id THEN
+    old_complex := public.building_complex_id(OLD.building_id);
+    new_complex := public.building_complex_id(NEW.building_id);
+    IF old_complex IS DISTINCT FROM new_complex THEN
+      PERFORM public.complex_stats_refresh(old_complex);
+      PERFORM public.complex_stats_refresh(new_complex);
+    END IF;
+  END IF;
+  RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION public.complex_stats_parking_zone_trg()
+RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+  old_complex bigint;
+  new_complex bigint;
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    PERFORM public.complex_stats_refresh(public.entrance_complex_id(OLD.entrance_id));
+  ELSIF NEW.entrance_id IS DISTINCT FROM OLD.entrance_id THEN
+    old_complex := public.entrance_complex_id(OLD.entrance_id);
+    new_complex := public.entrance_complex_id(NEW.entrance_id);
+    IF old_complex IS DISTINCT FROM new_complex THEN
+      PERFORM public.complex_stats_refresh(old_complex);
+      PERFORM public.complex_stats_refresh(new_complex);
+    END IF;
+  END IF;
+  RETURN NULL;
+END
+$$;
+
+-- ===== Triggers: leaf rows =====
+-- Statement-level triggers with transition tables: a bulk INSERT/UPDATE/DELETE
+-- is aggregated into one UPDATE per complex instead of one per row (per-row
+-- updates of the same complex_stats row make bulk statements quadratic).
+
+-- Apply several counter deltas to one complex at once.
+CREATE OR REPLACE FUNCTION public.complex_stats_add(p_complex bigint, p_deltas jsonb)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF p_complex IS NULL THEN
+    RETURN;
+  END IF;
+  UPDATE complex_stats SET
+    buildings_count = buildings_count + COALESCE((p_deltas->>'buildings_count')::int, 0),
+    entrances_count = entrances_count + COALESCE((p_deltas->>'entrances_count')::int, 0),
+    apartments_count = apartments_count + COALESCE((p_deltas->>'apartments_count')::int, 0),
+    owned_apartments_count = owned_apartments_count + COALESCE((p_deltas->>'owned_apartments_count')::int, 0),
+    residents_count = residents_count + COALESCE((p_deltas->>'residents_count')::int, 0),
+    storage_rooms_count = storage_rooms_count + COALESCE((p_deltas->>'storage_rooms_count')::int, 0),
+    free_storage_count = free_storage_count + COALESCE((p_deltas->>'free_storage_count')::int, 0),
+    open_tickets_count = open_tickets_count + COALESCE((p_deltas->>'open_tickets_count')::int, 0),
+    updated_at = now()
+  WHERE complex_id = p_complex;
+  IF NOT FOUND THEN
+    PERFORM public.complex_stats_refresh(p_complex);
+  END IF;
+END
+$$;
+
+-- Merge {status: delta} into parking_status_counts.
+CREATE OR REPLACE FUNCTION public.complex_stats_add_parking(p_complex bigint, p_status_deltas jsonb)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF p_complex IS NULL THEN
+    RETURN;
+  END IF;
+  UPDATE complex_stats SET
+    parking_spots_count = parking_spots_count + (
+      SELECT COALESCE(sum(value::int), 0) FROM jsonb_each_text(p_status_deltas)
+    ),
+    parking_status_counts = (
+      SELECT COALESCE(jsonb_object_agg(m.k, m.v) FILTER (WHERE m.v > 0), '{}'::jsonb)
+      FROM (
+        SELECT u.k, sum(u.v)::int AS v
+        FROM (
+          SELECT key AS k, value::int AS v FROM jsonb_each_text(parking_status_counts)
+          UNION ALL
+          SELECT key, value::int FROM jsonb_each_text(p_status_deltas)
+        ) u
+        GROUP BY u.k
+      ) m
+    ),
+    updated_at = now()
+  WHERE complex_id = p_complex;
+  IF NOT FOUND THEN
+    PERFORM public.complex_stats_refresh(p_complex);
+  END IF;
+END
+$$;
+
+-- Changed rows of the current statement with a sign: -1 for OLD, +1 for NEW.
+CREATE OR REPLACE FUNCTION public.complex_stats_changes(p_op text)
+RETURNS text
+LANGUAGE sql IMMUTABLE
+AS $$
+  SELECT CASE p_op
+    WHEN 'INSERT' THEN 'SELECT n.*, 1 AS sign FROM new_rows n'
+    WHEN 'DELETE' THEN 'SELECT o.*, -1 AS sign FROM old_rows o'
+    ELSE 'SELECT o.*, -1 AS sign FROM old_rows o UNION ALL SELECT n.*, 1 AS sign FROM new_rows n'
+  END
+$$;
+
+CREATE OR REPLACE FUNCTION public.complex_stats_apartment_stmt()
+RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+  moved bigint[];
+BEGIN
+  IF TG_OP = 'UPDATE' THEN
+    SELECT array_agg(DISTINCT c) INTO moved
+    FROM (
+      SELECT unnest(ARRAY[ob.complex_id, nb.complex_id]) AS c
+      FROM old_rows o
+      JOIN new_rows n ON n.apartment_id = o.apartment_id
+      LEFT JOIN entrance oe ON oe.entrance_id = o.entrance_id
+      LEFT JOIN building ob ON ob.building_id = oe.building_id
+      LEFT JOIN entrance ne ON ne.entrance_id = n.entrance_id
+      LEFT JOIN building nb ON nb.building_id = ne.building_id
+      WHERE ob.complex_id IS DISTINCT FROM nb.complex_id
+    ) t
+    WHERE c IS NOT NULL;
+    IF moved IS NOT NULL THEN
+      -- Residents, storage rooms and tickets move together with the apartment.
+      PERFORM public.complex_stats_refresh(c) FROM unnest(moved) AS c;
+    END IF;
+  END IF;
+
+  -- Complexes refreshed above already hold the final counts; the other rows
+  -- of the statement still contribute their deltas.
+  EXECUTE format($f$
+    SELECT public.complex_stats_add(b.complex_id, jsonb_build_object(
+      'apartments_count', sum(x.sign),
+      'owned_apartments_count', COALESCE(sum(x.sign) FILTER (WHERE x.owner_id IS NOT NULL), 0)
+    ))
+    FROM (%s) x
+    JOIN entrance e ON e.entrance_id = x.entrance_id
+    JOIN building b ON b.building_id = e.building_id
+    WHERE NOT b.complex_id = ANY(COALESCE($1, '{}'))
+    GROUP BY b.complex_id
+    HAVING sum(x.sign) <> 0
+        OR COALESCE(sum(x.sign) FILTER (WHERE x.owner_id IS NOT NULL), 0) <> 0
+  $f$, public.complex_stats_changes(TG_OP)) USING moved;
+  RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION public.complex_stats_resident_stmt()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  EXECUTE format($f$
+    SELECT public.complex_stats_add(b.complex_id, jsonb_build_object('residents_count', sum(x.sign)))
+    FROM (%s) x
+    JOIN apartment a ON a.apartment_id = x.apartment_id
+    JOIN entrance e ON e.entrance_id = a.entrance_id
+    JOIN building b ON b.building_id = e.building_id
+    GROUP BY b.complex_id
+    HAVING sum(x.sign) <> 0
+  $f$, public.complex_stats_changes(TG_OP));
+  RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION public.complex_stats_storage_room_stmt()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  EXECUTE format($f$
+    SELECT public.complex_stats_add(b.complex_id, jsonb_build_object(
+      'storage_rooms_count', sum(x.sign),
+      'free_storage_count', COALESCE(sum(x.sign) FILTER (WHERE x.status = 'free'), 0)
+    ))
+    FROM (%s) x
+    JOIN apartment a ON a.apartment_id = x.apartment_id
+    JOIN entrance e ON e.entrance_id = a.entrance_id
+    JOIN building b ON b.building_id = e.building_id
+    GROUP BY b.complex_id
+    HAVING sum(x.sign) <> 0
+        OR COALESCE(sum(x.sign) FILTER (WHERE x.status = 'free'), 0) <> 0
+  $f$, public.complex_stats_changes(TG_OP));
+  RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION public.complex_stats_ticket_stmt()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  EXECUTE format($f$
+    SELECT public.complex_stats_add(b.complex_id, jsonb_build_object('open_tickets_count', sum(x.sign)))
+    FROM (%s) x
+    JOIN apartment a ON a.apartment_id = x.apartment_id
+    JOIN entrance e ON e.entrance_id = a.entrance_id
+    JOIN building b ON b.building_id = e.building_id
+    WHERE x.status IN ('new', 'in_progress')
+    GROUP BY b.complex_id
+    HAVING sum(x.sign) <> 0
+  $f$, public.complex_stats_changes(TG_OP));
+  RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION public.complex_stats_parking_spot_stmt()
+RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  EXECUTE format($f$
+    SELECT public.complex_stats_add_parking(s.complex_id, jsonb_object_agg(s.status, s.delta))
+    FROM (
+      SELECT b.complex_id, COALESCE(x.status, '') AS status, sum(x.sign) AS delta
+      FROM (%s) x
+      JOIN parking_zone z ON z.parking_zone_id = x.parking_zone_id
+      JOIN entrance e ON e.entrance_id = z.entrance_id
+      JOIN building b ON b.building_id = e.building_id
+      GROUP BY 1, 2
+      HAVING sum(x.sign) <> 0
+    ) s
+    GROUP BY s.complex_id
+  $f$, public.complex_stats_changes(TG_OP));
+  RETURN NULL;
+END
+$$;
+
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname='complex_stats_complex_trg') THEN
+    EXECUTE 'CREATE TRIGGER complex_stats_complex_trg AFTER INSERT ON residential_complex\n'
+         || 'FOR EACH ROW EXECUTE FUNCTION public.complex_stats_complex_trg()';
+  END IF;
+  IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname='complex_stats_building_trg') THEN
+    EXECUTE 'CREATE TRIGGER complex_stats_building_trg\n'
+         || 'AFTER INSERT OR DELETE OR UPDATE OF complex_id ON building\n'
+         || 'FOR EACH ROW EXECUTE FUNCTION public.complex_stats_building_trg()';
+  END IF;
+  IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname='complex_stats_entrance_trg') THEN
+    EXECUTE 'CREATE TRIGGER complex_stats_entrance_trg\n'
+         || 'AFTER INSERT OR DELETE OR UPDATE OF building_id ON entrance\n'
+         || 'FOR EACH ROW EXECUTE FUNCTION public.complex_stats_entrance_trg()';
+  END IF;
+  IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname='complex_stats_parking_zone_trg') THEN
+    EXECUTE 'CREATE TRIGGER complex_stats_parking_zone_trg\n'
+         || 'AFTER DELETE OR UPDATE OF entrance_id ON parking_zone\n'
+         || 'FOR EACH ROW EXECUTE FUNCTION public.complex_stats_parking_zone_trg()';
+  END IF;
+END $$;
+
+"""
+
+# Leaf tables with statement-level triggers: (table, trigger function).
+STATEMENT_TABLES = [
+    ('apartment', 'complex_stats_apartment_stmt'),
+    ('resident', 'complex_stats_resident_stmt'),
+    ('storage_room', 'complex_stats_storage_room_stmt'),
+    ('parking_spot', 'complex_stats_parking_spot_stmt'),
+    ('complexes_maintenancerequest', 'complex_stats_ticket_stmt'),
+]
+
+
+def _statement_triggers_sql():
+    statements = []
+    for table, function in STATEMENT_TABLES:
+        statements.append(
+            f"DROP TRIGGER IF EXISTS {function}_ins ON {table};\n"
+            f"CREATE TRIGGER {function}_ins AFTER INSERT ON {table}\n"
+            f"REFERENCING NEW TABLE AS new_rows\n"
+            f"FOR EACH STATEMENT EXECUTE FUNCTION public.{function}();\n"
+            f"DROP TRIGGER IF EXISTS {function}_upd ON {table};\n"
+            f"CREATE TRIGGER {function}_upd AFTER UPDATE ON {table}\n"
+            f"REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows\n"
+            f"FOR EACH STATEMENT EXECUTE FUNCTION public.{function}();\n"
+            f"DROP TRIGGER IF EXISTS {function}_del ON {table};\n"
+            f"CREATE TRIGGER {function}_del AFTER DELETE ON {table}\n"
+            f"REFERENCING OLD TABLE AS old_rows\n"
+            f"FOR EACH STATEMENT EXECUTE FUNCTION public.{function}();\n"
+        )
+    # Initial fill for existing complexes
+    statements.append('SELECT public.complex_stats_refresh(complex_id) FROM residential_complex;\n')
+    return ''.join(statements)
+
+
+SQL_DOWN = ''.join(
+    f"DROP TRIGGER IF EXISTS {function}_ins ON {table};\n"
+    f"DROP TRIGGER IF EXISTS {function}_upd ON {table};\n"
+    f"DROP TRIGGER IF EXISTS {function}_del ON {table};\n"
+    f"DROP FUNCTION IF EXISTS public.{function}();\n"
+    for table, function in STATEMENT_TABLES
+) + """
+DROP TRIGGER IF EXISTS complex_stats_complex_trg ON residential_complex;
+DROP TRIGGER IF EXISTS complex_stats_building_trg ON building;
+DROP TRIGGER IF EXISTS complex_stats_entrance_trg ON entrance;
+DROP TRIGGER IF EXISTS complex_stats_parking_zone_trg ON parking_zone;
+DROP FUNCTION IF EXISTS public.complex_stats_complex_trg() CASCADE;
+DROP FUNCTION IF EXISTS public.complex_stats_building_trg() CASCADE;
+DROP FUNCTION IF EXISTS public.complex_stats_entrance_trg() CASCADE;
+DROP FUNCTION IF EXISTS public.complex_stats_parking_zone_trg() CASCADE;
+DROP FUNCTION IF EXISTS public.complex_stats_changes(text);
+DROP FUNCTION IF EXISTS public.complex_stats_add_parking(bigint, jsonb);
+DROP FUNCTION IF EXISTS public.complex_stats_add(bigint, jsonb);
+DROP FUNCTION IF EXISTS public.complex_stats_bump(bigint, text, integer);
+DROP FUNCTION IF EXISTS public.complex_stats_refresh(bigint);
+DROP FUNCTION IF EXISTS public.parking_zone_complex_id(bigint);
+DROP FUNCTION IF EXISTS public.apartment_complex_id(bigint);
+DROP FUNCTION IF EXISTS public.entrance_complex_id(bigint);
+DROP FUNCTION IF EXISTS public.building_complex_id(bigint);
+DROP TABLE IF EXISTS complex_stats;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complexes', '0011_owner_complex'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(SQL_UP + _statement_triggers_sql(), SQL_DOWN),
+            ],
+            state_operations=[
+                migrations.CreateModel(
+                    name='ComplexStats',
+                    fields=[
+                        ('complex', models.OneToOneField(
+                            db_column='complex_id',
+                            on_delete=django.db.models.deletion.DO_NOTHING,
+                            primary_key=True,
+                            related_name='stats',
+                            serialize=False,
+                            to='complexes.residentialcomplex',
+                        )),
+                        ('buildings_count', models.IntegerField(default=0)),
+                        ('entrances_count', models.IntegerField(default=0)),
+                        ('apartments_count', models.IntegerField(default=0)),
+                        ('owned_apartments_count', models.IntegerField(default=0)),
+                        ('residents_count', models.IntegerField(default=0)),
+                        ('storage_rooms_count', models.IntegerField(default=0)),
+                        ('free_storage_count', models.IntegerField(default=0)),
+                        ('parking_spots_count', models.IntegerField(default=0)),
+                        ('parking_status_counts', models.JSONField(default=dict)),
+                        ('open_tickets_count', models.IntegerField(default=0)),
+                        ('updated_at', models.DateTimeField(auto_now=True)),
+                    ],
+                    options={
+                        'db_table': 'complex_stats',
+                        'managed': False,
+                    },
+                ),
+            ],
+        ),
+    ]
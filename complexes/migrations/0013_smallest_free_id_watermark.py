@@ -0,0 +1,186 @@
+from django.db import migrations
+
+
+SMALLEST_ID_TABLES = [
+    ('residential_complex', 'complex_id'),
+    ('building', 'building_id'),
+    ('entrance', 'entrance_id'),
+    ('owner', 'owner_id'),
+    ('apartment', 'apartment_id'),
+    ('resident', 'resident_id'),
+    ('staff', 'staff_id'),
+    ('parking_zone', 'parking_zone_id'),
+    ('parking_spot', 'spot_id'),
+    ('storage_room', 'id'),
+]
+
+
+SQL_UP = """
+-- Low-water mark per table: every id below low_id is known to be taken.
+CREATE TABLE IF NOT EXISTS public.smallest_free_id_watermark (
+  table_name text NOT NULL,
+  column_name name NOT NULL,
+  low_id bigint NOT NULL,
+  PRIMARY KEY (table_name, column_name)
+);
+
+-- Smallest free id without generate_series(1, MAX(id)):
+-- start at the watermark and walk the primary-key index with LEAD()
+-- only until the first gap.
+CREATE OR REPLACE FUNCTION public.next_smallest_free_id(p_table regclass, p_col name)
+RETURNS bigint
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  low bigint;
+  low_is_free boolean;
+  new_id bigint;
+BEGIN
+  -- Prevent concurrent generators from choosing the same id (per table).
+  PERFORM pg_advisory_xact_lock(hashtext(p_table::text));
+
+  SELECT w.low_id INTO low
+  FROM public.smallest_free_id_watermark w
+  WHERE w.table_name = p_table::text AND w.column_name = p_col
+  FOR UPDATE;
+  IF low IS NULL OR low < 1 THEN
+    low := 1;
+  END IF;
+
+  EXECUTE format('SELECT NOT EXISTS (SELECT 1 FROM %s WHERE %I = $1)', p_table::text, p_col)
+    INTO low_is_free USING low;
+
+  IF low_is_free THEN
+    new_id := low;
+  ELSE
+    EXECUTE format(
+      'SELECT s.id + 1\n'
+      'FROM (\n'
+      '  SELECT %1$I AS id, lead(%1$I) OVER (ORDER BY %1$I) AS next_id\n'
+      '  FROM %2$s\n'
+      '  WHERE %1$I >= $1\n'
+      ') s\n'
+      'WHERE s.next_id IS NULL OR s.next_id > s.id + 1\n'
+      'ORDER BY s.id\n'
+      'LIMIT 1',
+      p_col, p_table::text
+    ) INTO new_id USING low;
+    IF new_id IS NULL THEN
+      new_id := low;
+    END IF;
+  END IF;
+
+  -- The caller inserts new_id in this transaction, so everything up to it is taken.
+  INSERT INTO public.smallest_free_id_watermark AS w (table_name, column_name, low_id)
+  VALUES (p_table::text, p_col, new_id + 1)
+  ON CONFLICT (table_name, column_name) DO UPDATE SET low_id = EXCLUDED.low_id;
+
+  RETURN new_id;
+END
+$$;
+
+-- Freed ids move the watermark down.
+CREATE OR REPLACE FUNCTION public.smallest_free_id_on_delete()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  col name := TG_ARGV[0];
+  freed bigint;
+BEGIN
+  EXECUTE format('SELECT min(%I) FROM old_rows', col) INTO freed;
+  IF freed IS NOT NULL THEN
+    UPDATE public.smallest_free_id_watermark
+    SET low_id = freed
+    WHERE table_name = TG_TABLE_NAME::regclass::text
+      AND column_name = col
+      AND low_id > freed;
+  END IF;
+  RETURN NULL;
+END
+$$;
+
+CREATE OR REPLACE FUNCTION public.smallest_free_id_on_update()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  col name := TG_ARGV[0];
+  freed bigint := (to_jsonb(OLD)->>col)::bigint;
+BEGIN
+  UPDATE public.smallest_free_id_watermark
+  SET low_id = freed
+  WHERE table_name = TG_TABLE_NAME::regclass::text
+    AND column_name = col
+    AND low_id > freed;
+  RETURN NULL;
+END
+$$;
+"""
+
+
+def _watermark_triggers_sql():
+    statements = []
+    for table, column in SMALLEST_ID_TABLES:
+        statements.append(
+            f"DROP TRIGGER IF EXISTS {table}_free_id_delete_trg ON {table};\n"
+            f"CREATE TRIGGER {table}_free_id_delete_trg\n"
+            f"AFTER DELETE ON {table}\n"
+            f"REFERENCING OLD TABLE AS old_rows\n"
+            f"FOR EACH STATEMENT EXECUTE FUNCTION public.smallest_free_id_on_delete('{column}');\n"
+            f"DROP TRIGGER IF EXISTS {table}_free_id_update_trg ON {table};\n"
+            f"CREATE TRIGGER {table}_free_id_update_trg\n"
+            f"AFTER UPDATE OF {column} ON {table}\n"
+            f"FOR EACH ROW WHEN (OLD.{column} IS DISTINCT FROM NEW.{column})\n"
+            f"EXECUTE FUNCTION public.smallest_free_id_on_update('{column}');\n"
+        )
+    return ''.join(statements)
+
+
+SQL_DOWN = """
+-- Back to the generate_series implementation from 0006
+CREATE OR REPLACE FUNCTION public.next_smallest_free_id(p_table regclass, p_col name)
+RETURNS bigint
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  new_id bigint;
+  sql text;
+BEGIN
+  PERFORM pg_advisory_xact_lock(hashtext(p_table::text));
+
+  sql := format(
+    'SELECT gs AS id\n'
+    'FROM generate_series(1, (SELECT COALESCE(MAX(%1$I),0)+1 FROM %2$s)) gs\n'
+    'LEFT JOIN %2$s t ON t.%1$I = gs\n'
+    'WHERE t.%1$I IS NULL\n'
+    'ORDER BY gs\n'
+    'LIMIT 1',
+     p_col, p_table::text
+  );
+  EXECUTE sql INTO new_id;
+  IF new_id IS NULL THEN
+    new_id := 1;
+  END IF;
+  RETURN new_id;
+END
+$$;
+""" + ''.join(
+    f"DROP TRIGGER IF EXISTS {table}_free_id_delete_trg ON {table};\n"
+    f"DROP TRIGGER IF EXISTS {table}_free_id_update_trg ON {table};\n"
+    for table, _ in SMALLEST_ID_TABLES
+) + r"""
+DROP FUNCTION IF EXISTS public.smallest_free_id_on_delete() CASCADE;
+DROP FUNCTION IF EXISTS public.smallest_free_id_on_update() CASCADE;
+DROP TABLE IF EXISTS public.smallest_free_id_watermark;
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('complexes', '0012_complex_stats'),
+    ]
+
+    operations = [
+        migrations.RunSQL(SQL_UP + _watermark_triggers_sql(), SQL_DOWN),
+    ]
@@ -0,0 +1,121 @@
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+SQL_UP = """
+-- Append-only log of visitor entries, range-partitioned by month.
+-- No foreign keys on purpose: an entry must outlive its visitor, and
+-- inserts should not lock parent rows.
+CREATE TABLE visitor_entry (
+  id bigserial,
+  visitor_id bigint,
+  complex_id integer,
+  validated_by_id integer,
+  entered_at timestamptz NOT NULL DEFAULT now(),
+  offline boolean NOT NULL DEFAULT false,
+  PRIMARY KEY (id, entered_at)
+) PARTITION BY RANGE (entered_at);
+
+CREATE TABLE visitor_entry_default PARTITION OF visitor_entry DEFAULT;
+
+-- "Who entered complex X today" and the history of one visitor.
+CREATE INDEX visitor_entry_complex_entered_idx ON visitor_entry (complex_id, entered_at DESC);
+CREATE INDEX visitor_entry_visitor_entered_idx ON visitor_entry (visitor_id, entered_at DESC);
+
+-- Create the monthly (UTC) partition <table>_pYYYYMM if it is missing.
+-- Rows of that month that already landed in <table>_default are moved
+-- into the new partition before ATTACH.
+CREATE OR REPLACE FUNCTION public.ensure_month_partition(p_table text, p_column text, p_month date)
+RETURNS text
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  lo timestamptz := date_trunc('month', p_month::timestamp) AT TIME ZONE 'UTC';
+  hi timestamptz := (date_trunc('month', p_month::timestamp) + interval '1 month') AT TIME ZONE 'UTC';
+  part text := p_table || '_p' || to_char(p_month, 'YYYYMM');
+  default_part text := p_table || '_default';
+BEGIN
+  IF to_regclass(format('public.%I', part)) IS NOT NULL THEN
+    RETURN part;
+  END IF;
+
+  EXECUTE format(
+    'CREATE TABLE public.%I (LIKE public.%I INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+    part, p_table
+  );
+  IF to_regclass(format('public.%I', default_part)) IS NOT NULL THEN
+    EXECUTE format(
+      'WITH moved AS (DELETE FROM public.%I WHERE %I >= $1 AND %I < $2 RETURNING *) '
+      'INSERT INTO public.%I SELECT * FROM moved',
+      default_part, p_column, p_column, part
+    ) USING lo, hi;
+  END IF;
+  EXECUTE format(
+    'ALTER TABLE public.%I ATTACH PARTITION public.%I FOR VALUES FROM (%L) TO (%L)',
+    p_table, part, lo, hi
+  );
+  RETURN part;
+END;
+$$;
+
+SELECT public.ensure_month_partition('visitor_entry', 'entered_at', (now() + make_interval(months => m))::date)
+FROM generate_series(0, 2) AS m;
+"""
+
+SQL_DOWN = """
+DROP TABLE IF EXISTS visitor_entry;
+DROP FUNCTION IF EXISTS public.ensure_month_partition(text, text, date);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complexes', '0013_smallest_free_id_watermark'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(SQL_UP, SQL_DOWN),
+            ],
+            state_operations=[
+                migrations.CreateModel(
+                    name='VisitorEntry',
+                    fields=[
+                        ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                        ('entered_at', models.DateTimeField(default=django.utils.timezone.now)),
+                        ('offline', models.BooleanField(default=False)),
+                        ('complex', models.ForeignKey(
+                            db_constraint=False,
+                            null=True,
+                            on_delete=django.db.models.deletion.DO_NOTHING,
+                            related_name='visitor_entries',
+                            to='complexes.residentialcomplex',
+                        )),
+                        ('validated_by', models.ForeignKey(
+                            db_constraint=False,
+                            null=True,
+                            on_delete=django.db.models.deletion.DO_NOTHING,
+                            related_name='+',
+                            to=settings.AUTH_USER_MODEL,
+                        )),
+                        ('visitor', models.ForeignKey(
+                            db_constraint=False,
+                            null=True,
+                            on_delete=django.db.models.deletion.DO_NOTHING,
+                            related_name='entries',
+                            to='complexes.visitor',
+                        )),
+                    ],
+                    options={
+                        'db_table': 'visitor_entry',
+                        'managed': False,
+                    },
+                ),
+            ],
+        ),
+    ]
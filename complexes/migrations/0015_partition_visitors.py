@@ -0,0 +1,94 @@
+from django.db import migrations
+
+
+SQL_UP = """
+-- Replace complexes_visitor with a table range-partitioned by month on
+-- created_at. The primary key has to include the partition key; ids
+-- still come from one identity sequence, so they stay unique.
+ALTER TABLE complexes_visitor RENAME TO complexes_visitor_old;
+ALTER INDEX complexes_visitor_pkey RENAME TO complexes_visitor_old_pkey;
+
+CREATE TABLE complexes_visitor (
+  id bigint GENERATED BY DEFAULT AS IDENTITY,
+  fullname varchar(255) NOT NULL,
+  purpose varchar(255) NOT NULL,
+  created_at timestamptz NOT NULL,
+  added_by_id integer
+    CONSTRAINT complexes_visitor_added_by_id_fk
+    REFERENCES auth_user (id) DEFERRABLE INITIALLY DEFERRED,
+  apartment_id integer
+    CONSTRAINT complexes_visitor_apartment_id_fk
+    REFERENCES apartment (apartment_id) DEFERRABLE INITIALLY DEFERRED,
+  CONSTRAINT complexes_visitor_pkey PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE complexes_visitor_default PARTITION OF complexes_visitor DEFAULT;
+
+-- Keyset pagination of visitors_list walks this index partition by partition.
+CREATE INDEX complexes_visitor_created_idx ON complexes_visitor (created_at DESC, id DESC);
+CREATE INDEX complexes_visitor_apartment_created_idx ON complexes_visitor (apartment_id, created_at DESC);
+CREATE INDEX complexes_visitor_added_by_idx ON complexes_visitor (added_by_id);
+
+-- One partition per month of existing data plus two months ahead.
+SELECT public.ensure_month_partition('complexes_visitor', 'created_at', m::date)
+FROM generate_series(
+  date_trunc('month', COALESCE((SELECT min(created_at) FROM complexes_visitor_old), now()) AT TIME ZONE 'UTC'),
+  date_trunc('month', now() AT TIME ZONE 'UTC') + interval '2 months',
+  interval '1 month'
+) AS m;
+
+INSERT INTO complexes_visitor (id, fullname, purpose, created_at, added_by_id, apartment_id)
+SELECT id, fullname, purpose, created_at, added_by_id, apartment_id FROM complexes_visitor_old;
+
+SELECT setval(
+  pg_get_serial_sequence('complexes_visitor', 'id'),
+  COALESCE((SELECT max(id) FROM complexes_visitor), 0) + 1,
+  false
+);
+
+DROP TABLE complexes_visitor_old;
+"""
+
+SQL_DOWN = """
+ALTER TABLE complexes_visitor RENAME TO complexes_visitor_part;
+ALTER INDEX complexes_visitor_pkey RENAME TO complexes_visitor_part_pkey;
+
+CREATE TABLE complexes_visitor (
+  id bigint GENERATED BY DEFAULT AS IDENTITY,
+  fullname varchar(255) NOT NULL,
+  purpose varchar(255) NOT NULL,
+  created_at timestamptz NOT NULL,
+  added_by_id integer
+    CONSTRAINT complexes_visitor_added_by_id_fk
+    REFERENCES auth_user (id) DEFERRABLE INITIALLY DEFERRED,
+  apartment_id integer
+    CONSTRAINT complexes_visitor_apartment_id_fk
+    REFERENCES apartment (apartment_id) DEFERRABLE INITIALLY DEFERRED,
+  CONSTRAINT complexes_visitor_pkey PRIMARY KEY (id)
+);
+
+CREATE INDEX complexes_visitor_added_by_id_e214450d ON complexes_visitor (added_by_id);
+CREATE INDEX complexes_visitor_apartment_id_ff2a2659 ON complexes_visitor (apartment_id);
+
+INSERT INTO complexes_visitor (id, fullname, purpose, created_at, added_by_id, apartment_id)
+SELECT id, fullname, purpose, created_at, added_by_id, apartment_id FROM complexes_visitor_part;
+
+SELECT setval(
+  pg_get_serial_sequence('complexes_visitor', 'id'),
+  COALESCE((SELECT max(id) FROM complexes_visitor), 0) + 1,
+  false
+);
+
+DROP TABLE complexes_visitor_part;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complexes', '0014_visitor_entry'),
+    ]
+
+    operations = [
+        migrations.RunSQL(SQL_UP, SQL_DOWN),
+    ]
@@ -0,0 +1,59 @@
+from django.db import migrations
+
+
+# (new index, table, columns, legacy FK index it makes redundant, its columns).
+# Each composite index starts with the FK column, so it also serves the joins
+# apartment -> entrance -> building -> complex that every scoped query uses,
+# plus the ORDER BY of the matching list view.
+HIERARCHY_INDEXES = [
+    ('building_complex_number_idx', 'building', '(complex_id, number)',
+     'building_complex_id_e260cccb', '(complex_id)'),
+    ('entrance_building_number_idx', 'entrance', '(building_id, number)',
+     'entrance_building_id_b48ccbc0', '(building_id)'),
+    ('apartment_entrance_floor_number_idx', 'apartment', '(entrance_id, floor, number)',
+     'apartment_entrance_id_a161ea6d', '(entrance_id)'),
+    ('resident_apartment_fullname_idx', 'resident', '(apartment_id, fullname)',
+     None, None),
+    ('owner_complex_name_idx', 'owner', '(complex_id, name)',
+     None, None),
+    ('staff_complex_fullname_idx', 'staff', '(complex_id, fullname)',
+     'staff_complex_id_0736e4a4', '(complex_id)'),
+    ('parking_spot_zone_number_idx', 'parking_spot', '(parking_zone_id, number)',
+     'parking_spot_parking_zone_id_64100bde', '(parking_zone_id)'),
+    ('storage_room_apartment_number_idx', 'storage_room', '(apartment_id, number)',
+     'storage_room_apartment_id_7eacd13e', '(apartment_id)'),
+    ('maintenancerequest_owner_created_idx', 'complexes_maintenancerequest', '(owner_id, created_at DESC)',
+     'complexes_maintenancerequest_owner_id_f5869b8a', '(owner_id)'),
+]
+
+
+def _operations():
+    operations = []
+    for name, table, columns, legacy_name, legacy_columns in HIERARCHY_INDEXES:
+        operations.append(migrations.RunSQL(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {columns};',
+            f'DROP INDEX CONCURRENTLY IF EXISTS {name};',
+        ))
+        if legacy_name:
+            operations.append(migrations.RunSQL(
+                f'DROP INDEX CONCURRENTLY IF EXISTS {legacy_name};',
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {legacy_name} ON {table} {legacy_columns};',
+            ))
+    operations.append(migrations.RunSQL(
+        'ANALYZE building, entrance, apartment, resident, owner, staff, '
+        'parking_spot, storage_room, complexes_maintenancerequest;',
+        migrations.RunSQL.noop,
+    ))
+    return operations
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('complexes', '0015_partition_visitors'),
+    ]
+
+    operations = _operations()
@@ -0,0 +1,222 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Leaf tables that get a derived complex_id:
+# (table, parent column, resolver function from 0012, scoped index columns).
+LEAF_TABLES = [
+    ('resident', 'apartment_id', 'apartment_complex_id', '(complex_id, fullname)'),
+    ('complexes_visitor', 'apartment_id', 'apartment_complex_id', '(complex_id, created_at DESC, id DESC)'),
+    ('complexes_maintenancerequest', 'apartment_id', 'apartment_complex_id', '(complex_id, status, created_at DESC)'),
+    ('storage_room', 'apartment_id', 'apartment_complex_id', '(complex_id, number)'),
+    ('parking_spot', 'parking_zone_id', 'parking_zone_complex_id', '(complex_id, number)'),
+]
+
+APARTMENT_LEAVES = [table for table, parent, _, _ in LEAF_TABLES if parent == 'apartment_id']
+
+
+def _leaf_sql():
+    statements = []
+    for table, parent, resolver, index_columns in LEAF_TABLES:
+        statements.append(f"""
+ALTER TABLE {table} ADD COLUMN IF NOT EXISTS complex_id integer;
+UPDATE {table} SET complex_id = public.{resolver}({parent}) WHERE {parent} IS NOT NULL;
+CREATE INDEX IF NOT EXISTS {table}_complex_idx ON {table} {index_columns};
+
+CREATE OR REPLACE FUNCTION public.{table}_set_complex_id()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  NEW.complex_id := public.{resolver}(NEW.{parent});
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS {table}_complex_id_ins ON {table};
+CREATE TRIGGER {table}_complex_id_ins
+BEFORE INSERT ON {table}
+FOR EACH ROW EXECUTE FUNCTION public.{table}_set_complex_id();
+
+-- complex_id is derived: any write that touches the parent or the column
+-- itself (including stale ORM instances saving NULL) is recomputed.
+DROP TRIGGER IF EXISTS {table}_complex_id_upd ON {table};
+CREATE TRIGGER {table}_complex_id_upd
+BEFORE UPDATE ON {table}
+FOR EACH ROW
+WHEN (NEW.{parent} IS DISTINCT FROM OLD.{parent} OR NEW.complex_id IS DISTINCT FROM OLD.complex_id)
+EXECUTE FUNCTION public.{table}_set_complex_id();
+""")
+    return ''.join(statements)
+
+
+def _sync_apartments_sql():
+    updates = ''.join(
+        f"""
+  UPDATE {table} t SET complex_id = public.apartment_complex_id(t.apartment_id)
+  WHERE t.apartment_id = ANY(p_apartments)
+    AND t.complex_id IS DISTINCT FROM public.apartment_complex_id(t.apartment_id);"""
+        for table in APARTMENT_LEAVES
+    )
+    return f"""
+CREATE OR REPLACE FUNCTION public.complex_id_sync_apartments(p_apartments bigint[])
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN{updates}
+END;
+$$;
+"""
+
+
+SQL_UP = _leaf_sql() + _sync_apartments_sql() + """
+CREATE OR REPLACE FUNCTION public.complex_id_sync_zones(p_zones bigint[])
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  UPDATE parking_spot t SET complex_id = public.parking_zone_complex_id(t.parking_zone_id)
+  WHERE t.parking_zone_id = ANY(p_zones)
+    AND t.complex_id IS DISTINCT FROM public.parking_zone_complex_id(t.parking_zone_id);
+END;
+$$;
+
+-- Moving a node of the hierarchy re-derives complex_id below it.
+CREATE OR REPLACE FUNCTION public.complex_id_apartment_moved()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  PERFORM public.complex_id_sync_apartments(ARRAY[NEW.apartment_id::bigint]);
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.complex_id_parking_zone_moved()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  PERFORM public.complex_id_sync_zones(ARRAY[NEW.parking_zone_id::bigint]);
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.complex_id_entrance_moved()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  PERFORM public.complex_id_sync_apartments(ARRAY(
+    SELECT apartment_id::bigint FROM apartment WHERE entrance_id = NEW.entrance_id
+  ));
+  PERFORM public.complex_id_sync_zones(ARRAY(
+    SELECT parking_zone_id::bigint FROM parking_zone WHERE entrance_id = NEW.entrance_id
+  ));
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.complex_id_building_moved()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  PERFORM public.complex_id_sync_apartments(ARRAY(
+    SELECT a.apartment_id::bigint
+    FROM apartment a JOIN entrance e ON e.entrance_id = a.entrance_id
+    WHERE e.building_id = NEW.building_id
+  ));
+  PERFORM public.complex_id_sync_zones(ARRAY(
+    SELECT z.parking_zone_id::bigint
+    FROM parking_zone z JOIN entrance e ON e.entrance_id = z.entrance_id
+    WHERE e.building_id = NEW.building_id
+  ));
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS apartment_complex_id_move ON apartment;
+CREATE TRIGGER apartment_complex_id_move
+AFTER UPDATE OF entrance_id ON apartment
+FOR EACH ROW WHEN (NEW.entrance_id IS DISTINCT FROM OLD.entrance_id)
+EXECUTE FUNCTION public.complex_id_apartment_moved();
+
+DROP TRIGGER IF EXISTS parking_zone_complex_id_move ON parking_zone;
+CREATE TRIGGER parking_zone_complex_id_move
+AFTER UPDATE OF entrance_id ON parking_zone
+FOR EACH ROW WHEN (NEW.entrance_id IS DISTINCT FROM OLD.entrance_id)
+EXECUTE FUNCTION public.complex_id_parking_zone_moved();
+
+DROP TRIGGER IF EXISTS entrance_complex_id_move ON entrance;
+CREATE TRIGGER entrance_complex_id_move
+AFTER UPDATE OF building_id ON entrance
+FOR EACH ROW WHEN (NEW.building_id IS DISTINCT FROM OLD.building_id)
+EXECUTE FUNCTION public.complex_id_entrance_moved();
+
+DROP TRIGGER IF EXISTS building_complex_id_move ON building;
+CREATE TRIGGER building_complex_id_move
+AFTER UPDATE OF complex_id ON building
+FOR EACH ROW WHEN (NEW.complex_id IS DISTINCT FROM OLD.complex_id)
+EXECUTE FUNCTION public.complex_id_building_moved();
+
+ANALYZE resident, complexes_visitor, complexes_maintenancerequest, storage_room, parking_spot;
+"""
+
+
+def _down_sql():
+    statements = ["""
+DROP TRIGGER IF EXISTS apartment_complex_id_move ON apartment;
+DROP TRIGGER IF EXISTS parking_zone_complex_id_move ON parking_zone;
+DROP TRIGGER IF EXISTS entrance_complex_id_move ON entrance;
+DROP TRIGGER IF EXISTS building_complex_id_move ON building;
+DROP FUNCTION IF EXISTS public.complex_id_apartment_moved();
+DROP FUNCTION IF EXISTS public.complex_id_parking_zone_moved();
+DROP FUNCTION IF EXISTS public.complex_id_entrance_moved();
+DROP FUNCTION IF EXISTS public.complex_id_building_moved();
+DROP FUNCTION IF EXISTS public.complex_id_sync_apartments(bigint[]);
+DROP FUNCTION IF EXISTS public.complex_id_sync_zones(bigint[]);
+"""]
+    for table, _, _, _ in LEAF_TABLES:
+        statements.append(f"""
+DROP TRIGGER IF EXISTS {table}_complex_id_ins ON {table};
+DROP TRIGGER IF EXISTS {table}_complex_id_upd ON {table};
+DROP FUNCTION IF EXISTS public.{table}_set_complex_id();
+DROP INDEX IF EXISTS {table}_complex_idx;
+ALTER TABLE {table} DROP COLUMN IF EXISTS complex_id;
+""")
+    return ''.join(statements)
+
+
+SQL_DOWN = _down_sql()
+
+
+def _complex_field():
+    return models.ForeignKey(
+        blank=True,
+        db_constraint=False,
+        editable=False,
+        null=True,
+        on_delete=django.db.models.deletion.DO_NOTHING,
+        related_name='+',
+        to='complexes.residentialcomplex',
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complexes', '0016_hierarchy_indexes'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(SQL_UP, SQL_DOWN),
+            ],
+            state_operations=[
+                migrations.AddField(model_name=model_name, name='complex', field=_complex_field())
+                for model_name in ('resident', 'visitor', 'maintenancerequest', 'storageroom', 'parkingspot')
+            ],
+        ),
+    ]
@@ -0,0 +1,123 @@
+from django.db import migrations
+
+
+# (table, text columns, phone/contact column or None).
+SEARCH_SOURCES = [
+    ('residential_complex', ('name', 'address'), None),
+    ('owner', ('name',), 'phone'),
+    ('resident', ('fullname',), 'contact'),
+    ('staff', ('fullname',), 'contact'),
+    ('complexes_visitor', ('fullname',), None),
+]
+
+# Typo-tolerant lookups, created only where pg_trgm can be installed.
+TRIGRAM_INDEXES = [
+    ('residential_complex', 'name'),
+    ('residential_complex', 'address'),
+    ('owner', 'name'),
+    ('owner', 'phone'),
+    ('resident', 'fullname'),
+    ('resident', 'contact'),
+    ('staff', 'fullname'),
+    ('staff', 'contact'),
+    ('complexes_visitor', 'fullname'),
+]
+
+
+SEARCH_FUNCTION_SQL = """
+-- 'simple' config: names are not stemmed, every word is a lexeme.
+-- Phone numbers are also indexed as bare digits and in the national
+-- 10-digit form, so "+38 (050) 123-45-67" is found by "0501234567".
+CREATE OR REPLACE FUNCTION public.search_vector(p_text text, p_phone text DEFAULT NULL)
+RETURNS tsvector
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT to_tsvector('simple', concat_ws(' ', p_text, p_phone))
+      || CASE
+           WHEN length(digits) >= 5 THEN array_to_tsvector(ARRAY[digits, right(digits, 10)])
+           ELSE ''::tsvector
+         END
+  FROM (SELECT regexp_replace(coalesce(p_phone, ''), '[^0-9]', '', 'g') AS digits) AS phone;
+$$;
+"""
+
+
+def _vector_expression(prefix, text_columns, phone_column):
+    text = ', '.join(f'{prefix}{column}' for column in text_columns)
+    if len(text_columns) > 1:
+        text = f"concat_ws(' ', {text})"
+    phone = f'{prefix}{phone_column}' if phone_column else 'NULL'
+    return f'public.search_vector({text}, {phone})'
+
+
+def _up_sql():
+    statements = [SEARCH_FUNCTION_SQL]
+    for table, text_columns, phone_column in SEARCH_SOURCES:
+        watched = ', '.join(text_columns + ((phone_column,) if phone_column else ()))
+        statements.append(f"""
+ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector;
+UPDATE {table} SET search_vector = {_vector_expression('', text_columns, phone_column)};
+CREATE INDEX IF NOT EXISTS {table}_search_idx ON {table} USING gin (search_vector);
+
+CREATE OR REPLACE FUNCTION public.{table}_set_search_vector()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  NEW.search_vector := {_vector_expression('NEW.', text_columns, phone_column)};
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS {table}_search_vector ON {table};
+CREATE TRIGGER {table}_search_vector
+BEFORE INSERT OR UPDATE OF {watched}, search_vector ON {table}
+FOR EACH ROW EXECUTE FUNCTION public.{table}_set_search_vector();
+""")
+
+    trigram = ''.join(
+        f"""
+    CREATE INDEX IF NOT EXISTS {table}_{column}_trgm_idx ON {table} USING gin ({column} gin_trgm_ops);"""
+        for table, column in TRIGRAM_INDEXES
+    )
+    statements.append(f"""
+DO $trgm$
+BEGIN
+  IF EXISTS (SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm') THEN
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;{trigram}
+  END IF;
+END
+$trgm$;
+
+ANALYZE residential_complex, owner, resident, staff, complexes_visitor;
+""")
+    return ''.join(statements)
+
+
+def _down_sql():
+    statements = [
+        f'DROP INDEX IF EXISTS {table}_{column}_trgm_idx;\n'
+        for table, column in TRIGRAM_INDEXES
+    ]
+    for table, _, _ in SEARCH_SOURCES:
+        statements.append(f"""
+DROP TRIGGER IF EXISTS {table}_search_vector ON {table};
+DROP FUNCTION IF EXISTS public.{table}_set_search_vector();
+DROP INDEX IF EXISTS {table}_search_idx;
+ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector;
+""")
+    statements.append('DROP FUNCTION IF EXISTS public.search_vector(text, text);\n')
+    return ''.join(statements)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('complexes', '0017_denormalized_complex_id'),
+    ]
+
+    # search_vector не відображається на моделі: його читає лише complexes.search
+    operations = [
+        migrations.RunSQL(_up_sql(), _down_sql()),
+    ]
@@ -0,0 +1,38 @@
+from django.db import migrations
+
+
+# Indexes behind complexes.lookup_views.form_lookup (autocomplete in forms).
+# name__istartswith compiles to UPPER(name::text) LIKE UPPER('q%'); an
+# expression index with text_pattern_ops lets that prefix match be an index
+# range scan under any collation. The complex-scoped variant serves complex
+# admins, the plain one the super-admin lookup across all complexes.
+# Apartments are looked up by their number inside a complex.
+LOOKUP_INDEXES = [
+    ('owner_complex_upper_name_idx', 'owner', '(complex_id, upper(name) text_pattern_ops)'),
+    ('owner_upper_name_idx', 'owner', '(upper(name) text_pattern_ops)'),
+    ('apartment_number_idx', 'apartment', '(number)'),
+]
+
+
+def _operations():
+    operations = [
+        migrations.RunSQL(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {columns};',
+            f'DROP INDEX CONCURRENTLY IF EXISTS {name};',
+        )
+        for name, table, columns in LOOKUP_INDEXES
+    ]
+    operations.append(migrations.RunSQL('ANALYZE owner, apartment;', migrations.RunSQL.noop))
+    return operations
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('complexes', '0018_search_vectors'),
+    ]
+
+    operations = _operations()
@@ -1,8 +1,9 @@
-from urllib.parse import quote
-
 from django.conf import settings
-from django.core import signing
 from django.db import models
+from django.urls import reverse
+from django.utils import timezone
+
+from .qr_tokens import issue_visitor_token, read_visitor_token
 
 class ResidentialComplex(models.Model):
     complex_id = models.AutoField(primary_key=True)
@@ -125,6 +126,12 @@ class Resident(models.Model):
         null=True,
         blank=True,
     )
+    # Денормалізований ЖК для фільтрів списків одним індексом; значення
+    # виставляють тригери БД (міграція 0017), тому у формах поле не редагується.
+    complex = models.ForeignKey(
+        ResidentialComplex, on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, editable=False, related_name='+'
+    )
 
     class Meta:
         db_table = 'resident'
@@ -192,6 +199,12 @@ class ParkingSpot(models.Model):
         db_column='owner_id',
         related_name='parking_spots'
     )
+    # Денормалізований ЖК для фільтрів списків одним індексом; значення
+    # виставляють тригери БД (міграція 0017), тому у формах поле не редагується.
+    complex = models.ForeignKey(
+        ResidentialComplex, on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, editable=False, related_name='+'
+    )
 
     class Meta:
         db_table = 'parking_spot'
@@ -219,6 +232,12 @@ class StorageRoom(models.Model):
         related_name='storage_rooms',
         db_column='apartment_id',
     )
+    # Денормалізований ЖК для фільтрів списків одним індексом; значення
+    # виставляють тригери БД (міграція 0017), тому у формах поле не редагується.
+    complex = models.ForeignKey(
+        ResidentialComplex, on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, editable=False, related_name='+'
+    )
 
     class Meta:
         db_table = 'storage_room'
@@ -247,26 +266,58 @@ class Visitor(models.Model):
         null=True, blank=True,
         related_name='added_visitors'
     )
+    # Денормалізований ЖК для фільтрів списків одним індексом; значення
+    # виставляють тригери БД (міграція 0017), тому у формах поле не редагується.
+    complex = models.ForeignKey(
+        ResidentialComplex, on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, editable=False, related_name='+'
+    )
 
     class Meta:
         db_table = 'complexes_visitor'
         managed = False
 
     QR_SIGNING_SALT = 'complexes.visitor.qr'
-    QR_IMAGE_BASE_URL = 'https://api.qrserver.com/v1/create-qr-code/'
 
     def get_qr_token(self):
-        if self.pk is None:
-            raise ValueError('Visitor must be saved before generating a QR token.')
-        return signing.dumps(self.pk, salt=self.QR_SIGNING_SALT)
+        return issue_visitor_token(self)
 
-    def get_qr_image_url(self, size=260):
-        token = quote(self.get_qr_token(), safe='')
-        return f'{self.QR_IMAGE_BASE_URL}?size={size}x{size}&data={token}'
+    def get_qr_image_url(self, fmt='png'):
+        return reverse('visitor_qr_image', args=[self.pk, fmt])
 
     @classmethod
     def parse_qr_token(cls, token):
-        return signing.loads(token, salt=cls.QR_SIGNING_SALT)
+        return read_visitor_token(token).visitor_id
+
+
+class VisitorEntry(models.Model):
+    """
+    Факт проходу відвідувача (успішна перевірка QR).
+    Таблиця лише для вставок, розбита по місяцях; пишеться пакетами
+    через complexes.entry_log.
+    """
+    id = models.BigAutoField(primary_key=True)
+    visitor = models.ForeignKey(
+        Visitor, on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, related_name='entries'
+    )
+    complex = models.ForeignKey(
+        ResidentialComplex, on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, related_name='visitor_entries'
+    )
+    validated_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, related_name='+'
+    )
+    entered_at = models.DateTimeField(default=timezone.now)
+    offline = models.BooleanField(default=False)
+
+    class Meta:
+        db_table = 'visitor_entry'
+        managed = False
+
+    def __str__(self):
+        return f'Прохід {self.visitor_id} о {self.entered_at:%Y-%m-%d %H:%M}'
 
 class MaintenanceRequest(models.Model):
     STATUS_CHOICES = [
@@ -277,6 +328,12 @@ class MaintenanceRequest(models.Model):
 
     owner = models.ForeignKey(Owner, on_delete=models.CASCADE, related_name='tickets')
     apartment = models.ForeignKey(Apartment, on_delete=models.CASCADE, related_name='tickets')
+    # Денормалізований ЖК для фільтрів списків одним індексом; значення
+    # виставляють тригери БД (міграція 0017), тому у формах поле не редагується.
+    complex = models.ForeignKey(
+        ResidentialComplex, on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, editable=False, related_name='+'
+    )
     description = models.TextField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='new')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -285,3 +342,35 @@ class MaintenanceRequest(models.Model):
     class Meta:
         db_table = 'complexes_maintenancerequest'
         managed = False
+
+
+class ComplexStats(models.Model):
+    """
+    Матеріалізовані лічильники по ЖК (таблиця complex_stats).
+    Підтримуються тригерами з міграції 0012, тому тільки читаються.
+    """
+    complex = models.OneToOneField(
+        ResidentialComplex,
+        on_delete=models.DO_NOTHING,
+        db_column='complex_id',
+        primary_key=True,
+        related_name='stats',
+    )
+    buildings_count = models.IntegerField(default=0)
+    entrances_count = models.IntegerField(default=0)
+    apartments_count = models.IntegerField(default=0)
+    owned_apartments_count = models.IntegerField(default=0)
+    residents_count = models.IntegerField(default=0)
+    storage_rooms_count = models.IntegerField(default=0)
+    free_storage_count = models.IntegerField(default=0)
+    parking_spots_count = models.IntegerField(default=0)
+    parking_status_counts = models.JSONField(default=dict)
+    open_tickets_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'complex_stats'
+        managed = False
+
+    def __str__(self):
+        return f'Статистика: {self.complex_id}'
@@ -0,0 +1,169 @@
+from datetime import date, datetime
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q
+
+
+CURSOR_SALT = 'complexes.keyset.cursor'
+DIRECTION_NEXT = 'n'
+DIRECTION_PREVIOUS = 'p'
+
+
+class KeysetPage:
+    """
+    Одна сторінка keyset-пагінації.
+    Ітерується як список об'єктів, тож шаблони можуть працювати з нею напряму.
+    """
+
+    def __init__(self, object_list, has_next, has_previous, next_url=None, previous_url=None):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_url = next_url
+        self.previous_url = previous_url
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+def _ordering_keys(model, ordering):
+    """
+    ('name',) -> [('name', False), ('pk', False)]
+    Первинний ключ додається як стабільний tie-breaker у тому ж напрямку,
+    що й останнє поле сортування.
+    """
+    keys = []
+    for item in ordering:
+        descending = item.startswith('-')
+        keys.append((item.lstrip('-'), descending))
+    pk_name = model._meta.pk.name
+    if not keys or keys[-1][0] not in ('pk', pk_name):
+        keys.append((pk_name, keys[-1][1] if keys else False))
+    return keys
+
+
+def _model_field(model, name):
+    if name == 'pk':
+        return model._meta.pk
+    return model._meta.get_field(name)
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _encode_cursor(direction, values):
+    return signing.dumps(
+        {'d': direction, 'v': [_encode_value(v) for v in values]},
+        salt=CURSOR_SALT,
+        compress=True,
+    )
+
+
+def _decode_cursor(model, keys, cursor):
+    try:
+        payload = signing.loads(cursor, salt=CURSOR_SALT)
+        direction = payload['d']
+        raw_values = payload['v']
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return None, None
+    if direction not in (DIRECTION_NEXT, DIRECTION_PREVIOUS) or len(raw_values) != len(keys):
+        return None, None
+    try:
+        values = [
+            _model_field(model, name).to_python(value)
+            for (name, _), value in zip(keys, raw_values)
+        ]
+    except Exception:
+        return None, None
+    return direction, values
+
+
+def _seek_filter(keys, values, backwards):
+    """
+    (a > va) OR (a = va AND b > vb) OR ... — рядки строго після курсора.
+    Для руху назад порівняння інвертуються.
+    """
+    condition = Q()
+    for index, (name, descending) in enumerate(keys):
+        lookup = 'lt' if descending != backwards else 'gt'
+        clause = Q(**{f'{name}__{lookup}': values[index]})
+        for prev_index in range(index):
+            clause &= Q(**{keys[prev_index][0]: values[prev_index]})
+        condition |= clause
+    return condition
+
+
+def _order_by(keys, backwards):
+    return [
+        f"{'-' if descending != backwards else ''}{name}"
+        for name, descending in keys
+    ]
+
+
+def _row_values(obj, model, keys):
+    return [getattr(obj, _model_field(model, name).attname) for name, _ in keys]
+
+
+def _page_url(request, param, cursor):
+    query = request.GET.copy()
+    query[param] = cursor
+    return f"{request.path}?{query.urlencode()}"
+
+
+def paginate_keyset(request, queryset, ordering, param='cursor', page_size=None):
+    """
+    Keyset (cursor) пагінація queryset за полями ordering + pk.
+    Вартість запиту не залежить від номера сторінки: замість OFFSET
+    використовується умова WHERE по значеннях останнього рядка.
+    """
+    if page_size is None:
+        page_size = getattr(settings, 'LIST_PAGE_SIZE', 50)
+    model = queryset.model
+    keys = _ordering_keys(model, ordering)
+
+    direction, values = None, None
+    cursor = request.GET.get(param)
+    if cursor:
+        direction, values = _decode_cursor(model, keys, cursor)
+
+    backwards = direction == DIRECTION_PREVIOUS
+    queryset = queryset.order_by(*_order_by(keys, backwards))
+    if values is not None:
+        queryset = queryset.filter(_seek_filter(keys, values, backwards))
+
+    rows = list(queryset[:page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+
+    if backwards:
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, values is not None
+
+    next_url = previous_url = None
+    if rows and has_next:
+        next_url = _page_url(
+            request, param, _encode_cursor(DIRECTION_NEXT, _row_values(rows[-1], model, keys))
+        )
+    if rows and has_previous:
+        previous_url = _page_url(
+            request, param, _encode_cursor(DIRECTION_PREVIOUS, _row_values(rows[0], model, keys))
+        )
+
+    return KeysetPage(rows, has_next, has_previous, next_url, previous_url)
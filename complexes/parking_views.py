@@ -3,6 +3,8 @@ from residence_manager.responses import forbidden_response
 
 from .models import ParkingZone, ParkingSpot, Entrance, ResidentialComplex
 from .forms import ParkingZoneForm, ParkingSpotForm
+from .pagination import paginate_keyset
+from .widgets import scope_autocomplete
 from .owner_compat import owner_has_complex_column, owner_matches_complex, owner_queryset, owners_for_complex
 from accounts.utils import is_superadmin, is_complex_admin, get_complex_for_admin
 
@@ -54,7 +56,7 @@ def parking_list(request):
                 cid = None
             if cid is not None:
                 zones = zones.filter(entrance__building__complex_id=cid)
-                spots = spots.filter(parking_zone__entrance__building__complex_id=cid)
+                spots = spots.filter(complex_id=cid)
 
                 if zone_form is not None:
                     zone_form.fields['entrance'].queryset = Entrance.objects.filter(
@@ -62,6 +64,7 @@ def parking_list(request):
                     ).select_related(
                         'building__complex'
                     ).order_by('building__number', 'number')
+                    scope_autocomplete(zone_form.fields['entrance'], cid)
                 if spot_form is not None:
                     spot_form.fields['parking_zone'].queryset = ParkingZone.objects.filter(
                         entrance__building__complex_id=cid
@@ -69,6 +72,8 @@ def parking_list(request):
                         'entrance__building__complex'
                     ).order_by('parking_zone_id')
                     spot_form.fields['owner'].queryset = owners_for_complex(cid)
+                    scope_autocomplete(spot_form.fields['parking_zone'], cid)
+                    scope_autocomplete(spot_form.fields['owner'], cid)
 
     elif is_complex_admin(request.user):
         complex_obj = get_complex_for_admin(request.user)
@@ -88,7 +93,7 @@ def parking_list(request):
             'parking_zone__entrance__building__complex',
             'owner',
         ).filter(
-            parking_zone__entrance__building__complex=complex_obj
+            complex=complex_obj
         )
         if not owner_complex_supported:
             spots = spots.defer('owner__complex')
@@ -116,6 +121,7 @@ def parking_list(request):
         ).order_by('building__number', 'number')
         if zone_form is not None:
             zone_form.fields['entrance'].queryset = entrances_qs
+            scope_autocomplete(zone_form.fields['entrance'], complex_obj.pk)
 
         if request.method == 'POST':
             if request.POST.get('add_zone') and zone_form.is_valid():
@@ -128,8 +134,8 @@ def parking_list(request):
         return forbidden_response(request)
 
     return render(request, 'complexes/parking_list.html', {
-        'zones': zones,
-        'spots': spots,
+        'zones': paginate_keyset(request, zones, ('parking_zone_id',), param='zones_cursor'),
+        'spots': paginate_keyset(request, spots, ('number',), param='spots_cursor'),
         'zone_form': zone_form,
         'spot_form': spot_form,
         'complexes': complexes,
@@ -163,6 +169,7 @@ def parking_zone_edit(request, pk):
             form.fields['entrance'].queryset = Entrance.objects.filter(
                 building__complex=complex_obj
             ).order_by('building__number', 'number')
+            scope_autocomplete(form.fields['entrance'], complex_obj.pk)
         if form.is_valid():
             form.save()
             return redirect('parking_list')
@@ -172,6 +179,7 @@ def parking_zone_edit(request, pk):
             form.fields['entrance'].queryset = Entrance.objects.filter(
                 building__complex=complex_obj
             ).order_by('building__number', 'number')
+            scope_autocomplete(form.fields['entrance'], complex_obj.pk)
     return render(request, 'complexes/simple_form.html', {
         'title': f"Редагувати паркінг-зону #{zone.parking_zone_id}",
         'form': form,
@@ -0,0 +1,88 @@
+import re
+from datetime import date
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+
+# Таблиці, розбиті по місяцях:
+# (таблиця, колонка-ключ партиціювання, налаштування строку зберігання в місяцях).
+PARTITIONED_TABLES = (
+    ('visitor_entry', 'entered_at', 'VISITOR_ENTRY_RETENTION_MONTHS'),
+    ('complexes_visitor', 'created_at', 'VISITOR_RETENTION_MONTHS'),
+)
+
+
+def add_months(day, months):
+    month_index = day.year * 12 + day.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _current_month(today=None):
+    return (today or timezone.now().date()).replace(day=1)
+
+
+def ensure_month_partitions(table, column, months_ahead=None, today=None):
+    """
+    Створює партиції від поточного місяця на months_ahead місяців уперед
+    (функція ensure_month_partition з міграції 0014). Повертає їх імена.
+    """
+    if months_ahead is None:
+        months_ahead = getattr(settings, 'PARTITION_MONTHS_AHEAD', 2)
+    first = _current_month(today)
+    names = []
+    with connection.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            cursor.execute(
+                'SELECT public.ensure_month_partition(%s, %s, %s)',
+                [table, column, add_months(first, offset)],
+            )
+            names.append(cursor.fetchone()[0])
+    return names
+
+
+def month_partitions(table):
+    """[(ім'я, перший день місяця)] для партицій <table>_pYYYYMM, за зростанням."""
+    pattern = re.compile(rf'^{re.escape(table)}_p(\d{{4}})(\d{{2}})$')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = %s::regclass
+            """,
+            [table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    result = []
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            result.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(result, key=lambda item: item[1])
+
+
+def expire_month_partitions(table, retention_months, drop=False, today=None):
+    """
+    Від'єднує (або видаляє, якщо drop) партиції, старші за retention_months
+    повних місяців до поточного. retention_months <= 0 — зберігати все.
+    Від'єднана партиція лишається окремою таблицею для архіву.
+    """
+    if not retention_months or retention_months <= 0:
+        return []
+    oldest_kept = add_months(_current_month(today), -retention_months)
+    expired = [name for name, month in month_partitions(table) if month < oldest_kept]
+
+    with connection.cursor() as cursor:
+        for name in expired:
+            if drop:
+                cursor.execute(f'DROP TABLE {connection.ops.quote_name(name)}')
+            else:
+                cursor.execute(
+                    f'ALTER TABLE {connection.ops.quote_name(table)} '
+                    f'DETACH PARTITION {connection.ops.quote_name(name)}'
+                )
+    return expired
@@ -3,8 +3,16 @@ from django.shortcuts import get_object_or_404, redirect, render
 
 from accounts.utils import get_complex_for_admin, is_complex_admin, is_superadmin
 from .access_views import _has_guard_access
+from .exports import (
+    OWNER_EXPORT_COLUMNS,
+    RESIDENT_EXPORT_COLUMNS,
+    requested_export_format,
+    stream_export,
+)
 from .forms import OwnerForm, ResidentForm, StaffForm
 from .models import Apartment, Owner, Resident, ResidentialComplex, Staff
+from .pagination import paginate_keyset
+from .widgets import scope_autocomplete
 
 
 def owners_list(request):
@@ -55,11 +63,15 @@ def owners_list(request):
     else:
         return forbidden_response(request)
 
+    export_format = requested_export_format(request)
+    if export_format:
+        return stream_export(owners, OWNER_EXPORT_COLUMNS, "owners", export_format)
+
     return render(
         request,
         "complexes/owners_list.html",
         {
-            "owners": owners,
+            "owners": paginate_keyset(request, owners, ("name",)),
             "form": form,
             "complexes": complexes,
             "selected_complex": int(selected_complex) if selected_complex else None,
@@ -93,7 +105,7 @@ def residents_list(request):
             try:
                 cid = int(selected_complex)
                 residents_qs = residents_qs.filter(
-                    apartment__entrance__building__complex__complex_id=cid
+                    complex_id=cid
                 )
             except (ValueError, TypeError):
                 pass
@@ -113,6 +125,7 @@ def residents_list(request):
                     )
                 )
                 form.fields["apartment"].queryset = apartments_qs
+                scope_autocomplete(form.fields["apartment"], cid)
             except Exception:
                 pass
 
@@ -129,18 +142,17 @@ def residents_list(request):
 
         residents_qs = (
             Resident.objects.select_related("apartment__entrance__building__complex")
-            .filter(apartment__entrance__building__complex=complex_obj)
+            .filter(complex=complex_obj)
             .order_by("fullname")
         )
         selected_complex = complex_obj.complex_id
 
     elif _has_guard_access(request.user):
-        staff = request.user.staff_account.staff
-        complex_obj = staff.complex
+        complex_obj = request.principal.staff_complex
         form = None
         residents_qs = (
             Resident.objects.select_related("apartment__entrance__building__complex")
-            .filter(apartment__entrance__building__complex=complex_obj)
+            .filter(complex=complex_obj)
             .order_by("fullname")
         )
         selected_complex = complex_obj.complex_id
@@ -148,11 +160,15 @@ def residents_list(request):
     else:
         return forbidden_response(request)
 
+    export_format = requested_export_format(request)
+    if export_format:
+        return stream_export(residents_qs, RESIDENT_EXPORT_COLUMNS, "residents", export_format)
+
     return render(
         request,
         "complexes/residents_list.html",
         {
-            "residents": residents_qs,
+            "residents": paginate_keyset(request, residents_qs, ("fullname",)),
             "form": form,
             "complexes": complexes,
             "selected_complex": int(selected_complex) if selected_complex else None,
@@ -192,7 +208,7 @@ def staff_list(request):
         request,
         "complexes/staff_list.html",
         {
-            "staff_list": staff,
+            "staff_list": paginate_keyset(request, staff, ("fullname",)),
             "form": form,
         },
     )
@@ -213,17 +229,16 @@ def resident_edit(request, pk):
         resident = get_object_or_404(
             residents_qs,
             pk=pk,
-            apartment__entrance__building__complex_id=complex_obj.complex_id,
+            complex_id=complex_obj.complex_id,
         )
         form_kwargs = {"complex_obj": complex_obj}
     elif _has_guard_access(request.user):
-        staff = request.user.staff_account.staff
         resident = get_object_or_404(
             residents_qs,
             pk=pk,
-            apartment__entrance__building__complex_id=staff.complex_id,
+            complex_id=request.principal.staff_complex_id,
         )
-        form_kwargs = {"complex_obj": staff.complex}
+        form_kwargs = {"complex_obj": request.principal.staff_complex}
     else:
         return forbidden_response(request)
 
@@ -259,14 +274,13 @@ def resident_delete(request, pk):
         resident = get_object_or_404(
             residents_qs,
             pk=pk,
-            apartment__entrance__building__complex_id=complex_obj.complex_id,
+            complex_id=complex_obj.complex_id,
         )
     elif _has_guard_access(request.user):
-        staff = request.user.staff_account.staff
         resident = get_object_or_404(
             residents_qs,
             pk=pk,
-            apartment__entrance__building__complex_id=staff.complex_id,
+            complex_id=request.principal.staff_complex_id,
         )
     else:
         return forbidden_response(request)
@@ -0,0 +1,401 @@
+"""
+Мінімальний QR-енкодер (ISO/IEC 18004) на чистому Python.
+
+Підтримує байтовий режим, рівні корекції L/M/Q/H і версії 1–40 — цього
+досить для підписаних токенів відвідувачів. Результат можна віддати як
+PNG (1-бітний, через zlib) або SVG.
+"""
+import struct
+import zlib
+
+
+ECC_LOW, ECC_MEDIUM, ECC_QUARTILE, ECC_HIGH = range(4)
+_ECC_FORMAT_BITS = (1, 0, 3, 2)
+
+_ECC_CODEWORDS_PER_BLOCK = (
+    (-1, 7, 10, 15, 20, 26, 18, 20, 24, 30, 18, 20, 24, 26, 30, 22, 24, 28, 30, 28, 28,
+     28, 28, 30, 30, 26, 28, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30),
+    (-1, 10, 16, 26, 18, 24, 16, 18, 22, 22, 26, 30, 22, 22, 24, 24, 28, 28, 26, 26, 26,
+     26, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28),
+    (-1, 13, 22, 18, 26, 18, 24, 18, 22, 20, 24, 28, 26, 24, 20, 30, 24, 28, 28, 26, 30,
+     28, 30, 30, 30, 30, 28, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30),
+    (-1, 17, 28, 22, 16, 22, 28, 26, 26, 24, 28, 24, 28, 22, 24, 24, 30, 28, 28, 26, 28,
+     30, 24, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30),
+)
+
+_NUM_ERROR_CORRECTION_BLOCKS = (
+    (-1, 1, 1, 1, 1, 1, 2, 2, 2, 2, 4, 4, 4, 4, 4, 6, 6, 6, 6, 7, 8,
+     8, 9, 9, 10, 12, 12, 12, 13, 14, 15, 16, 17, 18, 19, 19, 20, 21, 22, 24, 25),
+    (-1, 1, 1, 1, 2, 2, 4, 4, 4, 5, 5, 5, 8, 9, 9, 10, 10, 11, 13, 14, 16,
+     17, 17, 18, 20, 21, 23, 25, 26, 28, 29, 31, 33, 35, 37, 38, 40, 43, 45, 47, 49),
+    (-1, 1, 1, 2, 2, 4, 4, 6, 6, 8, 8, 8, 10, 12, 16, 12, 17, 16, 18, 21, 20,
+     23, 23, 25, 27, 29, 34, 34, 35, 38, 40, 43, 45, 48, 51, 53, 56, 59, 62, 65, 68),
+    (-1, 1, 1, 2, 4, 4, 4, 5, 6, 8, 8, 11, 11, 16, 16, 18, 16, 19, 21, 25, 25,
+     25, 34, 30, 32, 35, 37, 40, 42, 45, 48, 51, 54, 57, 60, 63, 66, 70, 74, 77, 81),
+)
+
+_PENALTY_N1, _PENALTY_N2, _PENALTY_N3, _PENALTY_N4 = 3, 3, 40, 10
+
+_MASKS = (
+    lambda x, y: (x + y) % 2 == 0,
+    lambda x, y: y % 2 == 0,
+    lambda x, y: x % 3 == 0,
+    lambda x, y: (x + y) % 3 == 0,
+    lambda x, y: (x // 3 + y // 2) % 2 == 0,
+    lambda x, y: x * y % 2 + x * y % 3 == 0,
+    lambda x, y: (x * y % 2 + x * y % 3) % 2 == 0,
+    lambda x, y: ((x + y) % 2 + x * y % 3) % 2 == 0,
+)
+
+
+class QrCodeError(ValueError):
+    """Дані не вміщаються в жодну версію QR-коду."""
+
+
+# ---------- Reed–Solomon над GF(2^8) ----------
+
+def _gf_multiply(x, y):
+    z = 0
+    for i in reversed(range(8)):
+        z = (z << 1) ^ ((z >> 7) * 0x11D)
+        z ^= ((y >> i) & 1) * x
+    return z
+
+
+def _rs_divisor(degree):
+    result = [0] * (degree - 1) + [1]
+    root = 1
+    for _ in range(degree):
+        for j in range(degree):
+            result[j] = _gf_multiply(result[j], root)
+            if j + 1 < degree:
+                result[j] ^= result[j + 1]
+        root = _gf_multiply(root, 0x02)
+    return result
+
+
+def _rs_remainder(data, divisor):
+    result = [0] * len(divisor)
+    for byte in data:
+        factor = byte ^ result.pop(0)
+        result.append(0)
+        for i, coef in enumerate(divisor):
+            result[i] ^= _gf_multiply(coef, factor)
+    return result
+
+
+# ---------- розміри ----------
+
+def _num_raw_data_modules(version):
+    result = (16 * version + 128) * version + 64
+    if version >= 2:
+        num_align = version // 7 + 2
+        result -= (25 * num_align - 10) * num_align - 55
+        if version >= 7:
+            result -= 36
+    return result
+
+
+def _num_data_codewords(version, ecl):
+    return (
+        _num_raw_data_modules(version) // 8
+        - _ECC_CODEWORDS_PER_BLOCK[ecl][version] * _NUM_ERROR_CORRECTION_BLOCKS[ecl][version]
+    )
+
+
+def _alignment_positions(version):
+    if version == 1:
+        return []
+    num_align = version // 7 + 2
+    step = (version * 8 + num_align * 3 + 5) // (num_align * 4 - 4) * 2
+    positions = [version * 4 + 17 - 7 - i * step for i in range(num_align - 1)]
+    return [6] + list(reversed(positions))
+
+
+def _byte_count_bits(version):
+    return 8 if version <= 9 else 16
+
+
+# ---------- кодування даних ----------
+
+def _encode_segments(data, version, ecl):
+    bits = []
+
+    def append(value, length):
+        bits.extend((value >> i) & 1 for i in reversed(range(length)))
+
+    append(0b0100, 4)
+    append(len(data), _byte_count_bits(version))
+    for byte in data:
+        append(byte, 8)
+
+    capacity = _num_data_codewords(version, ecl) * 8
+    bits.extend([0] * min(4, capacity - len(bits)))
+    bits.extend([0] * (-len(bits) % 8))
+    codewords = [
+        int(''.join(map(str, bits[i:i + 8])), 2) for i in range(0, len(bits), 8)
+    ]
+    pad = 0xEC
+    while len(codewords) < capacity // 8:
+        codewords.append(pad)
+        pad ^= 0xEC ^ 0x11
+    return codewords
+
+
+def _add_ecc_and_interleave(data, version, ecl):
+    num_blocks = _NUM_ERROR_CORRECTION_BLOCKS[ecl][version]
+    block_ecc_len = _ECC_CODEWORDS_PER_BLOCK[ecl][version]
+    raw_codewords = _num_raw_data_modules(version) // 8
+    num_short_blocks = num_blocks - raw_codewords % num_blocks
+    short_block_len = raw_codewords // num_blocks
+
+    divisor = _rs_divisor(block_ecc_len)
+    blocks = []
+    k = 0
+    for i in range(num_blocks):
+        length = short_block_len - block_ecc_len + (0 if i < num_short_blocks else 1)
+        block = data[k:k + length]
+        k += length
+        ecc = _rs_remainder(block, divisor)
+        if i < num_short_blocks:
+            block.append(0)
+        blocks.append(block + ecc)
+
+    result = []
+    for i in range(len(blocks[0])):
+        for j, block in enumerate(blocks):
+            if i != short_block_len - block_ecc_len or j >= num_short_blocks:
+                result.append(block[i])
+    return result
+
+
+# ---------- матриця ----------
+
+class QrCode:
+    """Готова матриця модулів: modules[y][x] == True — темний модуль."""
+
+    def __init__(self, data, ecl=ECC_MEDIUM):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.ecl = ecl
+        for version in range(1, 41):
+            needed = 4 + _byte_count_bits(version) + len(data) * 8
+            if needed <= _num_data_codewords(version, ecl) * 8:
+                break
+        else:
+            raise QrCodeError('Data too long for a QR code.')
+
+        self.version = version
+        self.size = version * 4 + 17
+        self.modules = [[False] * self.size for _ in range(self.size)]
+        self._is_function = [[False] * self.size for _ in range(self.size)]
+
+        self._draw_function_patterns()
+        codewords = _add_ecc_and_interleave(_encode_segments(data, version, ecl), version, ecl)
+        self._draw_codewords(codewords)
+
+        best_mask, best_penalty = 0, None
+        for mask in range(8):
+            self._apply_mask(mask)
+            self._draw_format_bits(mask)
+            penalty = self._penalty_score()
+            if best_penalty is None or penalty < best_penalty:
+                best_mask, best_penalty = mask, penalty
+            self._apply_mask(mask)
+        self.mask = best_mask
+        self._apply_mask(best_mask)
+        self._draw_format_bits(best_mask)
+        del self._is_function
+
+    def _set_function(self, x, y, dark):
+        self.modules[y][x] = dark
+        self._is_function[y][x] = True
+
+    def _draw_function_patterns(self):
+        size = self.size
+        for i in range(size):
+            self._set_function(6, i, i % 2 == 0)
+            self._set_function(i, 6, i % 2 == 0)
+
+        for cx, cy in ((3, 3), (size - 4, 3), (3, size - 4)):
+            for dy in range(-4, 5):
+                for dx in range(-4, 5):
+                    x, y = cx + dx, cy + dy
+                    if 0 <= x < size and 0 <= y < size:
+                        self._set_function(x, y, max(abs(dx), abs(dy)) not in (2, 4))
+
+        positions = _alignment_positions(self.version)
+        last = len(positions) - 1
+        for i, ax in enumerate(positions):
+            for j, ay in enumerate(positions):
+                if (i, j) in ((0, 0), (0, last), (last, 0)):
+                    continue
+                for dy in range(-2, 3):
+                    for dx in range(-2, 3):
+                        self._set_function(ax + dx, ay + dy, max(abs(dx), abs(dy)) != 1)
+
+        self._draw_format_bits(0)
+        self._draw_version()
+
+    def _draw_format_bits(self, mask):
+        data = _ECC_FORMAT_BITS[self.ecl] << 3 | mask
+        rem = data
+        for _ in range(10):
+            rem = (rem << 1) ^ ((rem >> 9) * 0x537)
+        bits = (data << 10 | rem) ^ 0x5412
+
+        def bit(i):
+            return (bits >> i) & 1 != 0
+
+        size = self.size
+        for i in range(6):
+            self._set_function(8, i, bit(i))
+        self._set_function(8, 7, bit(6))
+        self._set_function(8, 8, bit(7))
+        self._set_function(7, 8, bit(8))
+        for i in range(9, 15):
+            self._set_function(14 - i, 8, bit(i))
+
+        for i in range(8):
+            self._set_function(size - 1 - i, 8, bit(i))
+        for i in range(8, 15):
+            self._set_function(8, size - 15 + i, bit(i))
+        self._set_function(8, size - 8, True)
+
+    def _draw_version(self):
+        if self.version < 7:
+            return
+        rem = self.version
+        for _ in range(12):
+            rem = (rem << 1) ^ ((rem >> 11) * 0x1F25)
+        bits = self.version << 12 | rem
+        for i in range(18):
+            dark = (bits >> i) & 1 != 0
+            a = self.size - 11 + i % 3
+            b = i // 3
+            self._set_function(a, b, dark)
+            self._set_function(b, a, dark)
+
+    def _draw_codewords(self, codewords):
+        size = self.size
+        total_bits = len(codewords) * 8
+        i = 0
+        right = size - 1
+        while right >= 1:
+            if right == 6:
+                right = 5
+            for vert in range(size):
+                for j in range(2):
+                    x = right - j
+                    upward = ((right + 1) & 2) == 0
+                    y = size - 1 - vert if upward else vert
+                    if not self._is_function[y][x] and i < total_bits:
+                        self.modules[y][x] = (codewords[i >> 3] >> (7 - (i & 7))) & 1 != 0
+                        i += 1
+            right -= 2
+
+    def _apply_mask(self, mask):
+        test = _MASKS[mask]
+        for y in range(self.size):
+            row = self.modules[y]
+            function_row = self._is_function[y]
+            for x in range(self.size):
+                if not function_row[x] and test(x, y):
+                    row[x] = not row[x]
+
+    def _penalty_score(self):
+        size = self.size
+        modules = self.modules
+        columns = [[modules[y][x] for y in range(size)] for x in range(size)]
+        result = 0
+
+        finder_like = ((True, False, True, True, True, False, True, False, False, False, False),
+                       (False, False, False, False, True, False, True, True, True, False, True))
+        for line in list(modules) + columns:
+            run_color, run_length = None, 0
+            for dark in line:
+                if dark == run_color:
+                    run_length += 1
+                else:
+                    if run_length >= 5:
+                        result += _PENALTY_N1 + run_length - 5
+                    run_color, run_length = dark, 1
+            if run_length >= 5:
+                result += _PENALTY_N1 + run_length - 5
+
+            line = tuple(line)
+            for start in range(size - 10):
+                if line[start:start + 11] in finder_like:
+                    result += _PENALTY_N3
+
+        for y in range(size - 1):
+            for x in range(size - 1):
+                color = modules[y][x]
+                if color == modules[y][x + 1] == modules[y + 1][x] == modules[y + 1][x + 1]:
+                    result += _PENALTY_N2
+
+        dark = sum(sum(row) for row in modules)
+        total = size * size
+        k = (abs(dark * 20 - total * 10) + total - 1) // total - 1
+        result += k * _PENALTY_N4
+        return result
+
+
+# ---------- вивід ----------
+
+def _png_chunk(kind, data):
+    chunk = kind + data
+    return struct.pack('>I', len(data)) + chunk + struct.pack('>I', zlib.crc32(chunk) & 0xFFFFFFFF)
+
+
+def render_png(qr, scale=8, border=4):
+    """1-бітний чорно-білий PNG."""
+    size = (qr.size + border * 2) * scale
+    rows = []
+    light_row = None
+    for y in range(-border, qr.size + border):
+        if 0 <= y < qr.size:
+            modules = qr.modules[y]
+            bits = []
+            for x in range(-border, qr.size + border):
+                light = not (0 <= x < qr.size and modules[x])
+                bits.extend([light] * scale)
+        else:
+            if light_row is None:
+                light_row = [True] * size
+            bits = light_row
+
+        packed = bytearray(b'\x00')
+        for i in range(0, size, 8):
+            byte = 0
+            for bit in bits[i:i + 8]:
+                byte = (byte << 1) | bit
+            byte <<= 8 - len(bits[i:i + 8])
+            packed.append(byte)
+        rows.extend([bytes(packed)] * scale)
+
+    header = struct.pack('>IIBBBBB', size, size, 1, 0, 0, 0, 0)
+    return b''.join((
+        b'\x89PNG\r\n\x1a\n',
+        _png_chunk(b'IHDR', header),
+        _png_chunk(b'IDAT', zlib.compress(b''.join(rows), 9)),
+        _png_chunk(b'IEND', b''),
+    ))
+
+
+def render_svg(qr, border=4):
+    """SVG з одним path; масштабується браузером без втрат."""
+    size = qr.size + border * 2
+    parts = []
+    for y, row in enumerate(qr.modules):
+        for x, dark in enumerate(row):
+            if dark:
+                parts.append(f'M{x + border},{y + border}h1v1h-1z')
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" version="1.1" viewBox="0 0 {size} {size}" '
+        'shape-rendering="crispEdges">'
+        '<rect width="100%" height="100%" fill="#FFFFFF"/>'
+        f'<path d="{"".join(parts)}" fill="#000000"/>'
+        '</svg>\n'
+    ).encode('utf-8')
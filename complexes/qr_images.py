@@ -0,0 +1,37 @@
+import hashlib
+
+from django.conf import settings
+
+from .cache import cache_get, cache_set
+from .qr_encoder import QrCode, render_png, render_svg
+
+
+QR_IMAGE_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+QR_PNG_SCALE = 8
+
+# Змінюється, якщо змінюється вигляд зображення, — старі ETag стають недійсними.
+_RENDER_VERSION = '1'
+
+
+def qr_image_etag(token, fmt):
+    """Сильний ETag: залежить лише від токена та формату."""
+    digest = hashlib.sha256(f'{_RENDER_VERSION}:{fmt}:{token}'.encode('utf-8')).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def render_qr_image(token, fmt):
+    """
+    Байти PNG/SVG для токена. Кодування QR на чистому Python коштує
+    десятки мілісекунд, тому результат кешується за хешем токена.
+    """
+    key = 'complexes:qr-image:' + qr_image_etag(token, fmt).strip('"')
+    alias = getattr(settings, 'VISITOR_QR_IMAGE_CACHE_ALIAS', 'default')
+    body = cache_get('qr-image', key, alias)
+    if body is None:
+        qr = QrCode(token)
+        body = render_png(qr, scale=QR_PNG_SCALE) if fmt == 'png' else render_svg(qr)
+        cache_set('qr-image', key, body, getattr(settings, 'VISITOR_QR_IMAGE_CACHE_TTL', 24 * 3600), alias)
+    return body
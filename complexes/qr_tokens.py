@@ -0,0 +1,206 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+V1_SALT = 'complexes.visitor.qr'
+V2_SALT = 'complexes.visitor.qr.v2'
+V2_PREFIX = 'v2.'
+
+DEFAULT_TOKEN_TTL = 7 * 24 * 3600
+DEFAULT_REISSUE_INTERVAL = 3600
+
+
+class VisitorPass(
+    namedtuple(
+        'VisitorPass',
+        'version visitor_id complex_id apartment_label name_hash issued_at expires_at',
+    )
+):
+    """
+    Вміст QR-токена відвідувача.
+    v1 містить лише visitor_id — решту треба брати з БД.
+    """
+
+    @property
+    def is_offline(self):
+        return self.version >= 2
+
+
+def token_ttl():
+    return getattr(settings, 'VISITOR_QR_TOKEN_TTL', DEFAULT_TOKEN_TTL)
+
+
+def reissue_interval():
+    return max(1, getattr(settings, 'VISITOR_QR_REISSUE_INTERVAL', DEFAULT_REISSUE_INTERVAL))
+
+
+def name_hash(fullname):
+    normalized = ' '.join((fullname or '').split()).casefold()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:12]
+
+
+def _apartment_label(apartment):
+    if apartment is None:
+        return ''
+    entrance = getattr(apartment, 'entrance', None)
+    building = getattr(entrance, 'building', None)
+    complex_obj = getattr(building, 'complex', None)
+
+    parts = []
+    if complex_obj is not None:
+        parts.append(f"ЖК {complex_obj.name}")
+    if building is not None:
+        parts.append(f"буд. {building.number}")
+    if entrance is not None:
+        parts.append(f"під'їзд {entrance.number}")
+    parts.append(f"кв. {apartment.number}")
+    return " | ".join(parts)
+
+
+def issue_visitor_token(visitor, now=None):
+    """
+    Підписаний v2-токен: усе, що потрібно охоронцю, є в самому токені.
+    visitor має бути завантажений з apartment__entrance__building__complex.
+    Час видачі округлюється вниз до VISITOR_QR_REISSUE_INTERVAL, тож у межах
+    інтервалу токен (і його QR-зображення) не змінюється.
+    """
+    if visitor.pk is None:
+        raise ValueError('Visitor must be saved before generating a QR token.')
+    interval = reissue_interval()
+    issued_at = int(now if now is not None else time.time()) // interval * interval
+    apartment = visitor.apartment if visitor.apartment_id else None
+    complex_id = None
+    if apartment is not None and apartment.entrance_id:
+        complex_id = apartment.entrance.building.complex_id
+
+    payload = [
+        visitor.pk,
+        complex_id,
+        _apartment_label(apartment),
+        name_hash(visitor.fullname),
+        issued_at,
+        issued_at + token_ttl(),
+    ]
+    signer = signing.Signer(salt=V2_SALT)
+    return V2_PREFIX + signer.sign_object(payload, compress=True)
+
+
+def read_visitor_token(token, now=None):
+    """
+    Розбирає v2- або старий v1-токен.
+    Кидає signing.BadSignature (або SignatureExpired для простроченого v2).
+    """
+    if token.startswith(V2_PREFIX):
+        try:
+            visitor_id, complex_id, label, hashed, issued_at, expires_at = (
+                signing.Signer(salt=V2_SALT).unsign_object(token[len(V2_PREFIX):])
+            )
+        except (TypeError, ValueError):
+            raise signing.BadSignature('Malformed visitor token payload.')
+        if expires_at < (now if now is not None else time.time()):
+            raise signing.SignatureExpired('Visitor token expired.')
+        return VisitorPass(2, visitor_id, complex_id, label, hashed, issued_at, expires_at)
+
+    visitor_id = signing.loads(token, salt=V1_SALT)
+    return VisitorPass(1, visitor_id, None, None, None, None, None)
+
+
+class RevokedVisitors:
+    """
+    Deny-set відкликаних дозволів (видалених відвідувачів) для v2-токенів,
+    які перевіряються без БД. Записи живуть стільки ж, скільки найдовший
+    токен, і зберігаються у спільному кеші Django (VISITOR_QR_DENY_CACHE_ALIAS,
+    за замовчуванням кеш ЖК — file під docker-compose), тож відкликання в
+    одному воркері бачать усі. Кеш має вміщати всі записи: витіснений запис
+    знову пропускає токен.
+
+    Якщо кеш лише в пам'яті процесу (LocMemCache, DummyCache або порожній
+    alias), відкликання не дійде до інших воркерів — тоді для v2-токенів
+    перевіряється, що відвідувач ще є в БД.
+    """
+
+    KEY_PREFIX = 'complexes:qr-revoked:'
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def max_entries(self):
+        return getattr(settings, 'VISITOR_QR_DENY_SIZE', 10000)
+
+    def _shared_cache(self):
+        alias = getattr(settings, 'VISITOR_QR_DENY_CACHE_ALIAS', 'default')
+        if not alias:
+            return None
+        cache = caches[alias]
+        if isinstance(cache, (LocMemCache, DummyCache)):
+            return None
+        return cache
+
+    def revoke(self, visitor_id):
+        expires_at = time.monotonic() + token_ttl()
+        with self._lock:
+            self._entries[visitor_id] = expires_at
+            self._entries.move_to_end(visitor_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        shared = self._shared_cache()
+        if shared is not None:
+            shared.set(f'{self.KEY_PREFIX}{visitor_id}', True, token_ttl())
+
+    def _is_revoked_locally(self, visitor_id):
+        with self._lock:
+            expires_at = self._entries.get(visitor_id)
+            if expires_at is not None:
+                if expires_at > time.monotonic():
+                    return True
+                del self._entries[visitor_id]
+        return False
+
+    def is_revoked(self, visitor_id):
+        return visitor_id in self.revoked_among([visitor_id])
+
+    def revoked_among(self, visitor_ids):
+        """Відкликані серед visitor_ids — одним зверненням до кешу або БД."""
+        visitor_ids = set(visitor_ids)
+        revoked = {visitor_id for visitor_id in visitor_ids if self._is_revoked_locally(visitor_id)}
+        pending = visitor_ids - revoked
+        if not pending:
+            return revoked
+        shared = self._shared_cache()
+        if shared is not None:
+            found = shared.get_many([f'{self.KEY_PREFIX}{visitor_id}' for visitor_id in pending])
+            return revoked | {visitor_id for visitor_id in pending if found.get(f'{self.KEY_PREFIX}{visitor_id}')}
+        return revoked | (pending - set(_visitor_model().objects.filter(pk__in=pending).values_list('pk', flat=True)))
+
+    async def ais_revoked(self, visitor_id):
+        """is_revoked для async view: кеш і БД читаються через async API."""
+        if self._is_revoked_locally(visitor_id):
+            return True
+        shared = self._shared_cache()
+        if shared is not None:
+            return bool(await shared.aget(f'{self.KEY_PREFIX}{visitor_id}'))
+        return not await _visitor_model().objects.filter(pk=visitor_id).aexists()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _visitor_model():
+    # complexes.models імпортує цей модуль, тож модель — лише під час виклику
+    from .models import Visitor
+
+    return Visitor
+
+
+revoked_visitors = RevokedVisitors()
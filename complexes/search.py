@@ -0,0 +1,227 @@
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Expression, F, Q
+from django.db.models.expressions import Col
+from django.db.models.functions import Greatest
+from django.urls import reverse
+
+from .models import Apartment, Owner, Resident, ResidentialComplex, Staff, Visitor
+
+
+_TERM_RE = re.compile(r'\w+')
+_PHONE_RE = re.compile(r'[\d\s()+\-]+')
+_MAX_TERMS = 8
+
+
+@lru_cache(maxsize=1)
+def trigram_available():
+    """Чи встановлено pg_trgm: міграція 0018 ставить його, лише якщо сервер це дозволяє."""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("select 1 from pg_extension where extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def search_terms(q):
+    """
+    Слова запиту в нижньому регістрі. Запит, схожий на телефон,
+    зводиться до цифр — так само, як номер індексує public.search_vector.
+    """
+    q = (q or '').strip()
+    digits = re.sub(r'\D', '', q)
+    if len(digits) >= 5 and _PHONE_RE.fullmatch(q):
+        return [digits[-10:]] if len(digits) > 10 else [digits]
+    return _TERM_RE.findall(q.lower())[:_MAX_TERMS]
+
+
+def search_query(q):
+    """Префіксний tsquery по всіх словах: "шевч тар" -> 'шевч':* & 'тар':*."""
+    terms = search_terms(q)
+    if not terms:
+        return None
+    raw = ' & '.join(f"'{term}':*" for term in terms)
+    return SearchQuery(raw, search_type='raw', config='simple')
+
+
+class SearchVectorColumn(Expression):
+    """
+    Стовпець search_vector базової таблиці запиту. Його заповнюють тригери
+    (міграція 0018), а на моделях поля немає, щоб звичайні запити не
+    читали і save() не переписував tsvector — лише пошук звертається до нього.
+    """
+
+    output_field = SearchVectorField()
+
+    def resolve_expression(self, query=None, allow_joins=True, reuse=None, summarize=False, for_save=False):
+        field = SearchVectorField()
+        field.set_attributes_from_name('search_vector')
+        field.model = query.model
+        return Col(query.get_initial_alias(), field)
+
+
+def annotate_search(queryset, q, trigram_fields=(), candidates=None):
+    """
+    Фільтрує queryset за search_vector і додає rank.
+    З pg_trgm також знаходить рядки з одруківками (word similarity
+    по trigram_fields) і враховує схожість у rank.
+    candidates обмежує, скільки збігів з індексу ранжувати: для широких
+    запитів ("іван") сортування всіх збігів коштувало б сотні мілісекунд.
+    Повертає None, якщо запит порожній.
+    """
+    query = search_query(q)
+    if query is None:
+        return None
+    queryset = queryset.alias(search_vector=SearchVectorColumn())
+    rank = SearchRank(F('search_vector'), query)
+    condition = Q(search_vector=query)
+
+    if trigram_fields and trigram_available():
+        q = q.strip()
+        similarities = [TrigramWordSimilarity(q, field) for field in trigram_fields]
+        for field in trigram_fields:
+            condition |= Q(**{f'{field}__trigram_word_similar': q})
+        similarity = similarities[0] if len(similarities) == 1 else Greatest(*similarities)
+        rank = rank + similarity
+
+    matches = queryset.filter(condition)
+    if candidates:
+        matches = queryset.filter(pk__in=matches.order_by().values('pk')[:candidates])
+    return matches.annotate(rank=rank)
+
+
+@dataclass(frozen=True)
+class SearchTarget:
+    kind: str
+    model: type
+    trigram_fields: tuple
+    complex_lookup: str
+    select_related: tuple = ()
+
+    def queryset(self, complex_id=None):
+        queryset = self.model.objects.select_related(*self.select_related)
+        if complex_id is not None:
+            queryset = queryset.filter(**{self.complex_lookup: complex_id})
+        return queryset
+
+
+SEARCH_TARGETS = {
+    target.kind: target
+    for target in (
+        SearchTarget('complex', ResidentialComplex, ('name', 'address'), 'pk'),
+        SearchTarget('owner', Owner, ('name', 'phone'), 'complex_id'),
+        SearchTarget(
+            'resident', Resident, ('fullname', 'contact'), 'complex_id',
+            ('apartment__entrance__building',),
+        ),
+        SearchTarget('staff', Staff, ('fullname', 'contact'), 'complex_id'),
+        SearchTarget('visitor', Visitor, ('fullname',), 'complex_id', ('apartment',)),
+    )
+}
+
+SEARCH_KINDS = tuple(SEARCH_TARGETS) + ('apartment',)
+
+SEARCH_KIND_LABELS = {
+    'complex': 'ЖК',
+    'owner': 'Власник',
+    'resident': 'Мешканець',
+    'staff': 'Персонал',
+    'visitor': 'Відвідувач',
+    'apartment': 'Квартира',
+}
+
+
+def _hit(kind, obj, title, subtitle, url, rank):
+    return {
+        'kind': kind,
+        'label': SEARCH_KIND_LABELS[kind],
+        'id': obj.pk,
+        'title': title,
+        'subtitle': subtitle or '',
+        'url': url,
+        'rank': round(float(rank), 4),
+    }
+
+
+def _describe(kind, obj):
+    if kind == 'complex':
+        return obj.name, obj.address, reverse('complex_detail', args=[obj.pk])
+    if kind == 'owner':
+        return obj.name, obj.phone, reverse('owner_edit', args=[obj.pk])
+    if kind == 'resident':
+        apartment = str(obj.apartment) if obj.apartment_id else ''
+        subtitle = ' | '.join(filter(None, [apartment, obj.contact]))
+        return obj.fullname, subtitle, reverse('resident_edit', args=[obj.pk])
+    if kind == 'staff':
+        return obj.fullname, obj.role, reverse('staff_edit', args=[obj.pk])
+    apartment = f'кв. {obj.apartment.number}' if obj.apartment_id else ''
+    subtitle = ' | '.join(filter(None, [apartment, obj.purpose, f'{obj.created_at:%Y-%m-%d}']))
+    return obj.fullname, subtitle, reverse('visitor_qr', args=[obj.pk])
+
+
+def _apartment_hits(q, complex_id, limit):
+    if not q.isdigit() or len(q) > 6:
+        return []
+    apartments = Apartment.objects.select_related('entrance__building__complex').filter(number=int(q))
+    if complex_id is not None:
+        apartments = apartments.filter(entrance__building__complex_id=complex_id)
+    apartments = apartments.order_by('entrance__building__complex_id', 'entrance__building__number')
+    return [
+        _hit(
+            'apartment', apartment, f'Кв. {apartment.number}',
+            f"{apartment.entrance.building.complex.name}, буд. {apartment.entrance.building.number}, "
+            f"під'їзд {apartment.entrance.number}",
+            reverse('entrance_apartments', args=[apartment.entrance_id]),
+            1.0,
+        )
+        for apartment in apartments[:limit]
+    ]
+
+
+def search(q, kinds=SEARCH_KINDS, complex_id=None, visitors_since=None, limit=None):
+    """
+    Пошук по людях, відвідувачах, ЖК і квартирах (за номером).
+    complex_id обмежує результати одним ЖК, visitors_since — відвідувачами
+    не старшими за дату (вікно охоронця). Кожен вид повертає до limit
+    найкращих збігів; загальний список упорядкований за rank.
+    """
+    if limit is None:
+        limit = getattr(settings, 'SEARCH_RESULTS_PER_KIND', 10)
+    q = (q or '').strip()
+    if len(q) < getattr(settings, 'SEARCH_MIN_QUERY_LENGTH', 2) and not q.isdigit():
+        return []
+
+    hits = []
+    for kind in kinds:
+        if kind == 'apartment':
+            hits.extend(_apartment_hits(q, complex_id, limit))
+            continue
+        target = SEARCH_TARGETS[kind]
+        queryset = target.queryset(complex_id)
+        if kind == 'visitor' and visitors_since is not None:
+            queryset = queryset.filter(created_at__gte=visitors_since)
+        queryset = annotate_search(
+            queryset, q, target.trigram_fields,
+            candidates=getattr(settings, 'SEARCH_RANK_CANDIDATES', 1000),
+        )
+        if queryset is None:
+            return []
+        for obj in queryset.order_by('-rank', 'pk')[:limit]:
+            title, subtitle, url = _describe(kind, obj)
+            hits.append(_hit(kind, obj, title, subtitle, url, obj.rank))
+
+    hits.sort(key=lambda hit: -hit['rank'])
+    return hits
+
+
+def search_complexes(queryset, q):
+    """Фільтр списку ЖК за назвою/адресою; найкращі збіги першими."""
+    ranked = annotate_search(queryset, q, SEARCH_TARGETS['complex'].trigram_fields)
+    if ranked is None:
+        return queryset
+    return ranked.order_by('-rank', 'name')
@@ -0,0 +1,54 @@
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import render
+
+from accounts.principal import get_principal
+from residence_manager.responses import forbidden_response
+
+from .access_views import _guard_window_start
+from .search import SEARCH_KINDS, search
+
+
+GUARD_SEARCH_KINDS = ('resident', 'visitor', 'apartment')
+
+
+def _search_scope(user):
+    """
+    (види результатів, ЖК, з якої дати відвідувачі) для ролі користувача;
+    None — пошук недоступний.
+    """
+    principal = get_principal(user)
+    if principal.is_superadmin:
+        return SEARCH_KINDS, None, None
+    if principal.is_complex_admin:
+        return SEARCH_KINDS, principal.admin_complex_id, None
+    if principal.is_guard:
+        return GUARD_SEARCH_KINDS, principal.staff_complex_id, _guard_window_start()
+    return None
+
+
+@login_required
+def global_search(request):
+    """
+    Пошук по ЖК, власниках, мешканцях, персоналі, відвідувачах і квартирах
+    у межах прав користувача. ?format=json — ті самі результати для JS.
+    """
+    scope = _search_scope(request.user)
+    if scope is None:
+        return forbidden_response(request)
+    kinds, complex_id, visitors_since = scope
+
+    requested = request.GET.getlist('kind')
+    if requested:
+        kinds = tuple(kind for kind in kinds if kind in requested)
+
+    q = (request.GET.get('q') or '').strip()
+    results = search(q, kinds=kinds, complex_id=complex_id, visitors_since=visitors_since)
+
+    if request.GET.get('format') == 'json':
+        return JsonResponse({'query': q, 'results': results})
+
+    return render(request, 'complexes/search.html', {
+        'q': q,
+        'results': results,
+    })
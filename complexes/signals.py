@@ -0,0 +1,76 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import bump_complex_version
+from .models import Apartment, Building, Entrance, Owner, ParkingZone, ResidentialComplex
+from .owner_compat import owner_has_complex_column
+
+
+# ===== Інвалідація кешу ЖК (complexes.cache) =====
+# Кешовані дані (напр. підписи варіантів) містять назву ЖК, номери будинку
+# й під'їзду, тож скидаємо версію ЖК за будь-якої зміни в цьому ланцюжку. Для переміщень
+# між ЖК pre_save запам'ятовує старий ЖК, щоб скинути обидва.
+
+def _complex_of_entrance(entrance_id):
+    if entrance_id is None:
+        return None
+    return Entrance.objects.filter(pk=entrance_id).values_list('building__complex_id', flat=True).first()
+
+
+def _complex_id(instance):
+    if isinstance(instance, ResidentialComplex):
+        return instance.pk
+    if isinstance(instance, Building):
+        return instance.complex_id
+    if isinstance(instance, Owner):
+        return instance.complex_id if owner_has_complex_column() else None
+    if isinstance(instance, Entrance):
+        return Building.objects.filter(pk=instance.building_id).values_list('complex_id', flat=True).first()
+    return _complex_of_entrance(instance.entrance_id)
+
+
+_PARENT_FIELDS = {
+    Building: 'complex_id',
+    Entrance: 'building_id',
+    Apartment: 'entrance_id',
+    ParkingZone: 'entrance_id',
+    Owner: 'complex_id',
+}
+
+
+@receiver(pre_save, sender=Building)
+@receiver(pre_save, sender=Entrance)
+@receiver(pre_save, sender=Apartment)
+@receiver(pre_save, sender=ParkingZone)
+@receiver(pre_save, sender=Owner)
+def _complex_source_saving(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    if sender is Owner and not owner_has_complex_column():
+        return
+    field = _PARENT_FIELDS[sender]
+    stored_parent = sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+    if stored_parent is not None and stored_parent != getattr(instance, field):
+        instance._cache_complex_before = _complex_id(sender(**{field: stored_parent}))
+
+
+@receiver(post_save, sender=ResidentialComplex)
+@receiver(post_save, sender=Building)
+@receiver(post_save, sender=Entrance)
+@receiver(post_save, sender=Apartment)
+@receiver(post_save, sender=ParkingZone)
+@receiver(post_save, sender=Owner)
+def _complex_source_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    bump_complex_version(_complex_id(instance), instance.__dict__.pop('_cache_complex_before', None))
+
+
+@receiver(post_delete, sender=ResidentialComplex)
+@receiver(post_delete, sender=Building)
+@receiver(post_delete, sender=Entrance)
+@receiver(post_delete, sender=Apartment)
+@receiver(post_delete, sender=ParkingZone)
+@receiver(post_delete, sender=Owner)
+def _complex_source_deleted(sender, instance, **kwargs):
+    bump_complex_version(_complex_id(instance))
@@ -0,0 +1,105 @@
+// Автодоповнення для <select data-autocomplete-url> (complexes.widgets.AutocompleteSelect).
+// Сервер рендерить лише вибраний варіант; решту підвантажуємо з form_lookup
+// сторінками по LOOKUP_PAGE_SIZE за введеним префіксом або номером.
+(function () {
+  'use strict';
+
+  var DEBOUNCE_MS = 250;
+  var MORE_VALUE = '__more__';
+
+  function lookupUrl(select, q) {
+    var url = new URL(select.dataset.autocompleteUrl, window.location.origin);
+    if (q) {
+      url.searchParams.set('q', q);
+    }
+    if (select.dataset.autocompleteComplex) {
+      url.searchParams.set('complex', select.dataset.autocompleteComplex);
+    }
+    return url.toString();
+  }
+
+  function option(value, text) {
+    var node = document.createElement('option');
+    node.value = value;
+    node.textContent = text;
+    return node;
+  }
+
+  function setup(select) {
+    var input = document.createElement('input');
+    input.type = 'search';
+    input.className = 'form-control form-control-sm mb-1';
+    input.placeholder = 'Пошук: номер або назва…';
+    input.setAttribute('aria-label', 'Пошук варіантів');
+    select.parentNode.insertBefore(input, select);
+
+    var nextUrl = null;
+    var timer = null;
+    var request = 0;
+
+    function keepOptions() {
+      // порожній варіант і вибране значення лишаються завжди
+      Array.prototype.slice.call(select.options).forEach(function (node) {
+        if (node.value !== '' && !node.selected) {
+          node.remove();
+        }
+      });
+    }
+
+    function load(url, append) {
+      var current = ++request;
+      fetch(url, {headers: {'Accept': 'application/json'}, credentials: 'same-origin'})
+        .then(function (response) { return response.ok ? response.json() : {results: [], next: null}; })
+        .then(function (data) {
+          if (current !== request) {
+            return;
+          }
+          var more = select.querySelector('option[value="' + MORE_VALUE + '"]');
+          if (more) {
+            more.remove();
+          }
+          if (!append) {
+            keepOptions();
+          }
+          var present = {};
+          Array.prototype.forEach.call(select.options, function (node) { present[node.value] = true; });
+          data.results.forEach(function (item) {
+            if (!present[String(item.id)]) {
+              select.appendChild(option(item.id, item.text));
+            }
+          });
+          nextUrl = data.next;
+          if (nextUrl) {
+            select.appendChild(option(MORE_VALUE, 'Показати ще…'));
+          }
+        });
+    }
+
+    input.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(function () { load(lookupUrl(select, input.value.trim()), false); }, DEBOUNCE_MS);
+    });
+
+    select.addEventListener('focus', function () {
+      if (select.options.length <= 2 && nextUrl === null) {
+        load(lookupUrl(select, input.value.trim()), false);
+      }
+    }, {once: true});
+
+    var previous = select.value;
+    select.addEventListener('change', function () {
+      if (select.value === MORE_VALUE) {
+        select.value = previous;
+        if (nextUrl) {
+          load(nextUrl, true);
+        }
+        return;
+      }
+      previous = select.value;
+    });
+  }
+
+  document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('select[data-autocomplete-url]').forEach(setup);
+  });
+})();
@@ -0,0 +1,45 @@
+from django.db import connection
+from django.db.models import F
+from django.db.models.functions import Coalesce
+
+from .models import ResidentialComplex
+
+
+STATS_COUNTERS = (
+    'buildings_count',
+    'entrances_count',
+    'apartments_count',
+    'owned_apartments_count',
+    'residents_count',
+    'storage_rooms_count',
+    'free_storage_count',
+    'parking_spots_count',
+    'open_tickets_count',
+)
+
+
+def annotate_complex_stats(queryset):
+    """
+    Додає до queryset ЖК лічильники для карток статистики (STATS_COUNTERS)
+    з матеріалізованої таблиці complex_stats: один LEFT JOIN по первинному
+    ключу замість підрахунків. ЖК без рядка статистики отримують нулі.
+    """
+    return queryset.annotate(**{
+        name: Coalesce(F(f'stats__{name}'), 0)
+        for name in STATS_COUNTERS
+    })
+
+
+def refresh_complex_stats(complex_ids=None):
+    """
+    Повний перерахунок complex_stats через public.complex_stats_refresh().
+    Потрібен лише для ремонту після ручних правок у БД — у звичайній роботі
+    лічильники оновлюють тригери. Повертає кількість оброблених ЖК.
+    """
+    if complex_ids is None:
+        complex_ids = ResidentialComplex.objects.values_list('pk', flat=True)
+    complex_ids = list(complex_ids)
+    with connection.cursor() as cursor:
+        for complex_id in complex_ids:
+            cursor.execute('SELECT public.complex_stats_refresh(%s)', [complex_id])
+    return len(complex_ids)
@@ -1,10 +1,35 @@
 from accounts.forms import OwnerAccountCreateForm
 from accounts.models import ComplexAdminProfile, OwnerAccount, StaffAccount
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+import json
+import os
+import tempfile
+from io import BytesIO, StringIO
+from datetime import timedelta
+import time
+from unittest import mock, skipUnless
+
+from django.core import signing
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from complexes.forms import OwnerForm, ParkingSpotForm
-from complexes.models import Apartment, Building, Entrance, Owner, ParkingZone, ResidentialComplex, Staff, Visitor
+from django.utils import timezone
+from complexes.cache import cache_get, cache_set, cache_stats, complex_cache_key, reset_cache_stats
+from complexes.entry_log import EntryLogWriter, entries_for_day, visitor_entries
+from complexes.forms import OwnerForm, ParkingSpotForm, VisitorForm
+from complexes.importer import import_complex_file
+from complexes.pagination import paginate_keyset
+from complexes.partitions import add_months, ensure_month_partitions, expire_month_partitions, month_partitions
+from complexes.qr_tokens import issue_visitor_token, revoked_visitors, token_ttl
+from complexes.stats import annotate_complex_stats, refresh_complex_stats
+from complexes.tree import build_complex_tree
+from complexes.models import (
+    Apartment, Building, Entrance, Owner, ParkingZone, Resident, ResidentialComplex, Staff, StorageRoom, Visitor,
+    ComplexStats, MaintenanceRequest, ParkingSpot, VisitorEntry,
+)
 
 
 User = get_user_model()
@@ -117,6 +142,19 @@ class ParkingSpotFormTests(TestCase):
         self.assertFalse(form.is_valid())
         self.assertIn('owner', form.errors)
 
+    def test_owner_labels_without_complex_column_take_one_query(self):
+        entrance = self.zone.entrance
+        for number, owner in enumerate([self.owner_allowed, self.owner_other], start=1):
+            Apartment.objects.create(number=number, floor=1, rooms=1, entrance=entrance, owner=owner)
+
+        with mock.patch('complexes.forms.owner_has_complex_column', return_value=False):
+            form = ParkingSpotForm()
+            with CaptureQueriesContext(connection) as queries:
+                labels = [label for value, label in form.fields['owner'].choices if value]
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(sorted(labels), ['Allowed Owner | ЖК A', 'Other Owner | ЖК A'])
+
 
 class VisitorDeleteAccessTests(TestCase):
     def setUp(self):
@@ -158,3 +196,925 @@ class VisitorDeleteAccessTests(TestCase):
         response = self.client.get(reverse('visitors_list'))
 
         self.assertEqual(response.status_code, 200)
+
+
+
+# Deny-set відкликаних QR спільний для воркерів лише у файловому (не locmem) кеші
+SHARED_TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'residence_manager-tests', 'cache'),
+    },
+}
+
+
+@override_settings(
+    VISITOR_ENTRY_FLUSH_INTERVAL_MS=0, VISITOR_ENTRY_BATCH_SIZE=1000, CACHES=SHARED_TEST_CACHES,
+)
+class VisitorQrTokenTests(TestCase):
+    def setUp(self):
+        self.complex_one = ResidentialComplex.objects.create(name='A', address='Addr A')
+        complex_two = ResidentialComplex.objects.create(name='B', address='Addr B')
+        entrance_one = Entrance.objects.create(
+            number=1, building=Building.objects.create(number=1, floors=9, complex=self.complex_one)
+        )
+        entrance_two = Entrance.objects.create(
+            number=1, building=Building.objects.create(number=2, floors=9, complex=complex_two)
+        )
+        self.visitor = Visitor.objects.create(
+            fullname='Ірина Коваль',
+            apartment=Apartment.objects.create(number=101, floor=1, rooms=2, entrance=entrance_one),
+        )
+        self.other_visitor = Visitor.objects.create(
+            fullname='Other',
+            apartment=Apartment.objects.create(number=201, floor=2, rooms=3, entrance=entrance_two),
+        )
+
+        user = User.objects.create_user(username='complex-admin', password='pass12345')
+        ComplexAdminProfile.objects.create(user=user, complex=self.complex_one)
+        self.client.force_login(user)
+        self.user = user
+        self.legacy_token = signing.dumps(self.visitor.pk, salt=Visitor.QR_SIGNING_SALT)
+        self.offline_token = self.visitor.get_qr_token()
+        self.foreign_token = self.other_visitor.get_qr_token()
+        caches['default'].clear()
+        revoked_visitors.clear()
+        visitor_entries.clear()
+        self.addCleanup(visitor_entries.clear)
+
+    def _validate(self, token, **extra):
+        return self.client.post(reverse('visitor_qr_validate'), {'token': token, **extra})
+
+    def test_v2_token_is_validated_without_visitor_query(self):
+        token = self.visitor.get_qr_token()
+        self._validate(token)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self._validate(token, name='  ірина   коваль ')
+
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertTrue(payload['offline'])
+        self.assertTrue(payload['name_match'])
+        self.assertEqual(payload['visitor']['apartment'], "ЖК A | буд. 1 | під'їзд 1 | кв. 101")
+        self.assertFalse([q for q in queries.captured_queries if 'complexes_visitor' in q['sql']])
+
+    def test_legacy_token_is_still_accepted(self):
+        token = signing.dumps(self.visitor.pk, salt=Visitor.QR_SIGNING_SALT)
+
+        response = self._validate(token)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['visitor']['fullname'], 'Ірина Коваль')
+
+    async def test_validation_runs_as_async_view(self):
+        await self.async_client.aforce_login(self.user)
+        url = reverse('visitor_qr_validate')
+
+        legacy = await self.async_client.post(url, {'token': self.legacy_token})
+        offline = await self.async_client.post(url, {'token': self.offline_token})
+        foreign = await self.async_client.post(url, {'token': self.foreign_token})
+
+        self.assertEqual(legacy.status_code, 200)
+        self.assertEqual(legacy.json()['visitor']['fullname'], 'Ірина Коваль')
+        self.assertTrue(offline.json()['offline'])
+        self.assertEqual(foreign.status_code, 404)
+
+    def test_v2_token_respects_scope_expiry_and_revocation(self):
+        self.assertEqual(self._validate(self.other_visitor.get_qr_token()).status_code, 404)
+
+        expired = issue_visitor_token(self.visitor, now=time.time() - 2 * token_ttl())
+        self.assertEqual(self._validate(expired).status_code, 400)
+
+        token = self.visitor.get_qr_token()
+        self.client.post(reverse('visitor_delete', args=[self.visitor.pk]))
+        self.assertEqual(self._validate(token).status_code, 410)
+
+    def test_revocation_reaches_other_workers(self):
+        token = self.visitor.get_qr_token()
+        self.client.post(reverse('visitor_delete', args=[self.visitor.pk]))
+        # інший воркер: локальної копії deny-set у нього немає
+        revoked_visitors.clear()
+
+        self.assertEqual(self._validate(token).status_code, 410)
+
+    @override_settings(CACHES={
+        **SHARED_TEST_CACHES, 'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    })
+    def test_process_local_deny_set_falls_back_to_visitor_lookup(self):
+        token = self.visitor.get_qr_token()
+        self.assertEqual(self._validate(token).status_code, 200)
+
+        # видалено в іншому воркері: локальний deny-set про це не знає
+        Visitor.objects.filter(pk=self.visitor.pk).delete()
+
+        self.assertEqual(self._validate(token).status_code, 410)
+
+    def test_qr_image_is_rendered_locally_with_etag(self):
+        url = self.visitor.get_qr_image_url()
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertTrue(response.content.startswith(b'\x89PNG\r\n\x1a\n'))
+        etag = response['ETag']
+
+        revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(revalidated.status_code, 304)
+
+        svg = self.client.get(self.visitor.get_qr_image_url('svg'))
+        self.assertEqual(svg['Content-Type'], 'image/svg+xml')
+        self.assertNotEqual(svg['ETag'], etag)
+
+        self.assertEqual(self.client.get(self.other_visitor.get_qr_image_url()).status_code, 404)
+        self.assertEqual(
+            self.client.get(reverse('visitor_qr_image', args=[self.visitor.pk, 'gif'])).status_code,
+            404,
+        )
+
+    def test_batch_validation_uses_one_visitor_query(self):
+        legacy = [
+            signing.dumps(visitor.pk, salt=Visitor.QR_SIGNING_SALT)
+            for visitor in (self.visitor, self.other_visitor)
+        ]
+        body = json.dumps([
+            {'token': self.visitor.get_qr_token(), 'name': 'Ірина Коваль'},
+            legacy[0],
+            legacy[1],
+            'garbage',
+        ])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('visitor_qr_validate_batch'), body, content_type='application/json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([r['status'] for r in results], [200, 200, 404, 400])
+        self.assertTrue(results[0]['name_match'])
+        self.assertEqual(results[1]['visitor']['fullname'], 'Ірина Коваль')
+        self.assertEqual(
+            len([q for q in queries.captured_queries if 'FROM "complexes_visitor"' in q['sql']]), 1
+        )
+
+        bad = self.client.post(reverse('visitor_qr_validate_batch'), '{}', content_type='application/json')
+        self.assertEqual(bad.status_code, 400)
+
+    def test_successful_validations_are_logged_in_batches(self):
+        self._validate(self.visitor.get_qr_token())
+        self._validate(signing.dumps(self.visitor.pk, salt=Visitor.QR_SIGNING_SALT))
+        self._validate(self.other_visitor.get_qr_token())
+
+        self.assertEqual(VisitorEntry.objects.count(), 0)
+        self.assertEqual(visitor_entries.flush(), 2)
+
+        entries = list(entries_for_day(self.complex_one.pk).order_by('entered_at'))
+        self.assertEqual([e.visitor_id for e in entries], [self.visitor.pk, self.visitor.pk])
+        self.assertEqual([e.offline for e in entries], [True, False])
+
+        response = self.client.get(reverse('visitor_entries_today'))
+        self.assertContains(response, 'Ірина Коваль', count=2)
+
+    def test_failed_flush_keeps_entries_for_retry(self):
+        for _ in range(3):
+            visitor_entries.record(self.visitor.pk, complex_id=self.complex_one.pk)
+
+        with mock.patch.object(VisitorEntry.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                visitor_entries.flush()
+        self.assertEqual(visitor_entries.pending(), 3)
+
+        self.assertEqual(visitor_entries.flush(), 3)
+        self.assertEqual(VisitorEntry.objects.count(), 3)
+
+        # понад RETRY_BATCHES пакетів найстаріші події відкидаються
+        for _ in range(3):
+            visitor_entries.record(self.visitor.pk, complex_id=self.complex_one.pk)
+        failing_insert = mock.patch.object(VisitorEntry.objects, 'bulk_create', side_effect=DatabaseError)
+        with override_settings(VISITOR_ENTRY_BATCH_SIZE=2), mock.patch.object(EntryLogWriter, 'RETRY_BATCHES', 1):
+            with failing_insert, self.assertRaises(DatabaseError), self.assertLogs('complexes.entry_log', 'ERROR'):
+                visitor_entries.flush()
+        self.assertEqual(visitor_entries.pending(), 2)
+
+    @skipUnless(connection.vendor == 'postgresql', 'партиції — лише PostgreSQL')
+    def test_new_partition_takes_rows_from_default(self):
+        far = timezone.now().replace(year=timezone.now().year + 5, day=1)
+        VisitorEntry.objects.create(visitor_id=self.visitor.pk, complex_id=self.complex_one.pk, entered_at=far)
+
+        names = ensure_month_partitions('visitor_entry', 'entered_at', months_ahead=0, today=far.date())
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT tableoid::regclass::text FROM visitor_entry')
+            self.assertEqual([row[0] for row in cursor.fetchall()], names)
+
+class VisitorRetentionTests(TestCase):
+    def setUp(self):
+        complex_one = ResidentialComplex.objects.create(name='A', address='Addr A')
+        building = Building.objects.create(number=1, floors=9, complex=complex_one)
+        apartment = Apartment.objects.create(
+            number=101, floor=1, rooms=2, entrance=Entrance.objects.create(number=1, building=building)
+        )
+        self.recent = Visitor.objects.create(fullname='Recent Visitor', apartment=apartment)
+        self.old = Visitor.objects.create(fullname='Old Visitor', apartment=apartment)
+        Visitor.objects.filter(pk=self.old.pk).update(created_at=timezone.now() - timedelta(days=30))
+
+        user = User.objects.create_user(username='guard', password='pass12345')
+        staff = Staff.objects.create(fullname='Guard', complex=complex_one)
+        StaffAccount.objects.create(user=user, staff=staff, access_type='guard')
+        self.client.force_login(user)
+
+    def test_guard_list_shows_only_recent_visitors(self):
+        response = self.client.get(reverse('visitors_list'))
+
+        self.assertContains(response, 'Recent Visitor')
+        self.assertNotContains(response, 'Old Visitor')
+
+    @override_settings(VISITOR_ENTRY_FLUSH_INTERVAL_MS=0)
+    def test_guard_still_validates_older_visitors(self):
+        self.addCleanup(visitor_entries.clear)
+        legacy_token = signing.dumps(self.old.pk, salt=Visitor.QR_SIGNING_SALT)
+
+        response = self.client.post(reverse('visitor_qr_validate'), {'token': legacy_token})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['visitor']['fullname'], 'Old Visitor')
+        self.assertEqual(self.client.get(self.old.get_qr_image_url()).status_code, 200)
+
+    @skipUnless(connection.vendor == 'postgresql', 'партиції — лише PostgreSQL')
+    def test_old_partitions_are_pruned_and_expired(self):
+        this_month = timezone.now().date().replace(day=1)
+        old_month = add_months(this_month, -40)
+        [old_partition] = ensure_month_partitions(
+            'complexes_visitor', 'created_at', months_ahead=0, today=old_month
+        )
+
+        plan = Visitor.objects.filter(created_at__gte=timezone.now() - timedelta(days=7)).explain()
+        self.assertNotIn(old_partition, plan)
+
+        self.assertEqual(expire_month_partitions('complexes_visitor', 36), [old_partition])
+        self.assertNotIn(old_partition, [name for name, _ in month_partitions('complexes_visitor')])
+        self.assertTrue(Visitor.objects.filter(pk=self.old.pk).exists())
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        complex_one = ResidentialComplex.objects.create(name='A', address='Addr A')
+        for name in ['Anna', 'Bohdan', 'Bohdan', 'Dmytro', 'Olena']:
+            Owner.objects.create(name=name, complex=complex_one)
+
+    def _page(self, url='/owners/'):
+        request = self.factory.get(url)
+        return paginate_keyset(request, Owner.objects.all(), ('name',), page_size=2)
+
+    def test_pages_walk_forward_and_back_without_gaps(self):
+        first = self._page()
+        second = self._page(first.next_url)
+        third = self._page(second.next_url)
+
+        seen = [o.pk for page in (first, second, third) for o in page]
+        self.assertEqual(seen, list(Owner.objects.order_by('name', 'pk').values_list('pk', flat=True)))
+        self.assertFalse(first.has_previous)
+        self.assertFalse(third.has_next)
+
+        back = self._page(second.previous_url)
+        self.assertEqual([o.pk for o in back], [o.pk for o in first])
+        self.assertFalse(back.has_previous)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        page = self._page('/owners/?cursor=broken')
+
+        self.assertEqual(len(page), 2)
+        self.assertFalse(page.has_previous)
+
+
+class ComplexTreeTests(TestCase):
+    def setUp(self):
+        self.complex_one = ResidentialComplex.objects.create(name='A', address='Addr A')
+        owner = Owner.objects.create(name='Owner', complex=self.complex_one)
+        building = Building.objects.create(number=1, floors=9, complex=self.complex_one)
+        Building.objects.create(number=2, floors=5, complex=self.complex_one)
+        self.entrance = Entrance.objects.create(number=1, building=building)
+        Apartment.objects.create(number=2, floor=1, rooms=1, entrance=self.entrance)
+        Apartment.objects.create(number=1, floor=1, rooms=2, entrance=self.entrance, owner=owner)
+
+    def test_tree_is_built_with_single_query(self):
+        with self.assertNumQueries(1):
+            tree = build_complex_tree(self.complex_one.pk)
+
+        self.assertEqual([b.number for b in tree], [1, 2])
+        self.assertEqual(tree[1].entrances, [])
+        apartments = tree[0].entrances[0].apartments
+        self.assertEqual([a.number for a in apartments], [1, 2])
+        self.assertEqual(apartments[0].owner_name, 'Owner')
+        self.assertIsNone(apartments[1].owner_name)
+
+    def test_collapsed_tree_only_counts_apartments(self):
+        tree = build_complex_tree(self.complex_one.pk, collapse_entrances=True)
+
+        entrance = tree[0].entrances[0]
+        self.assertTrue(entrance.collapsed)
+        self.assertEqual(entrance.apartment_count, 2)
+        self.assertEqual(entrance.apartments, [])
+
+
+class ComplexCountsTests(TestCase):
+    def setUp(self):
+        self.complex_one = ResidentialComplex.objects.create(name='A', address='Addr A')
+        self.complex_two = ResidentialComplex.objects.create(name='B', address='Addr B')
+        building = Building.objects.create(number=1, floors=9, complex=self.complex_one)
+        Building.objects.create(number=2, floors=9, complex=self.complex_one)
+        entrance = Entrance.objects.create(number=1, building=building)
+        apartment = Apartment.objects.create(number=1, floor=1, rooms=2, entrance=entrance)
+        Apartment.objects.create(number=2, floor=1, rooms=2, entrance=entrance)
+        Resident.objects.create(fullname='Resident', apartment=apartment)
+        StorageRoom.objects.create(number='1', status='free', apartment=apartment)
+        StorageRoom.objects.create(number='2', status='occupied', apartment=apartment)
+
+    def test_counts_are_annotated_per_complex(self):
+        counts = {
+            c.pk: (c.buildings_count, c.entrances_count, c.apartments_count, c.residents_count, c.free_storage_count)
+            for c in annotate_complex_stats(ResidentialComplex.objects.all())
+        }
+
+        self.assertEqual(counts[self.complex_one.pk], (2, 1, 2, 1, 1))
+        self.assertEqual(counts[self.complex_two.pk], (0, 0, 0, 0, 0))
+
+    def test_complex_list_does_not_query_per_row(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('complex_list'))
+
+        self.assertEqual(response.status_code, 200)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'complex_stats підтримується тригерами PostgreSQL')
+class ComplexStatsTriggerTests(TestCase):
+    def _stats(self, complex_obj):
+        return annotate_complex_stats(ResidentialComplex.objects.filter(pk=complex_obj.pk)).get()
+
+    def test_counters_follow_inserts_updates_and_deletes(self):
+        complex_obj = ResidentialComplex.objects.create(name='A', address='Addr A')
+        owner = Owner.objects.create(name='Owner', complex=complex_obj)
+        building = Building.objects.create(number=1, floors=9, complex=complex_obj)
+        entrance = Entrance.objects.create(number=1, building=building)
+        apartment = Apartment.objects.create(number=1, floor=1, rooms=2, entrance=entrance, owner=owner)
+        Apartment.objects.create(number=2, floor=1, rooms=2, entrance=entrance)
+        Resident.objects.create(fullname='Resident', apartment=apartment)
+        storage = StorageRoom.objects.create(number='1', status='free', apartment=apartment)
+        MaintenanceRequest.objects.create(owner=owner, apartment=apartment, description='Кран')
+
+        stats = self._stats(complex_obj)
+        self.assertEqual(
+            (stats.buildings_count, stats.entrances_count, stats.apartments_count,
+             stats.owned_apartments_count, stats.residents_count, stats.free_storage_count,
+             stats.open_tickets_count),
+            (1, 1, 2, 1, 1, 1, 1),
+        )
+
+        storage.status = 'occupied'
+        storage.save()
+        MaintenanceRequest.objects.update(status='done')
+        Apartment.objects.filter(owner=owner).update(owner=None)
+
+        stats = self._stats(complex_obj)
+        self.assertEqual(
+            (stats.owned_apartments_count, stats.free_storage_count, stats.open_tickets_count),
+            (0, 0, 0),
+        )
+
+        building.delete()
+        stats = self._stats(complex_obj)
+        refresh_complex_stats([complex_obj.pk])
+        live = self._stats(complex_obj)
+        self.assertEqual(
+            (stats.buildings_count, stats.apartments_count, stats.residents_count),
+            (live.buildings_count, live.apartments_count, live.residents_count),
+        )
+
+
+    def test_bulk_statements_move_parking_and_apartments(self):
+        complex_one = ResidentialComplex.objects.create(name='A', address='Addr A')
+        complex_two = ResidentialComplex.objects.create(name='B', address='Addr B')
+        owner = Owner.objects.create(name='Owner', complex=complex_one)
+        entrance_one = Entrance.objects.create(
+            number=1, building=Building.objects.create(number=1, floors=9, complex=complex_one)
+        )
+        entrance_two = Entrance.objects.create(
+            number=1, building=Building.objects.create(number=1, floors=9, complex=complex_two)
+        )
+        apartments = Apartment.objects.bulk_create([
+            Apartment(number=n, floor=1, rooms=1, entrance=entrance_one) for n in range(1, 6)
+        ])
+        Resident.objects.create(fullname='Resident', apartment=apartments[0])
+        zone = ParkingZone.objects.create(entrance=entrance_one)
+        ParkingSpot.objects.bulk_create([
+            ParkingSpot(number=n, status='free' if n % 2 else 'busy', parking_zone=zone, owner=owner)
+            for n in range(1, 4)
+        ])
+
+        stats = ComplexStats.objects.get(pk=complex_one.pk)
+        self.assertEqual((stats.apartments_count, stats.parking_spots_count), (5, 3))
+        self.assertEqual(stats.parking_status_counts, {'free': 2, 'busy': 1})
+
+        ParkingSpot.objects.filter(status='free').update(status='busy')
+        Apartment.objects.filter(pk=apartments[0].pk).update(entrance=entrance_two)
+
+        stats = ComplexStats.objects.get(pk=complex_one.pk)
+        moved = ComplexStats.objects.get(pk=complex_two.pk)
+        self.assertEqual(stats.parking_status_counts, {'busy': 3})
+        self.assertEqual((stats.apartments_count, stats.residents_count), (4, 0))
+        self.assertEqual((moved.apartments_count, moved.residents_count), (1, 1))
+
+        # Один UPDATE і переносить квартиру, і змінює власників у третьому ЖК
+        complex_three = ResidentialComplex.objects.create(name='C', address='Addr C')
+        entrance_three = Entrance.objects.create(
+            number=1, building=Building.objects.create(number=1, floors=9, complex=complex_three)
+        )
+        others = Apartment.objects.bulk_create([
+            Apartment(number=n, floor=1, rooms=1, entrance=entrance_three) for n in range(1, 3)
+        ])
+        apartments[1].entrance = entrance_two
+        for apartment in others:
+            apartment.owner = owner
+        Apartment.objects.bulk_update([apartments[1], *others], ['entrance', 'owner'])
+
+        stats = ComplexStats.objects.get(pk=complex_one.pk)
+        moved = ComplexStats.objects.get(pk=complex_two.pk)
+        third = ComplexStats.objects.get(pk=complex_three.pk)
+        self.assertEqual(stats.apartments_count, 3)
+        self.assertEqual(moved.apartments_count, 2)
+        self.assertEqual((third.apartments_count, third.owned_apartments_count), (2, 2))
+
+
+@skipUnless(connection.vendor == 'postgresql', 'next_smallest_free_id — функція PostgreSQL')
+class SmallestFreeIdTests(TestCase):
+    def _next_id(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT public.next_smallest_free_id('building'::regclass, 'building_id')")
+            return cursor.fetchone()[0]
+
+    def _create(self, pk):
+        return Building.objects.create(pk=pk, number=pk, floors=9, complex=self.complex_obj)
+
+    def setUp(self):
+        self.complex_obj = ResidentialComplex.objects.create(name='A', address='Addr A')
+
+    def test_returns_first_gap_and_reuses_deleted_ids(self):
+        for pk in (1, 2, 3, 5):
+            self._create(pk)
+
+        self.assertEqual(self._next_id(), 4)
+        self._create(4)
+        self.assertEqual(self._next_id(), 6)
+        self._create(6)
+
+        Building.objects.filter(pk__in=[2, 5]).delete()
+        self.assertEqual(self._next_id(), 2)
+        self._create(2)
+        self.assertEqual(self._next_id(), 5)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN та індекси — PostgreSQL')
+class HierarchyIndexTests(TestCase):
+    def test_list_views_use_composite_indexes(self):
+        complex_obj = ResidentialComplex.objects.create(name='A', address='Addr A')
+        Owner.objects.create(name='Owner', complex=complex_obj)
+        out = StringIO()
+
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            call_command('explain_list_views', complex=complex_obj.pk, stdout=out)
+
+        self.assertIn('owner_complex_name_idx', out.getvalue())
+        self.assertIn('== residents_list', out.getvalue())
+
+
+@skipUnless(connection.vendor == 'postgresql', 'complex_id підтримується тригерами PostgreSQL')
+class DenormalizedComplexIdTests(TestCase):
+    def setUp(self):
+        self.complex_one = ResidentialComplex.objects.create(name='A', address='Addr A')
+        self.complex_two = ResidentialComplex.objects.create(name='B', address='Addr B')
+        owner = Owner.objects.create(name='Owner', complex=self.complex_one)
+        self.building = Building.objects.create(number=1, floors=9, complex=self.complex_one)
+        self.entrance = Entrance.objects.create(number=1, building=self.building)
+        self.other_entrance = Entrance.objects.create(
+            number=1, building=Building.objects.create(number=2, floors=9, complex=self.complex_two)
+        )
+        self.apartment = Apartment.objects.create(number=1, floor=1, rooms=2, entrance=self.entrance)
+        self.resident = Resident.objects.create(fullname='Resident', apartment=self.apartment)
+        Visitor.objects.create(fullname='Guest', apartment=self.apartment)
+        MaintenanceRequest.objects.create(owner=owner, apartment=self.apartment, description='Кран')
+        StorageRoom.objects.create(number='1', apartment=self.apartment)
+        zone = ParkingZone.objects.create(entrance=self.entrance)
+        ParkingSpot.objects.create(number=1, parking_zone=zone, owner=owner)
+
+    def _complex_ids(self):
+        return {
+            model.__name__: set(model.objects.values_list('complex_id', flat=True))
+            for model in (Resident, Visitor, MaintenanceRequest, StorageRoom, ParkingSpot)
+        }
+
+    def _assert_all_in(self, complex_obj):
+        for name, ids in self._complex_ids().items():
+            self.assertEqual(ids, {complex_obj.pk}, name)
+
+    def test_complex_id_follows_inserts_and_hierarchy_moves(self):
+        self._assert_all_in(self.complex_one)
+
+        Building.objects.filter(pk=self.building.pk).update(complex=self.complex_two)
+        self._assert_all_in(self.complex_two)
+
+        Entrance.objects.filter(pk=self.entrance.pk).update(building=self.other_entrance.building)
+        Building.objects.filter(pk=self.building.pk).update(complex=self.complex_one)
+        self._assert_all_in(self.complex_two)
+
+        Entrance.objects.filter(pk=self.entrance.pk).update(building=self.building)
+        self._assert_all_in(self.complex_one)
+
+        Apartment.objects.filter(pk=self.apartment.pk).update(entrance=self.other_entrance)
+        self.assertEqual(self._complex_ids()['Resident'], {self.complex_two.pk})
+        self.assertEqual(self._complex_ids()['ParkingSpot'], {self.complex_one.pk})
+
+    def test_stale_instance_save_keeps_derived_value(self):
+        self.assertIsNone(self.resident.complex_id)
+        self.resident.fullname = 'Renamed'
+        self.resident.save()
+
+        self.assertEqual(
+            Resident.objects.filter(complex=self.complex_one).get().fullname, 'Renamed'
+        )
+
+@skipUnless(connection.vendor == 'postgresql', 'search_vector підтримується тригерами PostgreSQL')
+class GlobalSearchTests(TestCase):
+    def setUp(self):
+        self.complex_one = ResidentialComplex.objects.create(name='Sunrise', address='Shevchenka 1')
+        complex_two = ResidentialComplex.objects.create(name='Riverside', address='Franka 2')
+        entrance_one = Entrance.objects.create(
+            number=1, building=Building.objects.create(number=1, floors=9, complex=self.complex_one)
+        )
+        entrance_two = Entrance.objects.create(
+            number=1, building=Building.objects.create(number=1, floors=9, complex=complex_two)
+        )
+        apartment_one = Apartment.objects.create(number=12, floor=3, rooms=2, entrance=entrance_one)
+        apartment_two = Apartment.objects.create(number=12, floor=3, rooms=2, entrance=entrance_two)
+
+        Owner.objects.create(name='Ivan Petrenko', phone='+38 (050) 123-45-67', complex=self.complex_one)
+        Resident.objects.create(fullname='Ivanna Koval', apartment=apartment_one)
+        Resident.objects.create(fullname='Ivan Sydorenko', apartment=apartment_two)
+        Visitor.objects.create(fullname='Ivan Recent', apartment=apartment_one)
+        old = Visitor.objects.create(fullname='Ivan Old', apartment=apartment_one)
+        Visitor.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=30))
+
+        self.admin = User.objects.create_user(username='complex-admin', password='pass12345')
+        ComplexAdminProfile.objects.create(user=self.admin, complex=self.complex_one)
+
+    def _search(self, q, **params):
+        response = self.client.get(reverse('global_search'), {'q': q, 'format': 'json', **params})
+        self.assertEqual(response.status_code, 200)
+        return {(hit['kind'], hit['title']) for hit in response.json()['results']}
+
+    def test_complex_admin_search_is_scoped_and_prefix_based(self):
+        self.client.force_login(self.admin)
+
+        self.assertEqual(
+            self._search('iva'),
+            {('owner', 'Ivan Petrenko'), ('resident', 'Ivanna Koval'),
+             ('visitor', 'Ivan Recent'), ('visitor', 'Ivan Old')},
+        )
+        self.assertEqual(self._search('0501234567'), {('owner', 'Ivan Petrenko')})
+        self.assertEqual(self._search('12', kind='apartment'), {('apartment', 'Кв. 12')})
+
+    def test_guard_sees_residents_and_recent_visitors_only(self):
+        user = User.objects.create_user(username='guard', password='pass12345')
+        staff = Staff.objects.create(fullname='Guard', complex=self.complex_one)
+        StaffAccount.objects.create(user=user, staff=staff, access_type='guard')
+        self.client.force_login(user)
+
+        self.assertEqual(self._search('ivan'), {('resident', 'Ivanna Koval'), ('visitor', 'Ivan Recent')})
+
+        user.staff_account.access_type = 'maintenance'
+        user.staff_account.save()
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(reverse('global_search'), {'q': 'ivan'}).status_code, 403)
+
+    def test_regular_queries_do_not_read_or_write_search_vector(self):
+        with CaptureQueriesContext(connection) as queries:
+            visitor = Visitor.objects.select_related('apartment__entrance__building__complex').first()
+            visitor.purpose = 'Доставка'
+            visitor.save()
+            list(Owner.objects.all())
+
+        self.assertFalse([q['sql'] for q in queries if 'search_vector' in q['sql']])
+
+    def test_complex_list_search_uses_search_vector(self):
+        response = self.client.get(reverse('complex_list'), {'q': 'shevch'})
+
+        self.assertContains(response, 'Sunrise')
+        self.assertNotContains(response, 'Riverside')
+
+
+class FormLookupTests(TestCase):
+    def setUp(self):
+        self.complex_one = ResidentialComplex.objects.create(name='Sunrise', address='Shevchenka 1')
+        complex_two = ResidentialComplex.objects.create(name='Riverside', address='Franka 2')
+        entrance = Entrance.objects.create(
+            number=1, building=Building.objects.create(number=1, floors=9, complex=self.complex_one)
+        )
+        self.apartments = [
+            Apartment.objects.create(number=number, floor=1, rooms=2, entrance=entrance)
+            for number in (1, 2, 3)
+        ]
+        for name in ('Abramenko', 'abakumov', 'Abysko', 'Bondar'):
+            Owner.objects.create(name=name, complex=self.complex_one)
+        Owner.objects.create(name='Abrams', complex=complex_two)
+
+        self.admin = User.objects.create_user(username='complex-admin', password='pass12345')
+        ComplexAdminProfile.objects.create(user=self.admin, complex=self.complex_one)
+
+    def _lookup(self, url, params=None):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return [item['text'] for item in data['results']], data['next']
+
+    @override_settings(LOOKUP_PAGE_SIZE=2)
+    def test_owner_lookup_is_scoped_prefix_filtered_and_paginated(self):
+        self.client.force_login(self.admin)
+
+        texts, next_url = self._lookup(reverse('form_lookup', args=['owner']), {'q': 'ab'})
+        self.assertEqual([text.split(' | ')[0] for text in texts], ['Abramenko', 'Abysko'])
+        self.assertIsNotNone(next_url)
+
+        texts, next_url = self._lookup(next_url)
+        self.assertEqual([text.split(' | ')[0] for text in texts], ['abakumov'])
+        self.assertIsNone(next_url)
+
+    def test_owner_lookup_works_without_owner_complex_column(self):
+        self.client.force_login(self.admin)
+        for module in ('owner_compat', 'lookup_views', 'forms'):
+            patcher = mock.patch(f'complexes.{module}.owner_has_complex_column', return_value=False)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        texts, _ = self._lookup(reverse('form_lookup', args=['owner']), {'q': 'abr'})
+
+        # без стовпця ЖК власники не фільтруються за ЖК, як і у формах
+        self.assertEqual(sorted(text.split(' | ')[0] for text in texts), ['Abramenko', 'Abrams'])
+
+    def test_owner_account_sees_only_own_apartments(self):
+        owner = Owner.objects.get(name='Bondar')
+        Apartment.objects.filter(pk=self.apartments[1].pk).update(owner=owner)
+        user = User.objects.create_user(username='owner', password='pass12345')
+        OwnerAccount.objects.create(user=user, owner=owner)
+        self.client.force_login(user)
+
+        texts, _ = self._lookup(reverse('form_lookup', args=['apartment']))
+        self.assertEqual(len(texts), 1)
+        self.assertTrue(texts[0].startswith('Кв. 2 |'))
+        self.assertEqual(self.client.get(reverse('form_lookup', args=['owner'])).status_code, 403)
+        self.assertEqual(self.client.get(reverse('form_lookup', args=['unknown'])).status_code, 404)
+
+    def test_unfiltered_lookup_pages_are_cached_until_hierarchy_changes(self):
+        self.client.force_login(self.admin)
+        url = reverse('form_lookup', args=['apartment'])
+
+        texts, _ = self._lookup(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self._lookup(url)[0], texts)
+        self.assertFalse([q for q in queries.captured_queries if 'apartment' in q['sql']])
+
+        entrance = self.apartments[0].entrance
+        entrance.number = 5
+        with self.captureOnCommitCallbacks(execute=True):
+            entrance.save()
+
+        texts, _ = self._lookup(url)
+        self.assertTrue(all("під'їзд 5" in text for text in texts))
+
+    @override_settings(LOOKUP_CACHE_LOCAL_TTL=0)
+    def test_process_local_cache_does_not_keep_choice_pages(self):
+        self.client.force_login(self.admin)
+        url = reverse('form_lookup', args=['apartment'])
+        self._lookup(url)
+
+        # зміна в іншому воркері: скидання версії сюди не дійде
+        Apartment.objects.filter(pk=self.apartments[0].pk).update(number=9)
+
+        texts, _ = self._lookup(url)
+        self.assertTrue(any(text.startswith('Кв. 9 |') for text in texts))
+
+    def test_form_renders_only_selected_option_and_validates_submitted_pk(self):
+        selected = self.apartments[2]
+        form = VisitorForm(initial={'apartment': selected.pk}, complex_obj=self.complex_one)
+
+        with CaptureQueriesContext(connection) as queries:
+            html = str(form['apartment'])
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(html.count('<option'), 2)
+        self.assertIn(f'value="{selected.pk}" selected', html)
+        self.assertIn(f'data-autocomplete-url="{reverse("form_lookup", args=["apartment"])}"', html)
+        self.assertIn(f'data-autocomplete-complex="{self.complex_one.pk}"', html)
+
+        form = VisitorForm(
+            data={'fullname': 'Guest', 'purpose': 'Visit', 'apartment': self.apartments[0].pk},
+            complex_obj=self.complex_one,
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data['apartment'], self.apartments[0])
+
+
+
+class ComplexCacheTests(TestCase):
+    def setUp(self):
+        self.complex_one = ResidentialComplex.objects.create(name='A', address='Addr A')
+        self.complex_two = ResidentialComplex.objects.create(name='B', address='Addr B')
+        self.building = Building.objects.create(number=1, floors=9, complex=self.complex_one)
+        reset_cache_stats()
+        self.addCleanup(reset_cache_stats)
+
+    def test_hierarchy_changes_bump_only_own_complex_and_shared_keys(self):
+        keys = lambda: (  # noqa: E731
+            complex_cache_key('test', self.complex_one.pk, 'page'),
+            complex_cache_key('test', self.complex_two.pk, 'page'),
+            complex_cache_key('test', None, 'page'),
+        )
+        before = keys()
+        self.assertEqual(keys(), before)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            entrance = Entrance.objects.create(number=1, building=self.building)
+        after_entrance = keys()
+        self.assertNotEqual(after_entrance[0], before[0])
+        self.assertEqual(after_entrance[1], before[1])
+        self.assertNotEqual(after_entrance[2], before[2])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Apartment.objects.create(number=1, floor=1, rooms=1, entrance=entrance)
+        after_apartment = keys()
+        self.assertNotEqual(after_apartment[0], after_entrance[0])
+        self.assertEqual(after_apartment[1], before[1])
+
+    def test_hit_ratio_is_counted_per_namespace(self):
+        key = complex_cache_key('test', self.complex_one.pk, 'page')
+
+        self.assertIsNone(cache_get('test', key))
+        cache_set('test', key, {'results': []}, 60)
+        for _ in range(3):
+            self.assertEqual(cache_get('test', key), {'results': []})
+
+        self.assertEqual(cache_stats()['test'], {'hits': 3, 'misses': 1, 'ratio': 0.75})
+
+
+@skipUnless(connection.vendor == 'postgresql', 'complex_id заявки виставляє тригер PostgreSQL')
+class TicketStatusTests(TestCase):
+    def setUp(self):
+        complex_one = ResidentialComplex.objects.create(name='A', address='Addr A')
+        complex_two = ResidentialComplex.objects.create(name='B', address='Addr B')
+        tickets = []
+        for complex_obj in (complex_one, complex_two):
+            entrance = Entrance.objects.create(
+                number=1, building=Building.objects.create(number=1, floors=9, complex=complex_obj)
+            )
+            owner = Owner.objects.create(name='Owner', complex=complex_obj)
+            apartment = Apartment.objects.create(number=1, floor=1, rooms=1, entrance=entrance, owner=owner)
+            tickets.append(MaintenanceRequest.objects.create(owner=owner, apartment=apartment, description='Кран'))
+        self.ticket, self.foreign_ticket = tickets
+
+        self.user = User.objects.create_user(username='tech', password='pass12345')
+        staff = Staff.objects.create(fullname='Tech', complex=complex_one)
+        StaffAccount.objects.create(user=self.user, staff=staff, access_type='maintenance')
+        self.client.force_login(self.user)
+
+    def test_technician_moves_ticket_through_statuses(self):
+        self.assertContains(self.client.get(reverse('ticket_take', args=[self.ticket.pk])), 'Почати виконання')
+
+        self.assertRedirects(
+            self.client.post(reverse('ticket_take', args=[self.ticket.pk])), reverse('tickets_staff_list')
+        )
+        self.client.post(reverse('ticket_done', args=[self.ticket.pk]))
+
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.status, 'done')
+        self.assertEqual(self.client.post(reverse('ticket_done', args=[self.foreign_ticket.pk])).status_code, 404)
+
+    def test_guard_cannot_change_ticket_status(self):
+        self.user.staff_account.access_type = 'guard'
+        self.user.staff_account.save()
+
+        response = self.client.post(reverse('ticket_take', args=[self.ticket.pk]))
+
+        self.assertEqual(response.status_code, 403)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.status, 'new')
+
+    def test_owner_tickets_and_staff_list_read_ids_from_principal(self):
+        self.assertContains(self.client.get(reverse('tickets_staff_list')), 'Заявки на ремонт (A)')
+
+        owner_user = User.objects.create_user(username='owner', password='pass12345')
+        OwnerAccount.objects.create(user=owner_user, owner=self.ticket.owner)
+        self.client.force_login(owner_user)
+
+        response = self.client.post(
+            reverse('ticket_create'), {'apartment': self.ticket.apartment_id, 'description': 'Світло'}
+        )
+        self.assertRedirects(response, reverse('tickets_owner_list'))
+        self.assertEqual(MaintenanceRequest.objects.get(description='Світло').owner_id, self.ticket.owner_id)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('tickets_owner_list'))
+        self.assertEqual({t.description for t in response.context['tickets']}, {'Кран', 'Світло'})
+        self.assertFalse([q for q in queries.captured_queries if 'owner_account' in q['sql']])
+
+
+class ComplexImportTests(TestCase):
+    CSV = (
+        "building;floors;entrance;apartment;floor;rooms;area_m2;owner;owner_phone\n"
+        "1;9;1;1;1;2;50;Іван Петренко;+380501112233\n"
+        "1;9;1;2;1;3;;Іван Петренко;+380501112233\n"
+        "1;9;2;10;2;1;30;;\n"
+        "2;5;1;;;;;;\n"
+        "1;9;1;3;x;2;;;\n"
+        "1;9;1;1;1;2;50;;\n"
+    ).encode('utf-8')
+
+    def setUp(self):
+        self.complex_obj = ResidentialComplex.objects.create(name='A', address='Addr A')
+
+    def test_rows_are_validated_and_bulk_created(self):
+        result = import_complex_file(self.complex_obj, self.CSV, filename='flats.csv', batch_size=2)
+
+        self.assertEqual(
+            (result.buildings, result.entrances, result.apartments, result.owners, result.skipped),
+            (2, 3, 3, 1, 1),
+        )
+        self.assertEqual([line for line, _ in result.errors], [6])
+        owner = Owner.objects.get(name='Іван Петренко')
+        self.assertEqual(
+            sorted(Apartment.objects.filter(owner=owner).values_list('number', flat=True)), [1, 2]
+        )
+
+    def test_xlsx_rows_are_imported(self):
+        import openpyxl
+
+        workbook = openpyxl.Workbook()
+        for line in self.CSV.decode('utf-8').splitlines()[:4]:
+            workbook.active.append([value or None for value in line.split(';')])
+        fileobj = BytesIO()
+        workbook.save(fileobj)
+        fileobj.seek(0)
+
+        result = import_complex_file(self.complex_obj, fileobj, filename='flats.xlsx')
+
+        self.assertEqual((result.buildings, result.entrances, result.apartments, result.owners), (1, 2, 3, 1))
+        self.assertEqual(result.errors, [])
+
+    def test_dry_run_rolls_back(self):
+        result = import_complex_file(self.complex_obj, self.CSV, filename='flats.csv', dry_run=True)
+
+        self.assertEqual(result.apartments, 3)
+        self.assertFalse(Building.objects.filter(complex=self.complex_obj).exists())
+
+    def test_upload_requires_complex_admin(self):
+        response = self.client.get(reverse('complex_import', args=[self.complex_obj.pk]))
+
+        self.assertEqual(response.status_code, 403)
+
+
+class StreamingExportTests(TestCase):
+    def setUp(self):
+        self.complex_one = ResidentialComplex.objects.create(name='A', address='Addr A')
+        complex_two = ResidentialComplex.objects.create(name='B', address='Addr B')
+        for complex_obj, name in ((self.complex_one, 'Олена'), (complex_two, 'Петро')):
+            entrance = Entrance.objects.create(
+                number=1, building=Building.objects.create(number=1, floors=9, complex=complex_obj)
+            )
+            apartment = Apartment.objects.create(number=7, floor=2, rooms=2, entrance=entrance)
+            Resident.objects.create(fullname=name, apartment=apartment)
+
+        user = User.objects.create_user(username='complex-admin', password='pass12345')
+        ComplexAdminProfile.objects.create(user=user, complex=self.complex_one)
+        self.client.force_login(user)
+
+    def test_csv_export_is_streamed_and_scoped_to_admin_complex(self):
+        response = self.client.get(reverse('residents_list'), {'export': 'csv'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(lines[0], 'id,fullname,role,contact,complex,building,entrance,apartment')
+        self.assertEqual(len(lines), 2)
+        self.assertIn('Олена', lines[1])
+
+    def test_csv_export_escapes_formula_cells(self):
+        Resident.objects.filter(fullname='Олена').update(fullname='=HYPERLINK("http://x")')
+
+        response = self.client.get(reverse('residents_list'), {'export': 'csv'})
+
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertIn('"\'=HYPERLINK(""http://x"")"', lines[1])
+
+    def test_jsonl_export(self):
+        response = self.client.get(reverse('residents_list'), {'export': 'jsonl'})
+
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([(r['fullname'], r['complex'], r['apartment']) for r in rows], [('Олена', 'A', 7)])
@@ -0,0 +1,109 @@
+from django.db.models import Count
+
+from .models import Apartment, Building
+
+
+class BuildingNode:
+    __slots__ = ('pk', 'number', 'floors', 'entrances')
+
+    def __init__(self, pk, number, floors):
+        self.pk = pk
+        self.number = number
+        self.floors = floors
+        self.entrances = []
+
+
+class EntranceNode:
+    __slots__ = ('pk', 'number', 'apartments', 'apartment_count', 'collapsed')
+
+    def __init__(self, pk, number, collapsed=False):
+        self.pk = pk
+        self.number = number
+        self.apartments = []
+        self.apartment_count = 0
+        self.collapsed = collapsed
+
+
+class ApartmentNode:
+    __slots__ = ('pk', 'number', 'floor', 'rooms', 'owner_name')
+
+    def __init__(self, pk, number, floor, rooms, owner_name=None):
+        self.pk = pk
+        self.number = number
+        self.floor = floor
+        self.rooms = rooms
+        self.owner_name = owner_name
+
+
+def build_complex_tree(complex_id, collapse_entrances=False):
+    """
+    Будинки → під'їзди → квартири (+ ім'я власника) одним проходом values().
+    Замість моделей повертає легкі вузли з __slots__.
+
+    collapse_entrances=True не тягне квартири взагалі: для під'їздів рахується
+    лише кількість квартир, а самі квартири підвантажуються окремо
+    (див. entrance_apartment_nodes).
+    """
+    buildings = Building.objects.filter(complex_id=complex_id)
+
+    if collapse_entrances:
+        rows = (
+            buildings
+            .values_list('building_id', 'number', 'floors', 'entrances__entrance_id', 'entrances__number')
+            .annotate(apartment_count=Count('entrances__apartments'))
+            .order_by('number', 'building_id', 'entrances__number', 'entrances__entrance_id')
+        )
+    else:
+        rows = (
+            buildings
+            .values_list(
+                'building_id', 'number', 'floors',
+                'entrances__entrance_id', 'entrances__number',
+                'entrances__apartments__apartment_id',
+                'entrances__apartments__number',
+                'entrances__apartments__floor',
+                'entrances__apartments__rooms',
+                'entrances__apartments__owner__name',
+            )
+            .order_by(
+                'number', 'building_id',
+                'entrances__number', 'entrances__entrance_id',
+                'entrances__apartments__floor', 'entrances__apartments__number',
+            )
+        )
+
+    tree = []
+    building = entrance = None
+
+    for row in rows:
+        building_id, b_number, b_floors, entrance_id, e_number = row[:5]
+        if building is None or building.pk != building_id:
+            building = BuildingNode(building_id, b_number, b_floors)
+            tree.append(building)
+            entrance = None
+        if entrance_id is None:
+            continue
+        if entrance is None or entrance.pk != entrance_id:
+            entrance = EntranceNode(entrance_id, e_number, collapsed=collapse_entrances)
+            building.entrances.append(entrance)
+
+        if collapse_entrances:
+            entrance.apartment_count = row[5]
+            continue
+
+        if row[5] is None:
+            continue
+        entrance.apartments.append(ApartmentNode(*row[5:]))
+        entrance.apartment_count += 1
+
+    return tree
+
+
+def entrance_apartment_nodes(entrance_id):
+    """Квартири одного під'їзду — для лінивого розгортання."""
+    rows = (
+        Apartment.objects.filter(entrance_id=entrance_id)
+        .values_list('apartment_id', 'number', 'floor', 'rooms', 'owner__name')
+        .order_by('floor', 'number')
+    )
+    return [ApartmentNode(*row) for row in rows]
@@ -1,17 +1,22 @@
 from django.urls import path
 
 from . import access_views
+from . import lookup_views
 from . import maintenance_views
 from . import parking_views
 from . import people_views
+from . import search_views
 from . import views
 
 
 urlpatterns = [
     path('', views.complex_list, name='complex_list'),
+    path('search/', search_views.global_search, name='global_search'),
+    path('lookup/<str:kind>/', lookup_views.form_lookup, name='form_lookup'),
     path('complex/<int:pk>/', views.complex_detail, name='complex_detail'),
     path('complex/<int:pk>/edit/', views.complex_edit, name='complex_edit'),
     path('complex/<int:pk>/delete/', views.complex_delete, name='complex_delete'),
+    path('complex/<int:complex_pk>/import/', views.complex_import, name='complex_import'),
     path('complex/<int:complex_pk>/building/add/', views.building_add, name='building_add'),
     path('building/<int:pk>/edit/', views.building_edit, name='building_edit'),
     path('building/<int:pk>/delete/', views.building_delete, name='building_delete'),
@@ -22,6 +27,7 @@ urlpatterns = [
     ),
     path('entrance/<int:pk>/edit/', views.entrance_edit, name='entrance_edit'),
     path('entrance/<int:pk>/delete/', views.entrance_delete, name='entrance_delete'),
+    path('entrance/<int:pk>/apartments/', views.entrance_apartments, name='entrance_apartments'),
     path(
         'complex/<int:complex_pk>/entrance/<int:entrance_id>/apartment/add/',
         views.entrance_add_apartment,
@@ -54,7 +60,10 @@ urlpatterns = [
     path('tickets/<int:pk>/delete/', maintenance_views.ticket_delete, name='ticket_delete'),
     path('visitors/', access_views.visitors_list, name='visitors_list'),
     path('visitors/<int:pk>/qr/', access_views.visitor_qr, name='visitor_qr'),
+    path('visitors/<int:pk>/qr.<str:fmt>', access_views.visitor_qr_image, name='visitor_qr_image'),
     path('visitors/validate-qr/', access_views.visitor_qr_validate, name='visitor_qr_validate'),
+    path('visitors/entries/', access_views.visitor_entries_today, name='visitor_entries_today'),
+    path('visitors/validate-qr/batch/', access_views.visitor_qr_validate_batch, name='visitor_qr_validate_batch'),
     path('residents/quick-add/', access_views.resident_quick_add, name='resident_quick_add'),
     path('visitor/<int:pk>/delete/', access_views.visitor_delete, name='visitor_delete'),
 ]
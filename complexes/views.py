@@ -1,7 +1,6 @@
 # complexes/views.py
 
 from django.contrib import messages
-from django.db.models import Prefetch, Q
 from residence_manager.responses import forbidden_response
 from django.shortcuts import get_object_or_404, redirect, render
 from .models import (
@@ -19,7 +18,13 @@ from .forms import (
     EntranceForm,
     ApartmentForm,
     OwnerForm,
+    ComplexImportForm,
 )
+from .importer import ImportFormatError, import_complex_file
+from .pagination import paginate_keyset
+from .search import search_complexes
+from .stats import annotate_complex_stats
+from .tree import build_complex_tree, entrance_apartment_nodes
 from accounts.utils import (
     is_superadmin,
     is_complex_admin,
@@ -65,9 +70,9 @@ def complex_list(request):
     - супер адмін може створити новий ЖК (форма внизу)
     """
     q = (request.GET.get('q') or '').strip()
-    complexes = ResidentialComplex.objects.all().order_by('name')
+    complexes = annotate_complex_stats(ResidentialComplex.objects.all()).order_by('name')
     if q:
-        complexes = complexes.filter(Q(name__icontains=q) | Q(address__icontains=q))
+        complexes = search_complexes(complexes, q)
 
     if request.method == 'POST':
         if not is_superadmin(request.user):
@@ -98,7 +103,7 @@ def complex_detail(request, pk):
     - ComplexAdmin для цього ЖК
     - (опційно тільки перегляд можна буде відкрити ширше)
     """
-    complex_obj = get_object_or_404(ResidentialComplex, pk=pk)
+    complex_obj = get_object_or_404(annotate_complex_stats(ResidentialComplex.objects.all()), pk=pk)
 
     if not user_can_manage_complex(request.user, complex_obj) and not is_superadmin(request.user):
         return forbidden_response(request)
@@ -114,32 +119,36 @@ def complex_detail(request, pk):
             b.save()
             return redirect('complex_detail', pk=complex_obj.pk)
 
-    buildings = (
-        Building.objects.filter(complex=complex_obj)
-        .prefetch_related(
-            Prefetch(
-                'entrances',
-                queryset=Entrance.objects.prefetch_related(
-                    Prefetch(
-                        'apartments',
-                        queryset=Apartment.objects.select_related('owner')
-                    )
-                )
-            )
-        )
-        .order_by('number')
-    )
+    # ?collapse=1 — під'їзди згорнуті, квартири підвантажуються на вимогу
+    collapse_entrances = request.GET.get('collapse') == '1'
+    buildings = build_complex_tree(complex_obj.pk, collapse_entrances=collapse_entrances)
 
     staff = Staff.objects.filter(complex=complex_obj).order_by('fullname')
 
     return render(request, 'complexes/complex_detail.html', {
         'complex': complex_obj,
         'buildings': buildings,
+        'collapse_entrances': collapse_entrances,
         'staff': staff,
         'building_form': building_form or BuildingForm(),
     })
 
 
+def entrance_apartments(request, pk):
+    """
+    Фрагмент зі списком квартир під'їзду (для згорнутого дерева ЖК).
+    """
+    entrance = get_object_or_404(Entrance.objects.select_related('building__complex'), pk=pk)
+    complex_obj = entrance.building.complex
+
+    if not user_can_manage_complex(request.user, complex_obj):
+        return forbidden_response(request)
+
+    return render(request, 'complexes/entrance_apartments.html', {
+        'apartments': entrance_apartment_nodes(entrance.pk),
+    })
+
+
 def complex_edit(request, pk):
     """
     Редагування даних ЖК.
@@ -201,6 +210,40 @@ def building_add(request, complex_pk):
     })
 
 
+
+def complex_import(request, complex_pk):
+    """
+    Масове завантаження будинків, під'їздів, квартир і власників з CSV/XLSX.
+    Доступ: SuperAdmin або ComplexAdmin цього ЖК.
+    """
+    complex_obj = get_object_or_404(ResidentialComplex, pk=complex_pk)
+
+    if not user_can_manage_complex(request.user, complex_obj):
+        return forbidden_response(request)
+
+    result = None
+    if request.method == 'POST':
+        form = ComplexImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            try:
+                result = import_complex_file(
+                    complex_obj,
+                    upload,
+                    filename=upload.name,
+                    dry_run=form.cleaned_data['dry_run'],
+                )
+            except (ImportFormatError, UnicodeDecodeError) as exc:
+                form.add_error('file', str(exc))
+    else:
+        form = ComplexImportForm()
+
+    return render(request, 'complexes/complex_import.html', {
+        'complex': complex_obj,
+        'form': form,
+        'result': result,
+    })
+
 def building_edit(request, pk):
     building = get_object_or_404(Building, pk=pk)
     complex_obj = building.complex
@@ -398,10 +441,10 @@ def storage_list(request):
     # --- фільтр за ЖК ---
     if selected_complex_id:
         storages = storages.filter(
-            apartment__entrance__building__complex_id=selected_complex_id
+            complex_id=selected_complex_id
         )
 
-    # — квартири для форми додавання —
+    # — квартири для перевірки вибраної у формі (варіанти підвантажує form_lookup) —
     apartments = _get_storage_apartments(selected_complex_id)
 
     # — Додавання комірки —
@@ -439,8 +482,7 @@ def storage_list(request):
         request,
         'complexes/storage_list.html',
         {
-            'storages': storages,
-            'apartments': apartments,
+            'storages': paginate_keyset(request, storages, ('number',)),
             'complexes': complexes,
             'selected_complex_id': selected_complex_id,
             'show_complex_column': is_superadmin(request.user) and not selected_complex_id,
@@ -525,7 +567,6 @@ def storage_edit(request, pk):
             'storage': storage,
             'complexes': complexes,
             'selected_complex': selected_complex,
-            'apartments': apartments,
         },
     )
 
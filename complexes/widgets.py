@@ -0,0 +1,78 @@
+from django import forms
+from django.urls import reverse
+
+
+class AutocompleteSelect(forms.Select):
+    """
+    <select>, у якому рендериться лише вибране значення. Решту варіантів
+    підвантажує complexes/autocomplete.js з form_lookup (JSON, keyset-сторінки),
+    тож форма не будує тисячі <option> і їхніх підписів.
+    Валідацію робить саме поле: ModelChoiceField шукає лише надісланий pk.
+    """
+
+    def __init__(self, kind, attrs=None, complex_id=None):
+        super().__init__(attrs)
+        self.kind = kind
+        self.complex_id = complex_id
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        widget_attrs = context['widget']['attrs']
+        widget_attrs['data-autocomplete-url'] = reverse('form_lookup', args=[self.kind])
+        if self.complex_id is not None:
+            widget_attrs['data-autocomplete-complex'] = self.complex_id
+        return context
+
+    def optgroups(self, name, value, attrs=None):
+        all_choices = self.choices
+        self.choices = list(self._selected_choices(value))
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = all_choices
+
+    def _selected_choices(self, value):
+        field = getattr(self.choices, 'field', None)
+        if field is None:
+            yield from self.choices
+            return
+        if field.empty_label is not None:
+            yield '', field.empty_label
+        pks = [pk for pk in value if str(pk).isdigit()]
+        if pks:
+            queryset = label_queryset(field.queryset, field.label_from_instance)
+            for obj in queryset.filter(pk__in=pks):
+                yield field.prepare_value(obj), field.label_from_instance(obj)
+
+
+def precomputed_label(prepare):
+    """
+    Декоратор для label_from_instance: prepare(queryset) додає до queryset
+    select_related/анотації, з яких підпис будується без окремих запитів.
+    """
+    def decorate(label):
+        label.prepare_queryset = prepare
+        return label
+    return decorate
+
+
+def label_queryset(queryset, label):
+    """queryset, підготовлений для підписів label (див. precomputed_label)."""
+    prepare = getattr(label, 'prepare_queryset', None)
+    return prepare(queryset) if prepare is not None else queryset
+
+
+def use_autocomplete(field, kind):
+    """Замінює віджет ModelChoiceField на AutocompleteSelect з тими ж attrs."""
+    widget = AutocompleteSelect(kind, attrs=field.widget.attrs)
+    widget.choices = field.choices
+    widget.is_required = field.required
+    field.widget = widget
+    return field
+
+
+def scope_autocomplete(field, complex_id):
+    """Підказки для поля — лише з одного ЖК (для супер-адміна з вибраним ЖК)."""
+    if isinstance(field.widget, AutocompleteSelect):
+        field.widget.complex_id = complex_id
+    return field
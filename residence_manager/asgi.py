@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'residence_manager.settings')
+# Під ASGI постійні з'єднання вимикаються в settings (RUNNING_ASGI) незалежно
+# від DB_CONN_MAX_AGE — див. коментар там.
+os.environ['DJANGO_ASGI'] = '1'
 
 application = get_asgi_application()
@@ -0,0 +1,124 @@
+"""
+Конфігурація gunicorn: gunicorn -c python:residence_manager.gunicorn_conf
+
+Клас воркера, кількість воркерів і потоків визначаються з кількості
+доступних CPU (з урахуванням cpuset і квоти cgroup у контейнері) та змінних
+оточення GUNICORN_*:
+
+    GUNICORN_WORKER_CLASS  sync | gthread | uvicorn (за замовчуванням gthread)
+    GUNICORN_WORKERS       кількість процесів (sync/gthread: 2 * CPU + 1, uvicorn: CPU)
+    GUNICORN_THREADS       потоків на воркер gthread (за замовчуванням 4)
+    GUNICORN_BIND          адреса (за замовчуванням 0.0.0.0:8000)
+    GUNICORN_MAX_REQUESTS  перезапуск воркера після N запитів (0 — вимкнено)
+    GUNICORN_PRELOAD       завантажити застосунок у master до fork (1/0)
+
+uvicorn запускає ASGI-застосунок (async view) без постійних з'єднань з БД
+(settings.RUNNING_ASGI), sync і gthread — WSGI.
+Кожен потік gthread тримає власне з'єднання з БД (CONN_MAX_AGE), тож
+workers * threads має вміщатися в max_connections PostgreSQL.
+"""
+
+import math
+import os
+
+
+WORKER_CLASSES = {
+    'sync': 'sync',
+    'gthread': 'gthread',
+    'uvicorn': 'uvicorn_worker.UvicornWorker',
+}
+
+
+def _env_int(name, default):
+    value = os.environ.get(name, '').strip()
+    return int(value) if value else default
+
+
+def _env_bool(name, default):
+    value = os.environ.get(name, '').strip().lower()
+    return value in ('1', 'true', 'yes') if value else default
+
+
+def cpu_count():
+    """CPU, доступні процесу: cpuset (sched_getaffinity) і квота cgroup v2/v1."""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+
+    quota = _cgroup_cpu_quota()
+    if quota is not None:
+        count = min(count, max(1, math.ceil(quota)))
+    return count
+
+
+def _cgroup_cpu_quota():
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+            quota = int(f.read())
+        with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+            period = int(f.read())
+        if quota > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+_worker_kind = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread').strip().lower()
+if _worker_kind not in WORKER_CLASSES:
+    raise RuntimeError(
+        f'GUNICORN_WORKER_CLASS={_worker_kind!r}: очікується одне з {", ".join(WORKER_CLASSES)}.'
+    )
+_cpus = cpu_count()
+
+wsgi_app = (
+    'residence_manager.asgi:application'
+    if _worker_kind == 'uvicorn'
+    else 'residence_manager.wsgi:application'
+)
+worker_class = WORKER_CLASSES[_worker_kind]
+# Async-воркер сам обслуговує багато з'єднань, тож достатньо процесу на CPU;
+# синхронним потрібен запас на час очікування БД.
+workers = _env_int('GUNICORN_WORKERS', _cpus if _worker_kind == 'uvicorn' else 2 * _cpus + 1)
+threads = _env_int('GUNICORN_THREADS', 4) if _worker_kind == 'gthread' else 1
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Застосунок імпортується в master до fork — воркери ділять пам'ять
+# (copy-on-write) і стартують швидше.
+preload_app = _env_bool('GUNICORN_PRELOAD', True)
+
+# Перезапуск воркерів обмежує ріст пам'яті; jitter, щоб усі воркери
+# не перезапускалися одночасно.
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', max(1, max_requests // 10) if max_requests else 0)
+
+timeout = _env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = _env_int('GUNICORN_KEEPALIVE', 5)
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG') or None
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    # З'єднання з БД, відкриті в master під час preload, не можна ділити
+    # між процесами — кожен воркер відкриває власні.
+    from django.db import connections
+
+    connections.close_all()
+
+
+def when_ready(server):
+    server.log.info(
+        'worker_class=%s workers=%s threads=%s cpus=%s preload=%s',
+        _worker_kind, workers, threads, _cpus, preload_app,
+    )
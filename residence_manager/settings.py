@@ -11,8 +11,10 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+from django.core.exceptions import ImproperlyConfigured
 from django.urls import reverse_lazy
 import os
+import tempfile
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -41,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'complexes',
     'accounts',
 ]
@@ -51,6 +54,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.PrincipalMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -67,6 +71,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'accounts.context_processors.principal',
             ],
         },
     },
@@ -77,6 +82,27 @@ WSGI_APPLICATION = 'residence_manager.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# Постійні з'єднання: скільки секунд воркер тримає з'єднання між запитами
+# (0 — нове з'єднання на кожен запит, "none" — без обмеження); перед
+# повторним використанням з'єднання перевіряється, щоб обірване не дало 500
+_conn_max_age = os.environ.get('DB_CONN_MAX_AGE', '60').strip().lower()
+DB_CONN_MAX_AGE = None if _conn_max_age == 'none' else int(_conn_max_age)
+DB_CONN_HEALTH_CHECKS = os.environ.get('DB_CONN_HEALTH_CHECKS', 'True').lower() in ('1', 'true', 'yes')
+# Під ASGI (residence_manager.asgi, воркер uvicorn) запити до БД виконуються в
+# потоках sync_to_async, і постійні з'єднання накопичувалися б по одному на потік
+# аж до "too many clients" — тож там завжди нове з'єднання на запит, навіть якщо
+# DB_CONN_MAX_AGE задано; повторно використовувати з'єднання — через DB_POOL=1
+RUNNING_ASGI = os.environ.get('DJANGO_ASGI') == '1'
+if RUNNING_ASGI:
+    DB_CONN_MAX_AGE = 0
+
+# Пул з'єднань psycopg 3 (DB_POOL=1) замість постійних з'єднань — опційно,
+# потребує пакетів "psycopg[binary,pool]"; розмір пулу — на один процес воркера
+DB_POOL = os.environ.get('DB_POOL', 'False').lower() in ('1', 'true', 'yes')
+DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', '2'))
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '4'))
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', '10'))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -85,9 +111,79 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', '12345'),
         'HOST': os.environ.get('DB_HOST', 'localhost'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
     }
 }
 
+if DB_POOL:
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        raise ImproperlyConfigured('DB_POOL=1 потребує пакетів psycopg[binary,pool] (psycopg 3).')
+    # Пул сам тримає з'єднання відкритими, тож Django має повертати їх після запиту
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+        },
+    }
+
+# Сесії: cached_db (за замовчуванням) читає сесію з кешу CACHES['default'] і
+# звертається до django_session лише при записі (вхід, зміна сесії) або промаху
+# кешу, тож витіснення з кешу чи перезапуск контейнера не розлогінює; застарілі
+# рядки прибирає manage.py clearsessions (cron). signed_cookies — усе в
+# підписаній cookie без сховища; cache — лише кеш (сесії губляться при
+# витісненні); db — кожен запит читає django_session
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'cached_db').strip().lower()
+SESSION_ENGINES = {
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'cache': 'django.contrib.sessions.backends.cache',
+    'db': 'django.contrib.sessions.backends.db',
+}
+if SESSION_BACKEND not in SESSION_ENGINES:
+    raise ImproperlyConfigured(
+        f'SESSION_BACKEND={SESSION_BACKEND!r}: очікується одне з {", ".join(SESSION_ENGINES)}.'
+    )
+SESSION_ENGINE = SESSION_ENGINES[SESSION_BACKEND]
+
+# Основний кеш (complexes.cache, сторінки варіантів, QR-зображення):
+# locmem — у пам'яті процесу; file — каталог CACHE_LOCATION, спільний для
+# воркерів gunicorn на хості (скидання версії ЖК бачать усі); dummy — вимкнено;
+# або повний шлях до бекенда Django з CACHE_LOCATION
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+}
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem').strip()
+if CACHE_BACKEND not in CACHE_BACKENDS and '.' not in CACHE_BACKEND:
+    raise ImproperlyConfigured(
+        f'CACHE_BACKEND={CACHE_BACKEND!r}: очікується одне з {", ".join(CACHE_BACKENDS)} або шлях до бекенда.'
+    )
+CACHE_LOCATION = os.environ.get('CACHE_LOCATION') or (
+    os.path.join(tempfile.gettempdir(), 'residence_manager', 'cache')
+    if CACHE_BACKEND == 'file'
+    else 'default'
+)
+CACHE_TIMEOUT = int(os.environ.get('CACHE_TIMEOUT', '300'))
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', '10000'))
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS.get(CACHE_BACKEND, CACHE_BACKEND),
+        'LOCATION': CACHE_LOCATION,
+        'TIMEOUT': CACHE_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': CACHE_MAX_ENTRIES},
+    },
+}
+
+# Повідомлення (django.contrib.messages) — у cookie, без звернень до сесії
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
 
 
 # Password validation
@@ -131,6 +227,70 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Розмір сторінки для списків (complexes.pagination)
+LIST_PAGE_SIZE = int(os.environ.get('LIST_PAGE_SIZE', '50'))
+
+# Скільки рядків за раз читати з БД при CSV/JSONL вивантаженні (complexes.exports)
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', '2000'))
+
+# Кеш ролей користувача (accounts.principal): у спільному кеші (CACHE_BACKEND=file)
+# скидання із сигналів бачать усі воркери, TTL — PRINCIPAL_CACHE_TIMEOUT.
+# Кеш у пам'яті процесу (порожній alias — LRU на PRINCIPAL_CACHE_SIZE записів,
+# або locmem) скидається лише в одному воркері, тому живе PRINCIPAL_CACHE_LOCAL_TIMEOUT
+PRINCIPAL_CACHE_ALIAS = os.environ.get('PRINCIPAL_CACHE_ALIAS', 'default')
+PRINCIPAL_CACHE_SIZE = int(os.environ.get('PRINCIPAL_CACHE_SIZE', '1024'))
+PRINCIPAL_CACHE_TIMEOUT = int(os.environ.get('PRINCIPAL_CACHE_TIMEOUT', '60'))
+PRINCIPAL_CACHE_LOCAL_TIMEOUT = int(os.environ.get('PRINCIPAL_CACHE_LOCAL_TIMEOUT', '5'))
+
+# QR-токени відвідувачів v2 (complexes.qr_tokens): строк дії в секундах
+# та deny-set відкликаних дозволів (розмір копії в процесі і кеш). Deny-set —
+# у спільному кеші (CACHE_BACKEND=file), щоб відкликання бачили всі воркери;
+# з кешем у пам'яті процесу v2-токени додатково перевіряються по БД
+VISITOR_QR_TOKEN_TTL = int(os.environ.get('VISITOR_QR_TOKEN_TTL', str(7 * 24 * 3600)))
+VISITOR_QR_DENY_SIZE = int(os.environ.get('VISITOR_QR_DENY_SIZE', '10000'))
+VISITOR_QR_DENY_CACHE_ALIAS = os.environ.get('VISITOR_QR_DENY_CACHE_ALIAS', 'default')
+# Токен перевипускається раз на інтервал (секунди), щоб QR-зображення можна
+# було кешувати; готові PNG/SVG лежать у кеші Django під хешем токена
+VISITOR_QR_REISSUE_INTERVAL = int(os.environ.get('VISITOR_QR_REISSUE_INTERVAL', '3600'))
+VISITOR_QR_IMAGE_CACHE_ALIAS = os.environ.get('VISITOR_QR_IMAGE_CACHE_ALIAS', 'default')
+VISITOR_QR_IMAGE_CACHE_TTL = int(os.environ.get('VISITOR_QR_IMAGE_CACHE_TTL', str(24 * 3600)))
+# Максимум токенів в одному пакетному запиті перевірки QR
+VISITOR_QR_BATCH_LIMIT = int(os.environ.get('VISITOR_QR_BATCH_LIMIT', '500'))
+
+# Журнал проходів (complexes.entry_log): події пишуться пакетами фоновим
+# потоком — коли назбирається BATCH_SIZE або раз на FLUSH_INTERVAL_MS (0 — без потоку)
+VISITOR_ENTRY_BATCH_SIZE = int(os.environ.get('VISITOR_ENTRY_BATCH_SIZE', '200'))
+VISITOR_ENTRY_FLUSH_INTERVAL_MS = int(os.environ.get('VISITOR_ENTRY_FLUSH_INTERVAL_MS', '500'))
+# На скільки місяців наперед створювати партиції (manage.py ensure_partitions)
+PARTITION_MONTHS_AHEAD = int(os.environ.get('PARTITION_MONTHS_AHEAD', '2'))
+# Строк зберігання відвідувачів і журналу проходів у місяцях; старші партиції
+# від'єднуються командою ensure_partitions (0 — зберігати все)
+VISITOR_RETENTION_MONTHS = int(os.environ.get('VISITOR_RETENTION_MONTHS', '0'))
+VISITOR_ENTRY_RETENTION_MONTHS = int(os.environ.get('VISITOR_ENTRY_RETENTION_MONTHS', '0'))
+# У списку відвідувачів охоронець бачить лише останні N днів — запит торкається
+# тільки свіжих партицій complexes_visitor (перевірку QR це не обмежує)
+VISITOR_GUARD_WINDOW_DAYS = int(os.environ.get('VISITOR_GUARD_WINDOW_DAYS', '7'))
+
+# Глобальний пошук (complexes.search): скільки результатів кожного виду
+# повертати і мінімальна довжина запиту (номер квартири дозволений завжди)
+SEARCH_RESULTS_PER_KIND = int(os.environ.get('SEARCH_RESULTS_PER_KIND', '10'))
+SEARCH_MIN_QUERY_LENGTH = int(os.environ.get('SEARCH_MIN_QUERY_LENGTH', '2'))
+# Скільки збігів з індексу ранжувати для кожного виду (0 — усі)
+SEARCH_RANK_CANDIDATES = int(os.environ.get('SEARCH_RANK_CANDIDATES', '1000'))
+
+# Скільки варіантів повертає form_lookup за один запит (автодоповнення у формах)
+LOOKUP_PAGE_SIZE = int(os.environ.get('LOOKUP_PAGE_SIZE', '20'))
+# Кеш ЖК (complexes.cache): ключі з простором імен і версією ЖК, яку скидають
+# сигнали; для кількох воркерів потрібен спільний кеш (CACHE_BACKEND=file).
+# Лічильники влучань додаються до спільних раз на COMPLEX_CACHE_STATS_FLUSH звернень
+COMPLEX_CACHE_ALIAS = os.environ.get('COMPLEX_CACHE_ALIAS', 'default')
+COMPLEX_CACHE_STATS_FLUSH = int(os.environ.get('COMPLEX_CACHE_STATS_FLUSH', '100'))
+# Строк кешу сторінок варіантів без запиту (complexes.choice_cache), 0 — вимкнено.
+# З кешем у пам'яті процесу (locmem) скидання бачить лише один воркер, тому
+# строк обмежено LOOKUP_CACHE_LOCAL_TTL
+LOOKUP_CACHE_TTL = int(os.environ.get('LOOKUP_CACHE_TTL', '600'))
+LOOKUP_CACHE_LOCAL_TTL = int(os.environ.get('LOOKUP_CACHE_LOCAL_TTL', '5'))
+
 LOGIN_URL = reverse_lazy('login')
 LOGIN_REDIRECT_URL = reverse_lazy('accounts:dashboard')
 LOGOUT_REDIRECT_URL = '/'